@@ -1,18 +1,19 @@
 from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.db.database import get_db
+from app.db.database import get_db, get_read_db
 from app.schemas.user import RagpickerApplicationResponse, ApplicationStatus,ApplicationCreateRequest
 from app.models.user import User, RagpickerApplication, RagpickerDetails
 from app.services import s3
+from app.services.clerk import clerk_client, ClerkError
+from app.services.twilio_service import twilio_service
+from app.services.response_cache import ragpicker_directory_cache
 from datetime import datetime
-import httpx
 from typing import List
-import os
 import logging
 from fastapi import Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from app.api.templates import get_templates
 from pydantic import BaseModel
 
 # Configure logging
@@ -21,202 +22,57 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Set up templates
-templates_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
-templates = Jinja2Templates(directory=templates_dir)
+if not clerk_client.configured:
+    logger.warning("CLERK_SECRET_KEY not found in environment, Clerk role updates will fail")
 
-# Clerk SDK configuration
-CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
-# Hardcoded backup key for testing - replace with your actual key
-if not CLERK_SECRET_KEY:
-    # This is just a fallback for development, should be set properly in production
-    logger.warning("CLERK_SECRET_KEY not found in environment, using hardcoded test key")
-    CLERK_SECRET_KEY = "REPLACE_WITH_YOUR_CLERK_SECRET_KEY"  # Replace with your actual key
-    
-# Updated Clerk API URL
-CLERK_API_URL = "https://api.clerk.dev"  # Changed from api.clerk.com to api.clerk.dev
-
-async def update_clerk_role(clerk_id: str, new_role: str):
-    """Update user role in Clerk system"""
-    
-    # Check if CLERK_SECRET_KEY is set
-    if not CLERK_SECRET_KEY or CLERK_SECRET_KEY == "REPLACE_WITH_YOUR_CLERK_SECRET_KEY":
+def require_clerk_configured():
+    if not clerk_client.configured:
         error_msg = "CLERK_SECRET_KEY environment variable is not properly set"
         logger.error(error_msg)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=error_msg
         )
-    
-    # Print the clerk_id for debugging
-    logger.info(f"Clerk ID before API call: {clerk_id}")
-    
-    # Make sure clerk_id is correctly formatted (no leading/trailing spaces)
-    clerk_id = clerk_id.strip()
-    
-    # Full API URL
-    api_url = f"{CLERK_API_URL}/v1/users/{clerk_id}"
-    logger.info(f"Full Clerk API URL: {api_url}")
-    
-    headers = {
-        "Authorization": f"Bearer {CLERK_SECRET_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    payload = {
-        "public_metadata": {
-            "role": new_role
-        }
-    }
-    
+
+async def update_clerk_role(clerk_id: str, new_role: str):
+    """Update user role in Clerk system"""
+    require_clerk_configured()
     logger.info(f"Making request to Clerk API for user {clerk_id} to set role to {new_role}")
-    logger.info(f"Request payload: {payload}")
-    
+
     try:
-        async with httpx.AsyncClient() as client:
-            # Enable debug logging for httpx
-            client.headers.update(headers)
-            
-            # Log the full request details
-            logger.info(f"Making PATCH request to {api_url}")
-            logger.info(f"Headers: {headers}")
-            
-            response = await client.patch(
-                api_url,
-                json=payload
-            )
-            
-        logger.info(f"Clerk API response status: {response.status_code}")
-        logger.info(f"Clerk API response body: {response.text}")
-            
-        if response.status_code != 200:
-            # Try to extract more error details from the response
-            error_detail = "Unknown error"
-            try:
-                error_data = response.json()
-                error_detail = str(error_data)
-                logger.error(f"Clerk API error: {error_detail}")
-            except:
-                error_detail = response.text[:200]  # Get first 200 chars of response
-                logger.error(f"Clerk API error (text): {error_detail}")
-                
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to update user role in Clerk system. Status: {response.status_code}. Details: {error_detail}"
-            )
-            
-        logger.info(f"Successfully updated role for user {clerk_id}")
-        return response.json()
-    except httpx.RequestError as exc:
-        error_msg = f"HTTP Request failed: {str(exc)}"
-        logger.error(error_msg)
+        clerk_user = await clerk_client.update_role(clerk_id, new_role)
+    except ClerkError as e:
+        last = e.responses[-1] if e.responses else {}
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=error_msg
+            detail=f"Failed to update user role in Clerk system. Status: {last.get('status')}. Details: {last.get('body', last.get('error'))}"
         )
 
+    logger.info(f"Successfully updated role for user {clerk_id}")
+    return clerk_user
+
 async def update_clerk_role_alternative(clerk_id: str, new_role: str):
     """
     Alternative implementation to update user role in Clerk system
     Uses multiple API formats to ensure compatibility
     """
-    if not CLERK_SECRET_KEY or CLERK_SECRET_KEY == "REPLACE_WITH_YOUR_CLERK_SECRET_KEY":
-        error_msg = "CLERK_SECRET_KEY environment variable is not properly set"
+    require_clerk_configured()
+    clerk_id = clerk_id.strip()
+    logger.info(f"Using alternative method to update Clerk role for user: {clerk_id}")
+
+    try:
+        return await clerk_client.update_role(clerk_id, new_role)
+    except ClerkError as e:
+        error_msg = f"All attempts to update Clerk user failed. Responses: {e.responses}"
         logger.error(error_msg)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=error_msg
+            detail={
+                "message": "Failed to update user role in Clerk",
+                "clerk_id": clerk_id,
+                "responses": e.responses
+            }
         )
-    
-    # Clean up clerk_id
-    clerk_id = clerk_id.strip()
-    logger.info(f"Using alternative method to update Clerk role for user: {clerk_id}")
-    
-    # Try various API formats - Clerk might have changed their API structure
-    api_urls = [
-        f"https://api.clerk.dev/v1/users/{clerk_id}",     # New API with v1
-        f"https://api.clerk.com/v1/users/{clerk_id}",     # Old domain with v1
-        f"https://clerk.com/v1/users/{clerk_id}",         # Base domain with v1
-        f"https://api.clerk.dev/users/{clerk_id}",        # New API without v1
-        f"https://api.clerk.com/users/{clerk_id}",        # Old domain without v1
-        f"https://clerk.com/users/{clerk_id}"             # Base domain without v1
-    ]
-    
-    headers = {
-        "Authorization": f"Bearer {CLERK_SECRET_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    # According to Clerk's latest docs
-    payload = {
-        "public_metadata": {
-            "role": new_role
-        }
-    }
-    
-    logger.info(f"Payload for update: {payload}")
-    
-    # Try each URL format
-    all_responses = []
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for api_url in api_urls:
-            try:
-                logger.info(f"Trying API URL: {api_url}")
-                
-                response = await client.patch(
-                    api_url,
-                    json=payload,
-                    headers=headers
-                )
-                
-                status_code = response.status_code
-                logger.info(f"Response from {api_url}: Status {status_code}")
-                
-                response_text = response.text[:200] if response.text else "No response body"
-                logger.info(f"Response body: {response_text}")
-                
-                # Store all responses for debugging
-                all_responses.append({
-                    "url": api_url,
-                    "status": status_code,
-                    "body": response_text
-                })
-                
-                if status_code == 200:
-                    logger.info(f"Successfully updated role using {api_url}")
-                    return response.json()
-                
-                # Special handling for common error codes
-                if status_code == 401:
-                    logger.error("Authentication failed - invalid API key")
-                elif status_code == 403:
-                    logger.error("Authorization failed - insufficient permissions")
-                elif status_code == 404:
-                    logger.error(f"User not found with ID {clerk_id}")
-                elif status_code == 422:
-                    logger.error(f"Invalid request payload: {response_text}")
-                
-            except Exception as e:
-                logger.warning(f"Failed with URL {api_url}: {str(e)}")
-                all_responses.append({
-                    "url": api_url,
-                    "error": str(e)
-                })
-    
-    # If we get here, all attempts failed
-    error_msg = f"All attempts to update Clerk user failed. Responses: {all_responses}"
-    logger.error(error_msg)
-    
-    # Return a more detailed error
-    raise HTTPException(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        detail={
-            "message": "Failed to update user role in Clerk",
-            "clerk_id": clerk_id,
-            "responses": all_responses
-        }
-    )
 
 @router.post("/applications/", status_code=status.HTTP_201_CREATED)
 async def create_application(
@@ -253,7 +109,6 @@ async def create_application(
         
         db.add(new_application)
         await db.commit()
-        await db.refresh(new_application)
         
         return {
             "message": "Application submitted successfully",
@@ -273,7 +128,7 @@ async def create_application(
 @router.get("/applications/", response_model=List[RagpickerApplicationResponse])
 async def get_all_applications(
     status: ApplicationStatus = None,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get all ragpicker applications (Admin only)
@@ -345,16 +200,16 @@ async def review_application(
     application.status = status
     application.updated_at = datetime.utcnow()
     
+    # Get associated user, needed for the role change and the notification
+    user_result = await db.execute(
+        select(User)
+        .where(User.clerkId == application.clerk_id)
+    )
+    user = user_result.scalar_one_or_none()
+    
     if status == "ACCEPTED":
         logger.info(f"Application accepted, updating user role for clerk_id: {application.clerk_id}")
         
-        # Get associated user
-        user_result = await db.execute(
-            select(User)
-            .where(User.clerkId == application.clerk_id)
-        )
-        user = user_result.scalar_one_or_none()
-        
         if not user:
             logger.warning(f"User with clerk_id {application.clerk_id} not found in database")
             raise HTTPException(status_code=404, detail="User not found in database")
@@ -377,7 +232,6 @@ async def review_application(
             
             # Update local database
             user.role = "RAGPICKER"
-            db.add(user)
             
         except HTTPException as http_exc:
             # Pass through HTTP exceptions with their status codes
@@ -392,16 +246,13 @@ async def review_application(
                 detail=f"Failed to update user role in Clerk: {str(e)}"
             )
     
-    db.add(application)
     await db.commit()
+    if status == "ACCEPTED":
+        # A new ragpicker shifts every page of the directory
+        ragpicker_directory_cache.invalidate_all()
     
     # Send SMS notification based on application status
     try:
-        user_result = await db.execute(
-            select(User)
-            .where(User.clerkId == application.clerk_id)
-        )
-        user = user_result.scalar_one_or_none()
         applicant_name = f"{user.firstName} {user.lastName}" if user else "Applicant"
         
         if status == "ACCEPTED":
@@ -430,59 +281,19 @@ async def verify_clerk_user_exists(clerk_id: str):
     Verify that the Clerk user exists by making a GET request
     Returns the user data if found, raises an exception if not
     """
-    if not CLERK_SECRET_KEY or CLERK_SECRET_KEY == "REPLACE_WITH_YOUR_CLERK_SECRET_KEY":
-        error_msg = "CLERK_SECRET_KEY environment variable is not properly set"
+    require_clerk_configured()
+    clerk_id = clerk_id.strip()
+    logger.info(f"Verifying Clerk user exists: {clerk_id}")
+
+    try:
+        return await clerk_client.get_user(clerk_id)
+    except ClerkError:
+        error_msg = f"User with clerk_id {clerk_id} not found in Clerk"
         logger.error(error_msg)
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            status_code=status.HTTP_404_NOT_FOUND,
             detail=error_msg
         )
-    
-    # Clean up clerk_id
-    clerk_id = clerk_id.strip()
-    logger.info(f"Verifying Clerk user exists: {clerk_id}")
-    
-    # Try various API formats for GET request
-    api_urls = [
-        f"https://api.clerk.dev/v1/users/{clerk_id}",
-        f"https://api.clerk.com/v1/users/{clerk_id}",
-        f"https://api.clerk.dev/users/{clerk_id}",
-        f"https://api.clerk.com/users/{clerk_id}"
-    ]
-    
-    headers = {
-        "Authorization": f"Bearer {CLERK_SECRET_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        for api_url in api_urls:
-            try:
-                logger.info(f"Trying GET request to: {api_url}")
-                
-                response = await client.get(
-                    api_url,
-                    headers=headers
-                )
-                
-                status_code = response.status_code
-                logger.info(f"GET response from {api_url}: Status {status_code}")
-                
-                if status_code == 200:
-                    user_data = response.json()
-                    logger.info(f"Successfully verified user exists: {clerk_id}")
-                    return user_data
-                
-            except Exception as e:
-                logger.warning(f"GET request failed with URL {api_url}: {str(e)}")
-    
-    # If we get here, user was not found
-    error_msg = f"User with clerk_id {clerk_id} not found in Clerk"
-    logger.error(error_msg)
-    raise HTTPException(
-        status_code=status.HTTP_404_NOT_FOUND,
-        detail=error_msg
-    )
 
 # Add this Pydantic model for RFID data
 class RFIDData(BaseModel):
@@ -550,15 +361,12 @@ async def assign_rfid(
             ragpicker_details.RFID = rfid_value
         
         await db.commit()
-        
-        # Double-check the value was actually saved by refreshing from DB
-        await db.refresh(ragpicker_details)
-        saved_rfid = ragpicker_details.RFID
-        logger.info(f"RFID saved successfully: {saved_rfid}")
+        ragpicker_directory_cache.invalidate(clerk_id)
+        logger.info(f"RFID saved successfully: {rfid_value}")
         
         return {
             "message": "RFID assigned successfully",
-            "rfid": saved_rfid,
+            "rfid": rfid_value,
             "clerk_id": clerk_id
         }
     
@@ -580,4 +388,4 @@ async def admin_dashboard_page(request: Request):
     Serve the admin dashboard page
     """
     logger.info("Serving admin dashboard page")
-    return templates.TemplateResponse("admin_dashboard.html", {"request": request})
\ No newline at end of file
+    return get_templates().TemplateResponse("admin_dashboard.html", {"request": request})
\ No newline at end of file
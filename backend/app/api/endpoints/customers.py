@@ -51,7 +51,6 @@ async def create_customer_details(clerk_id: str, details: CustomerDetailsCreate,
         db.add(customer_details)
     
     await db.commit()
-    await db.refresh(customer_details)
     
     return CustomerDetailsResponse(
         clerkId=customer_details.clerkId,
@@ -124,7 +123,6 @@ async def update_customer_details(clerk_id: str, details: CustomerDetailsCreate,
     customer_details.wallet_address = details.wallet_address
     
     await db.commit()
-    await db.refresh(customer_details)
     
     return CustomerDetailsResponse(
         clerkId=customer_details.clerkId,
@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.db.database import get_db
+from sqlalchemy import and_, or_
+from app.core.config import NEARBY_DEFAULT_RADIUS_KM, NEARBY_MAX_RADIUS_KM
+from app.db.database import get_db, get_read_db
+from app.db.pagination import keyset_paginate, split_page
 from app.models.user import User, RagpickerDetails, Balances, Reviews, UserDetails
-from app.schemas.ragpicker import RagpickerDetailsCreate, RagpickerDetailsUpdate, RagpickerDetailsResponse, RagpickerListResponse, RagpickerBalanceResponse, RagpickerDetailedResponse
-from typing import List
+from app.schemas.ragpicker import RagpickerDetailsCreate, RagpickerDetailsUpdate, RagpickerDetailsResponse, RagpickerListResponse, RagpickerBalanceResponse, RagpickerDetailedResponse, RagpickerPage, RagpickerNearbyResponse
+from app.services.response_cache import ragpicker_directory_cache, etag_matches
+from app.services.geo import covering_cells, haversine_km
+from typing import List, Optional, Union
+import json
 import logging
 
 # Set up logger
@@ -12,47 +19,143 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.get("/all-ragpickers", response_model=List[RagpickerListResponse])
-async def get_ragpickers(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+@router.get("/all-ragpickers", response_model=Union[List[RagpickerListResponse], RagpickerPage])
+async def get_ragpickers(request: Request, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: AsyncSession = Depends(get_db)):
     """
-    Get all ragpickers, optionally filtered by location
+    Get all ragpickers, optionally filtered by location.
+
+    Passing `cursor` (empty for the first page) switches to keyset pagination,
+    newest first, and returns a page with `next_cursor`.
+
+    Responses are cached per page and carry an ETag; send it back in
+    If-None-Match to get a 304 when nothing changed. Cache misses are filled
+    from the primary: a lagging replica read right after an invalidation would
+    put the stale page back in the cache until the TTL expires.
     """
-    # Get all users with role 'RAGPICKER'
-    query = select(User, RagpickerDetails).join(
-        RagpickerDetails, 
-        User.clerkId == RagpickerDetails.clerkId, 
-        isouter=True
-    ).where(User.role == "RAGPICKER").offset(skip).limit(limit)
+    cache_key = f"{skip}:{limit}:{cursor}"
+    entry = ragpicker_directory_cache.get(cache_key)
+    if entry is None:
+        generation = ragpicker_directory_cache.generation
+        response_data, clerk_ids = await load_ragpicker_directory(db, skip, limit, cursor)
+        body = json.dumps(jsonable_encoder(response_data), separators=(",", ":")).encode("utf-8")
+        entry = ragpicker_directory_cache.put(cache_key, body, clerk_ids, generation)
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+async def load_ragpicker_directory(db: AsyncSession, skip: int, limit: int, cursor: Optional[str]):
+    """
+    Build one page of the ragpicker directory with a single query, returning
+    the response model and the clerk IDs it contains
+    """
+    # Ragpickers with their rating and profile picture in one query
+    query = (
+        select(
+            User.clerkId,
+            User.firstName,
+            User.lastName,
+            User.createdAt,
+            RagpickerDetails.average_rating,
+            UserDetails.profile_pic_url,
+        )
+        .outerjoin(RagpickerDetails, User.clerkId == RagpickerDetails.clerkId)
+        .outerjoin(UserDetails, User.clerkId == UserDetails.clerkId)
+        .where(User.role == "RAGPICKER")
+    )
     
-    result = await db.execute(query)
-    ragpickers = result.all()
-    
-    response_list = []
-    for user, details in ragpickers:
-        # If ragpicker details don't exist or average_rating is None, use default 0.0
-        avg_rating = 0.0
-        if details and details.average_rating is not None:
-            avg_rating = details.average_rating
-        
-        # Get profile pic URL from user details if available
-        profile_pic_url = None
-        user_details_query = select(UserDetails).where(UserDetails.clerkId == user.clerkId)
-        user_details_result = await db.execute(user_details_query)
-        user_details = user_details_result.scalars().first()
-        if user_details:
-            profile_pic_url = user_details.profile_pic_url
-            
-        response_list.append(
-            RagpickerListResponse(
-                clerkId=user.clerkId,
-                firstName=user.firstName,
-                lastName=user.lastName,
-                average_rating=avg_rating,
-                profile_pic_url=profile_pic_url
-            )
+    next_cursor = None
+    if cursor is not None:
+        query = keyset_paginate(query, User.createdAt, User.clerkId, cursor, limit)
+        result = await db.execute(query)
+        ragpickers, next_cursor = split_page(result.all(), limit, lambda row: (row.createdAt, row.clerkId))
+    else:
+        result = await db.execute(query.offset(skip).limit(limit))
+        ragpickers = result.all()
+    
+    response_list = [
+        RagpickerListResponse(
+            clerkId=row.clerkId,
+            firstName=row.firstName,
+            lastName=row.lastName,
+            # Ragpickers without details or ratings yet show 0.0
+            average_rating=row.average_rating if row.average_rating is not None else 0.0,
+            profile_pic_url=row.profile_pic_url
         )
+        for row in ragpickers
+    ]
+    clerk_ids = [row.clerkId for row in ragpickers]
     
-    return response_list
+    if cursor is not None:
+        return RagpickerPage(items=response_list, next_cursor=next_cursor), clerk_ids
+    return response_list, clerk_ids
+
+@router.get("/nearby", response_model=List[RagpickerNearbyResponse])
+async def get_nearby_ragpickers(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius: float = Query(NEARBY_DEFAULT_RADIUS_KM, gt=0, description="Search radius in km"),
+    limit: int = Query(20, ge=1, le=100),
+    sort: str = Query("distance", pattern="^(distance|rating)$"),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Ragpickers within `radius` km of a point, nearest first (or best rated
+    first with sort=rating). Only ragpickers with a located address appear.
+    """
+    if radius > NEARBY_MAX_RADIUS_KM:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Radius cannot exceed {NEARBY_MAX_RADIUS_KM:g} km"
+        )
+    
+    # Range scans on the geohash index for the cells covering the circle
+    cells = covering_cells(lat, lng, radius)
+    query = (
+        select(
+            User.clerkId,
+            User.firstName,
+            User.lastName,
+            RagpickerDetails.average_rating,
+            UserDetails.profile_pic_url,
+            UserDetails.latitude,
+            UserDetails.longitude,
+        )
+        .join(UserDetails, User.clerkId == UserDetails.clerkId)
+        .outerjoin(RagpickerDetails, User.clerkId == RagpickerDetails.clerkId)
+        .where(User.role == "RAGPICKER")
+        .where(or_(*[
+            and_(UserDetails.geohash >= cell, UserDetails.geohash < cell + "~") for cell in cells
+        ]))
+    )
+    result = await db.execute(query)
+    
+    # Exact distance on the candidates; cells overshoot the circle at the corners
+    nearby = []
+    for row in result.all():
+        distance = haversine_km(lat, lng, row.latitude, row.longitude)
+        if distance <= radius:
+            nearby.append((distance, row.average_rating or 0.0, row))
+    
+    if sort == "rating":
+        nearby.sort(key=lambda item: (-item[1], item[0]))
+    else:
+        nearby.sort(key=lambda item: (item[0], -item[1]))
+    
+    return [
+        RagpickerNearbyResponse(
+            clerkId=row.clerkId,
+            firstName=row.firstName,
+            lastName=row.lastName,
+            average_rating=rating,
+            profile_pic_url=row.profile_pic_url,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            distance_km=round(distance, 3)
+        )
+        for distance, rating, row in nearby[:limit]
+    ]
 
 @router.post("/{clerk_id}/details", response_model=RagpickerDetailsResponse)
 async def create_ragpicker_details(clerk_id: str, details: RagpickerDetailsCreate, db: AsyncSession = Depends(get_db)):
@@ -91,7 +194,7 @@ async def create_ragpicker_details(clerk_id: str, details: RagpickerDetailsCreat
         db.add(ragpicker_details)
     
     await db.commit()
-    await db.refresh(ragpicker_details)
+    ragpicker_directory_cache.invalidate(clerk_id)
     
     # Ensure average_rating is always valid for the response
     avg_rating = 0.0
@@ -216,7 +319,7 @@ async def update_ragpicker_details(clerk_id: str, details: RagpickerDetailsUpdat
         ragpicker_details.average_rating = 0.0
     
     await db.commit()
-    await db.refresh(ragpicker_details)
+    ragpicker_directory_cache.invalidate(clerk_id)
     
     # Ensure average_rating is always a valid float for the response
     avg_rating = 0.0
@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_
-from app.db.database import get_db
-from app.models.user import User, Requests, Balances, CustomerDetails, RagpickerDetails, UserDetails
-from app.schemas.request import RequestCreate, RequestResponse, RequestUpdate, SmartContractUpdate
+from sqlalchemy import update
+from sqlalchemy.orm import aliased
+from app.db.database import get_db, get_read_db
+from app.db.pagination import keyset_paginate, split_page
+from app.models.user import User, Requests, RequestRejection, CustomerDetails, RagpickerDetails, UserDetails
+from app.schemas.request import RequestCreate, RequestResponse, RequestUpdate, SmartContractUpdate, RequestPage
 from app.services.twilio_service import twilio_service
-from typing import List
+from app.services import payments
+from app.core.config import DISPATCH_MAX_ATTEMPTS
+from typing import List, Optional, Union
 import logging
 from datetime import datetime
 
@@ -15,14 +19,85 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Aliases so both sides of a request can be joined against the users table
+CustomerUser = aliased(User, name="customer_user")
+RagpickerUser = aliased(User, name="ragpicker_user")
+
+def request_listing_query():
+    """
+    Build a single query returning requests joined with the customer and ragpicker
+    users, the customer's address and both wallet addresses
+    """
+    return (
+        select(
+            Requests,
+            CustomerUser.clerkId.label("customer_user_id"),
+            CustomerUser.firstName.label("customer_first_name"),
+            CustomerUser.lastName.label("customer_last_name"),
+            RagpickerUser.clerkId.label("ragpicker_user_id"),
+            RagpickerUser.firstName.label("ragpicker_first_name"),
+            RagpickerUser.lastName.label("ragpicker_last_name"),
+            UserDetails.address.label("customer_address"),
+            CustomerDetails.wallet_address.label("customer_wallet_address"),
+            RagpickerDetails.wallet_address.label("ragpicker_wallet_address"),
+        )
+        .outerjoin(CustomerUser, CustomerUser.clerkId == Requests.customer_clerkId)
+        .outerjoin(RagpickerUser, RagpickerUser.clerkId == Requests.ragpicker_clerkId)
+        .outerjoin(UserDetails, UserDetails.clerkId == Requests.customer_clerkId)
+        .outerjoin(CustomerDetails, CustomerDetails.clerkId == Requests.customer_clerkId)
+        .outerjoin(RagpickerDetails, RagpickerDetails.clerkId == Requests.ragpicker_clerkId)
+    )
+
+def request_response_from_row(row) -> RequestResponse:
+    """
+    Build a RequestResponse from a row returned by request_listing_query.
+    Wallet addresses are only exposed once the request has been ACCEPTED.
+    """
+    request = row.Requests
+    
+    customer_name = f"{row.customer_first_name} {row.customer_last_name}" if row.customer_user_id else "Customer"
+    ragpicker_name = f"{row.ragpicker_first_name} {row.ragpicker_last_name}" if row.ragpicker_user_id else "Ragpicker"
+    if request.ragpicker_clerkId is None:
+        ragpicker_name = None  # Waiting for dispatch
+    
+    customer_wallet = None
+    ragpicker_wallet = None
+    if request.status == "ACCEPTED":
+        customer_wallet = row.customer_wallet_address
+        ragpicker_wallet = row.ragpicker_wallet_address
+    
+    return RequestResponse(
+        id=request.id,
+        customer_clerkId=request.customer_clerkId,
+        ragpicker_clerkId=request.ragpicker_clerkId,
+        status=request.status,
+        smart_contract_address=request.smart_contract_address,
+        auto_dispatch=bool(request.auto_dispatch),
+        created_at=request.created_at,
+        updated_at=request.updated_at,
+        customer_name=customer_name,
+        ragpicker_name=ragpicker_name,
+        customer_address=row.customer_address,
+        customer_wallet_address=customer_wallet,
+        ragpicker_wallet_address=ragpicker_wallet
+    )
+
 @router.post("/", response_model=RequestResponse, status_code=status.HTTP_201_CREATED)
 async def create_request(request_data: RequestCreate, db: AsyncSession = Depends(get_db)):
     """
-    Create a new request from customer to ragpicker
+    Create a new request from customer to ragpicker.
+    Without a ragpicker_clerkId the request waits for automatic dispatch.
     """
-    # Check if customer exists
-    customer_result = await db.execute(select(User).where(User.clerkId == request_data.customer_clerkId))
-    customer = customer_result.scalars().first()
+    auto_dispatch = request_data.ragpicker_clerkId is None
+    
+    # Load both users in one query
+    clerk_ids = [request_data.customer_clerkId]
+    if not auto_dispatch:
+        clerk_ids.append(request_data.ragpicker_clerkId)
+    users_result = await db.execute(select(User).where(User.clerkId.in_(clerk_ids)))
+    users = {user.clerkId: user for user in users_result.scalars().all()}
+    customer = users.get(request_data.customer_clerkId)
+    ragpicker = users.get(request_data.ragpicker_clerkId)
     
     if not customer:
         raise HTTPException(
@@ -30,51 +105,57 @@ async def create_request(request_data: RequestCreate, db: AsyncSession = Depends
             detail=f"Customer with clerk ID {request_data.customer_clerkId} not found"
         )
     
-    # Check if ragpicker exists
-    ragpicker_result = await db.execute(select(User).where(User.clerkId == request_data.ragpicker_clerkId))
-    ragpicker = ragpicker_result.scalars().first()
-    
-    if not ragpicker:
+    if not auto_dispatch and not ragpicker:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Ragpicker with clerk ID {request_data.ragpicker_clerkId} not found"
         )
     
-    # Create new request
+    # Get customer address for notification, and its location for dispatch
+    customer_location = (await db.execute(
+        select(UserDetails.address, UserDetails.latitude).where(UserDetails.clerkId == request_data.customer_clerkId)
+    )).first()
+    customer_address = customer_location.address if customer_location else None
+    
+    if auto_dispatch and (customer_location is None or customer_location.latitude is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Add an address to your details before requesting automatic assignment"
+        )
+    
+    # Create new request; id and created_at come back from INSERT ... RETURNING
     new_request = Requests(
         customer_clerkId=request_data.customer_clerkId,
         ragpicker_clerkId=request_data.ragpicker_clerkId,
         status="PENDING",
-        smart_contract_address=None
+        smart_contract_address=None,
+        auto_dispatch=auto_dispatch,
+        dispatch_attempts=0,
+        updated_at=None
     )
     
     db.add(new_request)
     await db.commit()
-    await db.refresh(new_request)
-    
-    # Get customer address for notification
-    customer_address = None
-    user_details_result = await db.execute(select(UserDetails).where(UserDetails.clerkId == request_data.customer_clerkId))
-    user_details = user_details_result.scalars().first()
-    if user_details:
-        customer_address = user_details.address
     
-    # Send notification to ragpicker about new request
+    # Notify the ragpicker about the new request; dispatched requests notify on assignment
     try:
-        logger.info(f"Sending notification to ragpicker about new request from {customer.firstName} {customer.lastName}")
-        await twilio_service.send_notification(
-            notification_type="new_request",
-            customer_name=f"{customer.firstName} {customer.lastName}",
-            customer_address=customer_address or "No address provided",
-            request_id=str(new_request.id)
-        )
-        logger.info("Notification sent successfully")
+        if auto_dispatch:
+            await twilio_service.send_notification(notification_type="request_created")
+        else:
+            logger.info(f"Sending notification to ragpicker about new request from {customer.firstName} {customer.lastName}")
+            await twilio_service.send_notification(
+                notification_type="new_request",
+                customer_name=f"{customer.firstName} {customer.lastName}",
+                customer_address=customer_address or "No address provided",
+                request_id=str(new_request.id)
+            )
+            logger.info("Notification sent successfully")
     except Exception as e:
         logger.error(f"Failed to send notification: {str(e)}")
     
     # Get customer and ragpicker names for response
     customer_name = f"{customer.firstName} {customer.lastName}"
-    ragpicker_name = f"{ragpicker.firstName} {ragpicker.lastName}"
+    ragpicker_name = f"{ragpicker.firstName} {ragpicker.lastName}" if ragpicker else None
     
     return RequestResponse(
         id=new_request.id,
@@ -82,6 +163,7 @@ async def create_request(request_data: RequestCreate, db: AsyncSession = Depends
         ragpicker_clerkId=new_request.ragpicker_clerkId,
         status=new_request.status,
         smart_contract_address=new_request.smart_contract_address,
+        auto_dispatch=auto_dispatch,
         created_at=new_request.created_at,
         updated_at=new_request.updated_at,
         customer_name=customer_name,
@@ -95,170 +177,110 @@ async def update_request_status(request_id: int, request_update: RequestUpdate,
     Update request status (accept/reject)
     For ACCEPTED status, it sends a notification to the customer
     """
-    # Check if request exists
-    result = await db.execute(select(Requests).where(Requests.id == request_id))
-    request = result.scalars().first()
+    # Load the request with everything the response and notifications need
+    result = await db.execute(request_listing_query().where(Requests.id == request_id))
+    row = result.first()
     
-    if not request:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Request with ID {request_id} not found"
         )
     
     # Update status
+    request = row.Requests
+    rejected_by = request.ragpicker_clerkId
+    # Kept for the notification: the response drops the name once the request is requeued
+    rejected_by_name = f"{row.ragpicker_first_name} {row.ragpicker_last_name}" if row.ragpicker_user_id else "Ragpicker"
     request.status = request_update.status
     request.updated_at = datetime.now()
     
-    await db.commit()
-    await db.refresh(request)
-    
-    # Get customer and ragpicker data for notification and response
-    customer_result = await db.execute(select(User).where(User.clerkId == request.customer_clerkId))
-    customer = customer_result.scalars().first()
-    
-    ragpicker_result = await db.execute(select(User).where(User.clerkId == request.ragpicker_clerkId))
-    ragpicker = ragpicker_result.scalars().first()
+    requeued = False
+    if request_update.status == "REJECTED" and rejected_by:
+        # Rejection history feeds dispatch scoring and keeps the request away from this ragpicker
+        db.add(RequestRejection(request_id=request_id, ragpicker_clerkId=rejected_by))
+        if request.auto_dispatch and (request.dispatch_attempts or 0) < DISPATCH_MAX_ATTEMPTS:
+            # Back in the queue for the next dispatch run instead of bouncing to the customer
+            request.status = "PENDING"
+            request.ragpicker_clerkId = None
+            request.next_dispatch_at = None
+            requeued = True
     
-    customer_name = f"{customer.firstName} {customer.lastName}" if customer else "Customer"
-    ragpicker_name = f"{ragpicker.firstName} {ragpicker.lastName}" if ragpicker else "Ragpicker"
+    await db.commit()
     
-    # Get customer address
-    customer_address = None
-    user_details_result = await db.execute(select(UserDetails).where(UserDetails.clerkId == request.customer_clerkId))
-    user_details = user_details_result.scalars().first()
-    if user_details:
-        customer_address = user_details.address
+    response = request_response_from_row(row)
     
     # Send notification based on status
     try:
-        if request_update.status == "ACCEPTED":
+        if requeued:
+            logger.info(f"Request {request_id} was rejected and goes back to dispatch")
+            await twilio_service.send_notification(
+                notification_type="request_reassigned",
+                ragpicker_name=rejected_by_name,
+                request_id=str(request_id)
+            )
+        elif request_update.status == "ACCEPTED":
             logger.info(f"Sending notification to customer that request {request_id} was accepted")
             # Notify customer that request was accepted
             await twilio_service.send_notification(
                 notification_type="request_accepted",
-                ragpicker_name=ragpicker_name,
+                ragpicker_name=response.ragpicker_name,
                 request_id=str(request_id),
-                customer_address=customer_address or "No address provided"
-            )
-            
-            # Get wallet addresses for blockchain integration
-            customer_wallet = None
-            customer_details_result = await db.execute(select(CustomerDetails).where(CustomerDetails.clerkId == request.customer_clerkId))
-            customer_details = customer_details_result.scalars().first()
-            if customer_details:
-                customer_wallet = customer_details.wallet_address
-            
-            ragpicker_wallet = None
-            ragpicker_details_result = await db.execute(select(RagpickerDetails).where(RagpickerDetails.clerkId == request.ragpicker_clerkId))
-            ragpicker_details = ragpicker_details_result.scalars().first()
-            if ragpicker_details:
-                ragpicker_wallet = ragpicker_details.wallet_address
-                
-            return RequestResponse(
-                id=request.id,
-                customer_clerkId=request.customer_clerkId,
-                ragpicker_clerkId=request.ragpicker_clerkId,
-                status=request.status,
-                smart_contract_address=request.smart_contract_address,
-                created_at=request.created_at,
-                updated_at=request.updated_at,
-                customer_name=customer_name,
-                ragpicker_name=ragpicker_name,
-                customer_address=customer_address,
-                customer_wallet_address=customer_wallet,
-                ragpicker_wallet_address=ragpicker_wallet
+                customer_address=response.customer_address or "No address provided"
             )
         elif request_update.status == "REJECTED":
             logger.info(f"Sending notification to customer that request {request_id} was rejected")
             # Notify customer that request was rejected
             await twilio_service.send_notification(
                 notification_type="request_rejected",
-                ragpicker_name=ragpicker_name,
+                ragpicker_name=response.ragpicker_name,
                 request_id=str(request_id),
-                customer_name=customer_name
+                customer_name=response.customer_name
             )
     except Exception as e:
         logger.error(f"Failed to send notification for status update: {str(e)}")
     
-    return RequestResponse(
-        id=request.id,
-        customer_clerkId=request.customer_clerkId,
-        ragpicker_clerkId=request.ragpicker_clerkId,
-        status=request.status,
-        smart_contract_address=request.smart_contract_address,
-        created_at=request.created_at,
-        updated_at=request.updated_at,
-        customer_name=customer_name,
-        ragpicker_name=ragpicker_name,
-        customer_address=customer_address
-    )
+    return response
 
 @router.put("/{request_id}/smart-contract", response_model=RequestResponse)
 async def update_smart_contract(request_id: int, contract_data: SmartContractUpdate, db: AsyncSession = Depends(get_db)):
     """
     Update the smart contract address for a request
     """
-    # Check if request exists
-    result = await db.execute(select(Requests).where(Requests.id == request_id))
-    request = result.scalars().first()
+    # Load the request with everything the response needs
+    result = await db.execute(request_listing_query().where(Requests.id == request_id))
+    row = result.first()
     
-    if not request:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Request with ID {request_id} not found"
         )
     
     # Update smart contract address
+    request = row.Requests
     request.smart_contract_address = contract_data.smart_contract_address
     request.updated_at = datetime.now()
     
     await db.commit()
-    await db.refresh(request)
-    
-    # Get customer and ragpicker data for response
-    customer_result = await db.execute(select(User).where(User.clerkId == request.customer_clerkId))
-    customer = customer_result.scalars().first()
-    
-    ragpicker_result = await db.execute(select(User).where(User.clerkId == request.ragpicker_clerkId))
-    ragpicker = ragpicker_result.scalars().first()
-    
-    customer_name = f"{customer.firstName} {customer.lastName}" if customer else "Customer"
-    ragpicker_name = f"{ragpicker.firstName} {ragpicker.lastName}" if ragpicker else "Ragpicker"
     
-    # Get customer address
-    customer_address = None
-    user_details_result = await db.execute(select(UserDetails).where(UserDetails.clerkId == request.customer_clerkId))
-    user_details = user_details_result.scalars().first()
-    if user_details:
-        customer_address = user_details.address
-    
-    return RequestResponse(
-        id=request.id,
-        customer_clerkId=request.customer_clerkId,
-        ragpicker_clerkId=request.ragpicker_clerkId,
-        status=request.status,
-        smart_contract_address=request.smart_contract_address,
-        created_at=request.created_at,
-        updated_at=request.updated_at,
-        customer_name=customer_name,
-        ragpicker_name=ragpicker_name,
-        customer_address=customer_address
-    )
+    return request_response_from_row(row)
 
 @router.put("/{request_id}/complete", response_model=RequestResponse)
 async def complete_request(request_id: int, db: AsyncSession = Depends(get_db)):
     """
     Mark a request as completed and transfer funds
     """
-    # Check if request exists
-    result = await db.execute(select(Requests).where(Requests.id == request_id))
-    request = result.scalars().first()
+    # Load the request with everything the response and notifications need
+    result = await db.execute(request_listing_query().where(Requests.id == request_id))
+    row = result.first()
     
-    if not request:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Request with ID {request_id} not found"
         )
+    request = row.Requests
     
     # Check if request status is ACCEPTED
     if request.status != "ACCEPTED":
@@ -274,68 +296,33 @@ async def complete_request(request_id: int, db: AsyncSession = Depends(get_db)):
             detail=f"Smart contract address is not set for this request"
         )
     
-    # Update status to COMPLETED
-    request.status = "COMPLETED"
-    request.updated_at = datetime.now()
+    # Update status to COMPLETED, guarded so concurrent calls cannot both pay out
+    result = await db.execute(
+        update(Requests)
+        .where(Requests.id == request_id, Requests.status == "ACCEPTED")
+        .values(status="COMPLETED", updated_at=datetime.now())
+    )
+    if result.rowcount != 1:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Request {request_id} was completed concurrently"
+        )
     
     # Transfer funds from customer to ragpicker (fixed amount for now)
     transfer_amount = 100.0  # Fixed amount in credits/tokens
     
-    # Get customer balance
-    customer_balance_result = await db.execute(select(Balances).where(Balances.clerkId == request.customer_clerkId))
-    customer_balance = customer_balance_result.scalars().first()
-    
-    if not customer_balance:
-        # Create customer balance if not exists
-        customer_balance = Balances(
-            clerkId=request.customer_clerkId,
-            balance=0.0
-        )
-        db.add(customer_balance)
-        await db.commit()
-        await db.refresh(customer_balance)
-    
-    # Get ragpicker balance
-    ragpicker_balance_result = await db.execute(select(Balances).where(Balances.clerkId == request.ragpicker_clerkId))
-    ragpicker_balance = ragpicker_balance_result.scalars().first()
-    
-    if not ragpicker_balance:
-        # Create ragpicker balance if not exists
-        ragpicker_balance = Balances(
-            clerkId=request.ragpicker_clerkId,
-            balance=0.0
-        )
-        db.add(ragpicker_balance)
-        await db.commit()
-        await db.refresh(ragpicker_balance)
-    
-    # Deduct from customer
-    customer_balance.balance -= transfer_amount
-    
-    # Add to ragpicker
-    ragpicker_balance.balance += transfer_amount
+    new_balances = await payments.transfer(
+        db,
+        from_clerk_id=request.customer_clerkId,
+        to_clerk_id=request.ragpicker_clerkId,
+        amount=transfer_amount,
+        reason=payments.REQUEST_COMPLETED,
+        reference=str(request_id)
+    )
     
     await db.commit()
-    await db.refresh(request)
-    await db.refresh(customer_balance)
-    await db.refresh(ragpicker_balance)
     
-    # Get customer and ragpicker data for notification and response
-    customer_result = await db.execute(select(User).where(User.clerkId == request.customer_clerkId))
-    customer = customer_result.scalars().first()
-    
-    ragpicker_result = await db.execute(select(User).where(User.clerkId == request.ragpicker_clerkId))
-    ragpicker = ragpicker_result.scalars().first()
-    
-    customer_name = f"{customer.firstName} {customer.lastName}" if customer else "Customer"
-    ragpicker_name = f"{ragpicker.firstName} {ragpicker.lastName}" if ragpicker else "Ragpicker"
-    
-    # Get customer address
-    customer_address = None
-    user_details_result = await db.execute(select(UserDetails).where(UserDetails.clerkId == request.customer_clerkId))
-    user_details = user_details_result.scalars().first()
-    if user_details:
-        customer_address = user_details.address
+    response = request_response_from_row(row)
     
     # Send notification to both parties
     try:
@@ -345,247 +332,88 @@ async def complete_request(request_id: int, db: AsyncSession = Depends(get_db)):
         await twilio_service.send_notification(
             notification_type="request_completed_customer",
             request_id=str(request_id),
-            ragpicker_name=ragpicker_name,
+            ragpicker_name=response.ragpicker_name,
             amount=str(transfer_amount),
-            new_balance=str(customer_balance.balance)
+            new_balance=str(new_balances[request.customer_clerkId])
         )
         
         # Notify ragpicker that request is completed and payment received
         await twilio_service.send_notification(
             notification_type="request_completed_ragpicker",
             request_id=str(request_id),
-            customer_name=customer_name,
+            customer_name=response.customer_name,
             amount=str(transfer_amount),
-            new_balance=str(ragpicker_balance.balance)
+            new_balance=str(new_balances[request.ragpicker_clerkId])
         )
         
         logger.info("Completion notifications sent successfully")
     except Exception as e:
         logger.error(f"Failed to send completion notifications: {str(e)}")
     
-    return RequestResponse(
-        id=request.id,
-        customer_clerkId=request.customer_clerkId,
-        ragpicker_clerkId=request.ragpicker_clerkId,
-        status=request.status,
-        smart_contract_address=request.smart_contract_address,
-        created_at=request.created_at,
-        updated_at=request.updated_at,
-        customer_name=customer_name,
-        ragpicker_name=ragpicker_name,
-        customer_address=customer_address
-    )
+    return response
 
-@router.get("/", response_model=List[RequestResponse])
-async def get_all_requests(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=Union[List[RequestResponse], RequestPage])
+async def get_all_requests(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: AsyncSession = Depends(get_read_db)):
     """
-    Get all requests
+    Get all requests, newest first.
+
+    Passing `cursor` (empty for the first page) switches to keyset pagination and
+    returns a page with `next_cursor`; otherwise `skip`/`limit` offset paging is used.
     """
-    query = select(Requests).offset(skip).limit(limit).order_by(Requests.created_at.desc())
-    result = await db.execute(query)
-    requests = result.scalars().all()
-    
-    response_list = []
-    for request in requests:
-        # Get customer and ragpicker data
-        customer_result = await db.execute(select(User).where(User.clerkId == request.customer_clerkId))
-        customer = customer_result.scalars().first()
-        
-        ragpicker_result = await db.execute(select(User).where(User.clerkId == request.ragpicker_clerkId))
-        ragpicker = ragpicker_result.scalars().first()
-        
-        customer_name = f"{customer.firstName} {customer.lastName}" if customer else "Customer"
-        ragpicker_name = f"{ragpicker.firstName} {ragpicker.lastName}" if ragpicker else "Ragpicker"
-        
-        # Get customer address
-        customer_address = None
-        user_details_result = await db.execute(select(UserDetails).where(UserDetails.clerkId == request.customer_clerkId))
-        user_details = user_details_result.scalars().first()
-        if user_details:
-            customer_address = user_details.address
-        
-        response_list.append(
-            RequestResponse(
-                id=request.id,
-                customer_clerkId=request.customer_clerkId,
-                ragpicker_clerkId=request.ragpicker_clerkId,
-                status=request.status,
-                smart_contract_address=request.smart_contract_address,
-                created_at=request.created_at,
-                updated_at=request.updated_at,
-                customer_name=customer_name,
-                ragpicker_name=ragpicker_name,
-                customer_address=customer_address
-            )
+    if cursor is not None:
+        query = keyset_paginate(request_listing_query(), Requests.created_at, Requests.id, cursor, limit)
+        result = await db.execute(query)
+        rows, next_cursor = split_page(result.all(), limit, lambda row: (row.Requests.created_at, row.Requests.id))
+        return RequestPage(
+            items=[request_response_from_row(row) for row in rows],
+            next_cursor=next_cursor
         )
     
-    return response_list
+    query = request_listing_query().order_by(Requests.created_at.desc()).offset(skip).limit(limit)
+    result = await db.execute(query)
+    
+    return [request_response_from_row(row) for row in result.all()]
 
 @router.get("/customer/{clerk_id}", response_model=List[RequestResponse])
 async def get_customer_requests(clerk_id: str, status: str = None, db: AsyncSession = Depends(get_db)):
     """
     Get all requests from a customer, optionally filtered by status
     """
+    query = request_listing_query().where(Requests.customer_clerkId == clerk_id)
     if status:
-        query = select(Requests).where(
-            and_(Requests.customer_clerkId == clerk_id, Requests.status == status)
-        ).order_by(Requests.created_at.desc())
-    else:
-        query = select(Requests).where(
-            Requests.customer_clerkId == clerk_id
-        ).order_by(Requests.created_at.desc())
-        
-    result = await db.execute(query)
-    requests = result.scalars().all()
+        query = query.where(Requests.status == status)
+    query = query.order_by(Requests.created_at.desc())
     
-    response_list = []
-    for request in requests:
-        # Get customer and ragpicker data
-        customer_result = await db.execute(select(User).where(User.clerkId == request.customer_clerkId))
-        customer = customer_result.scalars().first()
-        
-        ragpicker_result = await db.execute(select(User).where(User.clerkId == request.ragpicker_clerkId))
-        ragpicker = ragpicker_result.scalars().first()
-        
-        customer_name = f"{customer.firstName} {customer.lastName}" if customer else "Customer"
-        ragpicker_name = f"{ragpicker.firstName} {ragpicker.lastName}" if ragpicker else "Ragpicker"
-        
-        # Get customer address
-        customer_address = None
-        user_details_result = await db.execute(select(UserDetails).where(UserDetails.clerkId == request.customer_clerkId))
-        user_details = user_details_result.scalars().first()
-        if user_details:
-            customer_address = user_details.address
-        
-        response_list.append(
-            RequestResponse(
-                id=request.id,
-                customer_clerkId=request.customer_clerkId,
-                ragpicker_clerkId=request.ragpicker_clerkId,
-                status=request.status,
-                smart_contract_address=request.smart_contract_address,
-                created_at=request.created_at,
-                updated_at=request.updated_at,
-                customer_name=customer_name,
-                ragpicker_name=ragpicker_name,
-                customer_address=customer_address
-            )
-        )
+    result = await db.execute(query)
     
-    return response_list
+    return [request_response_from_row(row) for row in result.all()]
 
 @router.get("/ragpicker/{clerk_id}", response_model=List[RequestResponse])
 async def get_ragpicker_requests(clerk_id: str, status: str = None, db: AsyncSession = Depends(get_db)):
     """
     Get all requests for a ragpicker, optionally filtered by status
     """
+    query = request_listing_query().where(Requests.ragpicker_clerkId == clerk_id)
     if status:
-        query = select(Requests).where(
-            and_(Requests.ragpicker_clerkId == clerk_id, Requests.status == status)
-        ).order_by(Requests.created_at.desc())
-    else:
-        query = select(Requests).where(
-            Requests.ragpicker_clerkId == clerk_id
-        ).order_by(Requests.created_at.desc())
-        
-    result = await db.execute(query)
-    requests = result.scalars().all()
+        query = query.where(Requests.status == status)
+    query = query.order_by(Requests.created_at.desc())
     
-    response_list = []
-    for request in requests:
-        # Get customer and ragpicker data
-        customer_result = await db.execute(select(User).where(User.clerkId == request.customer_clerkId))
-        customer = customer_result.scalars().first()
-        
-        ragpicker_result = await db.execute(select(User).where(User.clerkId == request.ragpicker_clerkId))
-        ragpicker = ragpicker_result.scalars().first()
-        
-        customer_name = f"{customer.firstName} {customer.lastName}" if customer else "Customer"
-        ragpicker_name = f"{ragpicker.firstName} {ragpicker.lastName}" if ragpicker else "Ragpicker"
-        
-        # Get customer address
-        customer_address = None
-        user_details_result = await db.execute(select(UserDetails).where(UserDetails.clerkId == request.customer_clerkId))
-        user_details = user_details_result.scalars().first()
-        if user_details:
-            customer_address = user_details.address
-        
-        response_list.append(
-            RequestResponse(
-                id=request.id,
-                customer_clerkId=request.customer_clerkId,
-                ragpicker_clerkId=request.ragpicker_clerkId,
-                status=request.status,
-                smart_contract_address=request.smart_contract_address,
-                created_at=request.created_at,
-                updated_at=request.updated_at,
-                customer_name=customer_name,
-                ragpicker_name=ragpicker_name,
-                customer_address=customer_address
-            )
-        )
+    result = await db.execute(query)
     
-    return response_list
+    return [request_response_from_row(row) for row in result.all()]
 
 @router.get("/{request_id}", response_model=RequestResponse)
 async def get_request(request_id: int, db: AsyncSession = Depends(get_db)):
     """
     Get a specific request by ID
     """
-    result = await db.execute(select(Requests).where(Requests.id == request_id))
-    request = result.scalars().first()
+    result = await db.execute(request_listing_query().where(Requests.id == request_id))
+    row = result.first()
     
-    if not request:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Request with ID {request_id} not found"
         )
     
-    # Get customer and ragpicker data
-    customer_result = await db.execute(select(User).where(User.clerkId == request.customer_clerkId))
-    customer = customer_result.scalars().first()
-    
-    ragpicker_result = await db.execute(select(User).where(User.clerkId == request.ragpicker_clerkId))
-    ragpicker = ragpicker_result.scalars().first()
-    
-    customer_name = f"{customer.firstName} {customer.lastName}" if customer else "Customer"
-    ragpicker_name = f"{ragpicker.firstName} {ragpicker.lastName}" if ragpicker else "Ragpicker"
-    
-    # Get customer address
-    customer_address = None
-    user_details_result = await db.execute(select(UserDetails).where(UserDetails.clerkId == request.customer_clerkId))
-    user_details = user_details_result.scalars().first()
-    if user_details:
-        customer_address = user_details.address
-    
-    # Get wallet addresses if request is in ACCEPTED state
-    customer_wallet = None
-    ragpicker_wallet = None
-    
-    if request.status == "ACCEPTED":
-        # Get customer wallet
-        customer_details_result = await db.execute(select(CustomerDetails).where(CustomerDetails.clerkId == request.customer_clerkId))
-        customer_details = customer_details_result.scalars().first()
-        if customer_details:
-            customer_wallet = customer_details.wallet_address
-        
-        # Get ragpicker wallet
-        ragpicker_details_result = await db.execute(select(RagpickerDetails).where(RagpickerDetails.clerkId == request.ragpicker_clerkId))
-        ragpicker_details = ragpicker_details_result.scalars().first()
-        if ragpicker_details:
-            ragpicker_wallet = ragpicker_details.wallet_address
-    
-    return RequestResponse(
-        id=request.id,
-        customer_clerkId=request.customer_clerkId,
-        ragpicker_clerkId=request.ragpicker_clerkId,
-        status=request.status,
-        smart_contract_address=request.smart_contract_address,
-        created_at=request.created_at,
-        updated_at=request.updated_at,
-        customer_name=customer_name,
-        ragpicker_name=ragpicker_name,
-        customer_address=customer_address,
-        customer_wallet_address=customer_wallet,
-        ragpicker_wallet_address=ragpicker_wallet
-    ) 
\ No newline at end of file
+    return request_response_from_row(row)
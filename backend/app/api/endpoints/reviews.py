@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
-from app.db.database import get_db
-from app.models.user import User, Reviews, RagpickerDetails
+from app.db.database import get_db, get_read_db
+from app.models.user import User, Reviews
 from app.schemas.review import ReviewCreate, ReviewResponse
+from app.services import ratings
+from app.services.response_cache import ragpicker_directory_cache
 from typing import List
 import logging
 
@@ -62,45 +63,12 @@ async def create_review(review_data: ReviewCreate, db: AsyncSession = Depends(ge
     )
     
     db.add(new_review)
-    await db.commit()
-    await db.refresh(new_review)
-    
-    # Update ragpicker's average rating
-    # 1. Get all reviews for this ragpicker
-    avg_rating_query = select(func.avg(Reviews.rating)).where(
-        Reviews.ragpicker_clerkId == review_data.ragpicker_clerkId
-    )
-    avg_rating_result = await db.execute(avg_rating_query)
-    avg_rating = avg_rating_result.scalar_one_or_none()
-    
-    # Ensure avg_rating is a valid float
-    if avg_rating is None:
-        avg_rating = float(review_data.rating)  # If this is the first review, use its rating
-    else:
-        avg_rating = float(avg_rating)  # Convert to float to be safe
     
-    # Round to 1 decimal place
-    avg_rating = round(avg_rating, 1)
+    # Fold the rating into the ragpicker's running totals in the same transaction
+    await ratings.record_rating(db, review_data.ragpicker_clerkId, review_data.rating)
     
-    # 2. Update ragpicker details with new average rating
-    ragpicker_details_result = await db.execute(
-        select(RagpickerDetails).where(RagpickerDetails.clerkId == review_data.ragpicker_clerkId)
-    )
-    ragpicker_details = ragpicker_details_result.scalars().first()
-    
-    if ragpicker_details:
-        ragpicker_details.average_rating = avg_rating
-        await db.commit()
-    else:
-        # Create ragpicker details if they don't exist
-        new_ragpicker_details = RagpickerDetails(
-            clerkId=review_data.ragpicker_clerkId,
-            average_rating=avg_rating,
-            wallet_address=None,  # Initialize wallet_address to None
-            RFID=None  # Initialize RFID to None
-        )
-        db.add(new_ragpicker_details)
-        await db.commit()
+    await db.commit()
+    ragpicker_directory_cache.invalidate(review_data.ragpicker_clerkId)
     
     # Get names for response
     customer_name = f"{customer.firstName} {customer.lastName}"
@@ -118,7 +86,7 @@ async def create_review(review_data: ReviewCreate, db: AsyncSession = Depends(ge
     )
 
 @router.get("/ragpicker/{clerk_id}", response_model=List[ReviewResponse])
-async def get_ragpicker_reviews(clerk_id: str, db: AsyncSession = Depends(get_db)):
+async def get_ragpicker_reviews(clerk_id: str, db: AsyncSession = Depends(get_read_db)):
     """
     Get all reviews for a ragpicker
     """
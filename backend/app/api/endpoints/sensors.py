@@ -1,23 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, and_
-from app.db.database import get_db
-from app.models.sensor import Sensor, SensorLog
-from app.models.user import User, UserDetails, RagpickerDetails, CompanyBalances, Balances
+from sqlalchemy import select, update, insert, and_, or_, case, tuple_
+from sqlalchemy.exc import IntegrityError
+from app.db.database import get_db, get_read_db
+from app.db.pagination import keyset_paginate, split_page
+from app.models.sensor import Sensor, SensorLog, SensorEventReceipt
+from app.models.user import UserDetails, RagpickerDetails
 from app.schemas.sensor import (
     SensorCreate, 
     SensorResponse,
     SensorLogResponse,
+    SensorLogPage,
     SensorStatusUpdate,
-    RFIDUpdate
+    RFIDUpdate,
+    SensorEventBatch,
+    SensorEventBatchResponse,
+    SensorEventResult,
+    CollectionRoute,
+    RouteStop
 )
-from typing import List
+from typing import List, Optional, Union
+from collections import defaultdict
+import asyncio
 import os
 from datetime import datetime
-from app.services.twilio_service import TwilioService
+from app.services.twilio_service import twilio_service
+from app.services import payments
+from app.services.sensor_state import SensorState, StaleSensorState, sensor_state_cache
+from app.services.geocoding import geocode_address
+from app.services.geo import haversine_km
+from app.services.routing import plan_route
+from app.core.config import ROUTE_MAX_STOPS
 
 router = APIRouter()
-twilio_service = TwilioService()
+
+# Amount credited to a ragpicker for emptying a bin
+BIN_EMPTY_PAYMENT = 60
 
 # Sensor CRUD Endpoints
 @router.post("/", response_model=SensorResponse, status_code=status.HTTP_201_CREATED)
@@ -35,16 +53,22 @@ async def create_sensor(
             detail="Sensor with this ID already exists"
         )
 
+    # Coordinates for route planning
+    latitude, longitude = sensor_data.latitude, sensor_data.longitude
+    if latitude is None or longitude is None:
+        latitude, longitude = await geocode_address(sensor_data.location, sensor_data.sensor_id) or (None, None)
+
     new_sensor = Sensor(
         sensor_id=sensor_data.sensor_id,
         sensor_name=sensor_data.sensor_name,
         location=sensor_data.location,
-        company_id=sensor_data.company_id
+        company_id=sensor_data.company_id,
+        latitude=latitude,
+        longitude=longitude
     )
 
     db.add(new_sensor)
     await db.commit()
-    await db.refresh(new_sensor)
     return new_sensor
 
 @router.get("/", response_model=List[SensorResponse])
@@ -53,6 +77,78 @@ async def get_sensors(db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Sensor))
     return result.scalars().all()
 
+@router.get("/routes", response_model=CollectionRoute)
+async def get_collection_route(
+    company_id: int,
+    start_lat: Optional[float] = Query(None, ge=-90, le=90),
+    start_lng: Optional[float] = Query(None, ge=-180, le=180),
+    ragpicker_clerkId: Optional[str] = None,
+    return_to_start: bool = False,
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Plan one trip over the company's full bins, starting from a depot
+    (start_lat/start_lng) or from a ragpicker's address
+    """
+    if ragpicker_clerkId:
+        location = (await db.execute(
+            select(UserDetails.latitude, UserDetails.longitude).where(UserDetails.clerkId == ragpicker_clerkId)
+        )).first()
+        if not location or location.latitude is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No location on file for ragpicker {ragpicker_clerkId}"
+            )
+        start = (location.latitude, location.longitude)
+    elif start_lat is not None and start_lng is not None:
+        start = (start_lat, start_lng)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give either start_lat and start_lng or ragpicker_clerkId"
+        )
+
+    result = await db.execute(
+        select(Sensor.sensor_id, Sensor.sensor_name, Sensor.location, Sensor.latitude, Sensor.longitude)
+        .where(Sensor.company_id == company_id, Sensor.sensor_status == True)
+    )
+    full_bins = result.all()
+    located = [row for row in full_bins if row.latitude is not None and row.longitude is not None]
+    unlocated = [row.sensor_id for row in full_bins if row.latitude is None or row.longitude is None]
+
+    # Keep a trip to the bins nearest the start
+    deferred = []
+    if len(located) > ROUTE_MAX_STOPS:
+        located.sort(key=lambda row: haversine_km(start[0], start[1], row.latitude, row.longitude))
+        deferred = [row.sensor_id for row in located[ROUTE_MAX_STOPS:]]
+        located = located[:ROUTE_MAX_STOPS]
+
+    # CPU-bound; keep it off the event loop
+    order, legs, total, elapsed = await asyncio.to_thread(
+        plan_route, start, [(row.latitude, row.longitude) for row in located], return_to_start
+    )
+
+    stops = [
+        RouteStop(
+            sensor_id=located[index].sensor_id,
+            sensor_name=located[index].sensor_name,
+            location=located[index].location,
+            latitude=located[index].latitude,
+            longitude=located[index].longitude,
+            distance_from_previous_km=round(leg, 3)
+        )
+        for index, leg in zip(order, legs)
+    ]
+    return CollectionRoute(
+        start_latitude=start[0],
+        start_longitude=start[1],
+        return_to_start=return_to_start,
+        stops=stops,
+        total_distance_km=round(total, 3),
+        unlocated_sensor_ids=unlocated,
+        deferred_sensor_ids=deferred
+    )
+
 @router.get("/{sensor_id}", response_model=SensorResponse)
 async def get_sensor(sensor_id: str, db: AsyncSession = Depends(get_db)):
     """Get sensor by ID"""
@@ -61,17 +157,31 @@ async def get_sensor(sensor_id: str, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Sensor not found")
     return sensor
 
-@router.get("/logs/{sensor_id}", response_model=List[SensorLogResponse])
+@router.get("/logs/{sensor_id}", response_model=Union[List[SensorLogResponse], SensorLogPage])
 async def get_sensor_logs(
     sensor_id: str, 
     limit: int = 10, 
-    db: AsyncSession = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get sensor logs"""
+    """Get sensor logs, newest first. Pass `cursor` (empty for the first page) to page through history"""
     sensor = await db.get(Sensor, sensor_id)
     if not sensor:
         raise HTTPException(status_code=404, detail="Sensor not found")
 
+    if cursor is not None:
+        query = keyset_paginate(
+            select(SensorLog).where(SensorLog.sensor_id == sensor_id),
+            SensorLog.timestamp,
+            SensorLog.id,
+            cursor,
+            limit
+        )
+        result = await db.execute(query)
+        logs, next_cursor = split_page(result.scalars().all(), limit, lambda log: (log.timestamp, log.id))
+        # SensorLogResponse still uses the v1 orm_mode key, so read the ORM rows explicitly
+        return SensorLogPage.model_validate({"items": logs, "next_cursor": next_cursor}, from_attributes=True)
+
     result = await db.execute(
         select(SensorLog)
         .where(SensorLog.sensor_id == sensor_id)
@@ -80,45 +190,101 @@ async def get_sensor_logs(
     )
     return result.scalars().all()
 
-# Sensor Operation Endpoints
-@router.post("/update-status", status_code=status.HTTP_200_OK)
-async def update_sensor_status(
-    data: SensorStatusUpdate, 
-    db: AsyncSession = Depends(get_db)
-):
-    """Update sensor status with strict RFID validation"""
-    # Get sensor
-    sensor = await db.get(Sensor, data.sensor_id)
+
+async def load_sensor_state(db: AsyncSession, sensor_id: str):
+    """
+    Return (state, from_cache) for a sensor, reading the sensor and its newest
+    active log from the database on a cache miss. state is None for unknown sensors.
+    """
+    state = sensor_state_cache.get(sensor_id)
+    if state:
+        return state, True
+
+    sensor = await db.get(Sensor, sensor_id)
     if not sensor:
+        return None, False
+
+    active_log = await db.execute(
+        select(SensorLog.id, SensorLog.RFID)
+        .where(
+            and_(
+                SensorLog.sensor_id == sensor_id,
+                SensorLog.sensor_status == True
+            )
+        )
+        .order_by(SensorLog.timestamp.desc())
+        .limit(1)
+    )
+    active_log = active_log.first()
+
+    state = SensorState(
+        sensor_status=sensor.sensor_status,
+        location=sensor.location,
+        company_id=sensor.company_id,
+        active_log_id=active_log.id if active_log else None,
+        active_log_rfid=active_log.RFID if active_log else None
+    )
+    sensor_state_cache.set(sensor_id, state)
+    return state, False
+
+def reject_sensor_event(sensor_id: str, from_cache: bool, status_code: int, detail: str):
+    """
+    Reject an event, unless the decision was made on cached state that may be
+    stale, in which case the caller re-checks against the database first
+    """
+    if from_cache:
+        raise StaleSensorState(sensor_id)
+    raise HTTPException(status_code=status_code, detail=detail)
+
+async def apply_sensor_status(db: AsyncSession, data: SensorStatusUpdate):
+    """
+    Validate and write a status change without committing, returning the sensor
+    state it was applied to and the state after it. Writes are conditional on the
+    state read, so a stale cache entry raises StaleSensorState.
+    """
+    state, from_cache = await load_sensor_state(db, data.sensor_id)
+    if not state:
         raise HTTPException(status_code=404, detail="Sensor not found")
 
     # Prevent redundant status changes
-    if sensor.sensor_status == data.status:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Sensor already in {data.status} state"
+    if state.sensor_status == data.status:
+        reject_sensor_event(
+            data.sensor_id, from_cache,
+            status.HTTP_400_BAD_REQUEST, f"Sensor already in {data.status} state"
         )
 
     new_status = data.status
 
     if new_status:
         # Check for existing active log
-        existing_log = await db.execute(
-            select(SensorLog)
-            .where(
-                and_(
-                    SensorLog.sensor_id == data.sensor_id,
-                    SensorLog.sensor_status == True
-                )
+        if state.active_log_id is not None:
+            reject_sensor_event(
+                data.sensor_id, from_cache,
+                status.HTTP_400_BAD_REQUEST, "Active log already exists"
             )
-            .limit(1)
+    elif state.active_log_id is None or state.active_log_rfid is None:
+        # The active log must have had an RFID scanned to be marked as emptied
+        reject_sensor_event(
+            data.sensor_id, from_cache,
+            status.HTTP_400_BAD_REQUEST, "RFID not scanned for current active log"
         )
-        if existing_log.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Active log already exists"
+
+    # Update sensor status, guarded on the status we expect it to have
+    result = await db.execute(
+        update(Sensor)
+        .where(
+            and_(
+                Sensor.sensor_id == data.sensor_id,
+                Sensor.sensor_status.is_not_distinct_from(state.sensor_status)
             )
+        )
+        .values(sensor_status=new_status)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise StaleSensorState(data.sensor_id)
 
+    if new_status:
         # Create new log entry for "full" status
         log = SensorLog(
             sensor_id=data.sensor_id,
@@ -126,122 +292,142 @@ async def update_sensor_status(
             RFID=None
         )
         db.add(log)
+        await db.flush()
+        new_state = SensorState(new_status, state.location, state.company_id, log.id, None)
     else:
-        # Find active log with RFID to mark as emptied
-        active_log = await db.execute(
-            select(SensorLog)
+        # Mark the active log as emptied
+        result = await db.execute(
+            update(SensorLog)
             .where(
                 and_(
-                    SensorLog.sensor_id == data.sensor_id,
+                    SensorLog.id == state.active_log_id,
                     SensorLog.sensor_status == True,
-                    SensorLog.RFID.isnot(None)
+                    SensorLog.RFID == state.active_log_rfid
                 )
             )
-            .order_by(SensorLog.timestamp.desc())
-            .limit(1)
+            .values(sensor_status=False, timestamp=datetime.utcnow())
+            .execution_options(synchronize_session=False)
         )
-        active_log = active_log.scalar_one_or_none()
+        if result.rowcount != 1:
+            raise StaleSensorState(data.sensor_id)
+        new_state = SensorState(new_status, state.location, state.company_id)
+
+    return state, new_state
 
-        if not active_log:
+# Sensor Operation Endpoints
+@router.post("/update-status", status_code=status.HTTP_200_OK)
+async def update_sensor_status(
+    data: SensorStatusUpdate, 
+    db: AsyncSession = Depends(get_db)
+):
+    """Update sensor status with strict RFID validation"""
+    try:
+        state, new_state = await apply_sensor_status(db, data)
+    except StaleSensorState:
+        # Another writer changed this bin since it was cached; retry from the database
+        await db.rollback()
+        sensor_state_cache.invalidate(data.sensor_id)
+        try:
+            state, new_state = await apply_sensor_status(db, data)
+        except StaleSensorState:
+            await db.rollback()
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="RFID not scanned for current active log"
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Sensor state changed concurrently, please retry"
             )
 
-        # Update existing log entry
-        active_log.sensor_status = False
-        active_log.timestamp = datetime.utcnow()
-        db.add(active_log)
+    # Pay for an emptied bin in the same transaction as the status change
+    paid, phone = False, None
+    if not data.status:
+        paid, phone = await process_payment(data.sensor_id, db, state.company_id, state.active_log_rfid)
 
-    # Update sensor status
-    sensor.sensor_status = new_status
-    db.add(sensor)
-    
     await db.commit()
-    await db.refresh(sensor)
+    sensor_state_cache.set(data.sensor_id, new_state)
 
     # Handle notifications
-    if new_status:
+    if data.status:
         try:
-            company_number = os.getenv("TWILIO_PHONE_NUMBER")
-            message = f"🚨 Alert: Bin {sensor.sensor_id} at {sensor.location} is full!"
+            message = f"🚨 Alert: Bin {data.sensor_id} at {state.location} is full!"
             await twilio_service.send_sms(message)
         except Exception as e:
             print(f"Failed to send full notification: {str(e)}")
-    else:
-        await process_payment(data.sensor_id, db, sensor)
+    elif paid and phone:
+        try:
+            message = f"💸 Payment: ₹{BIN_EMPTY_PAYMENT} credited for emptying bin {data.sensor_id}"
+            await twilio_service.send_sms(message)
+        except Exception as e:
+            print(f"Failed to send payment SMS: {str(e)}")
 
     return {"message": "Status updated successfully"}
 
-async def process_payment(sensor_id: str, db: AsyncSession, sensor: Sensor):
-    """Process payment for emptied bin"""
-    # Get the updated log entry
-    log_entry = await db.execute(
-        select(SensorLog)
-        .where(
-            and_(
-                SensorLog.sensor_id == sensor_id,
-                SensorLog.sensor_status == False
-            )
-        )
-        .order_by(SensorLog.timestamp.desc())
-        .limit(1)
-    )
-    log_entry = log_entry.scalar_one_or_none()
-
-    if not log_entry or not log_entry.RFID:
-        return
+async def process_payment(sensor_id: str, db: AsyncSession, company_id: Optional[int], rfid: Optional[str]):
+    """
+    Pay for an emptied bin, given the RFID scanned on the emptied log. Runs in the
+    caller's transaction; returns whether a payment was made and the ragpicker's phone.
+    """
+    if not rfid:
+        return False, None
 
-    # Get ragpicker details
+    # Get the ragpicker and their phone number in one query
     ragpicker = await db.execute(
-        select(RagpickerDetails)
-        .where(RagpickerDetails.RFID == log_entry.RFID)
+        select(RagpickerDetails.clerkId, UserDetails.phone)
+        .outerjoin(UserDetails, UserDetails.clerkId == RagpickerDetails.clerkId)
+        .where(RagpickerDetails.RFID == rfid)
     )
-    ragpicker = ragpicker.scalar_one_or_none()
+    ragpicker = ragpicker.first()
 
     if not ragpicker:
-        return
+        return False, None
 
-    # Verify company balance
-    company = await db.execute(
-        select(CompanyBalances)
-        .where(CompanyBalances.id == sensor.company_id)
+    # Debit the company and credit the ragpicker
+    new_balance = await payments.pay_from_company(
+        db,
+        company_id=company_id,
+        to_clerk_id=ragpicker.clerkId,
+        amount=BIN_EMPTY_PAYMENT,
+        reason=payments.BIN_EMPTIED,
+        reference=sensor_id
     )
-    company = company.scalar_one_or_none()
+    if new_balance is None:
+        return False, None
 
-    if not company or company.balance < 60:
-        return
+    return True, ragpicker.phone
 
-    # Update balances
-    company.balance -= 60
-    
-    ragpicker_balance = await db.execute(
-        select(Balances)
-        .where(Balances.clerkId == ragpicker.clerkId)
-    )
-    ragpicker_balance = ragpicker_balance.scalar_one_or_none()
-    
-    if ragpicker_balance:
-        ragpicker_balance.balance += 60
-    else:
-        db.add(Balances(clerkId=ragpicker.clerkId, balance=60))
-    
-    await db.commit()
+async def apply_rfid(db: AsyncSession, data: RFIDUpdate):
+    """
+    Attach an RFID to the sensor's active log, guarded on the cached log state.
+    Raises StaleSensorState if the database no longer matches the cache.
+    """
+    state, from_cache = await load_sensor_state(db, data.sensor_id)
 
-    # Send payment notification
-    try:
-        user_details = await db.execute(
-            select(UserDetails)
-            .join(User, UserDetails.clerkId == User.clerkId)
-            .where(User.clerkId == ragpicker.clerkId)
+    # Find active log entry still waiting for an RFID
+    if not state or state.active_log_id is None or state.active_log_rfid is not None:
+        reject_sensor_event(
+            data.sensor_id, from_cache,
+            status.HTTP_404_NOT_FOUND, "No active log entry found"
         )
-        user_details = user_details.scalar_one_or_none()
-        
-        if user_details and user_details.phone:
-            message = f"💸 Payment: ₹60 credited for emptying bin {sensor_id}"
-            await twilio_service.send_sms(message)
-    except Exception as e:
-        print(f"Failed to send payment SMS: {str(e)}")
+
+    # Update RFID in existing log
+    result = await db.execute(
+        update(SensorLog)
+        .where(
+            and_(
+                SensorLog.id == state.active_log_id,
+                SensorLog.sensor_status == True,
+                SensorLog.RFID.is_(None)
+            )
+        )
+        .values(RFID=data.rfid)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise StaleSensorState(data.sensor_id)
+
+    await db.commit()
+    sensor_state_cache.set(
+        data.sensor_id,
+        SensorState(state.sensor_status, state.location, state.company_id, state.active_log_id, data.rfid)
+    )
 
 @router.post("/rfid", status_code=status.HTTP_200_OK)
 async def update_rfid(
@@ -259,30 +445,316 @@ async def update_rfid(
     if not ragpicker:
         raise HTTPException(status_code=400, detail="Invalid RFID")
 
-    # Find active log entry
-    active_log = await db.execute(
-        select(SensorLog)
+    try:
+        await apply_rfid(db, data)
+    except StaleSensorState:
+        # Another writer changed this bin since it was cached; retry from the database
+        await db.rollback()
+        sensor_state_cache.invalidate(data.sensor_id)
+        try:
+            await apply_rfid(db, data)
+        except StaleSensorState:
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Sensor state changed concurrently, please retry"
+            )
+
+    return {"message": "RFID updated successfully"}
+
+@router.post("/events:batch", response_model=SensorEventBatchResponse, status_code=status.HTTP_200_OK)
+async def ingest_sensor_events(
+    batch: SensorEventBatch,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Apply an ordered batch of status/RFID events from many bins in one transaction.
+
+    Each event goes through the same checks as /update-status and /rfid and gets
+    its own result; a rejected event does not stop the rest of the batch.
+    Events with an event_id are applied at most once: a retried event gets
+    the result it was first given.
+    """
+    sensor_ids = {event.sensor_id for event in batch.events}
+    try:
+        try:
+            results, full_sensors, paid = await apply_sensor_events(db, batch.events)
+        except StaleSensorState:
+            # Another writer changed one of these bins after it was read; re-apply from the database
+            await db.rollback()
+            results, full_sensors, paid = await apply_sensor_events(db, batch.events)
+        await db.commit()
+    except (StaleSensorState, IntegrityError):
+        # Still racing, or a concurrent upload of the same events got their receipts in first
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Sensor state changed concurrently, please retry"
+        )
+    finally:
+        # Cached state for these bins is now out of date
+        for sensor_id in sensor_ids:
+            sensor_state_cache.invalidate(sensor_id)
+
+    # Handle notifications once everything is persisted
+    for sensor in full_sensors:
+        try:
+            message = f"🚨 Alert: Bin {sensor.sensor_id} at {sensor.location} is full!"
+            await twilio_service.send_sms(message)
+        except Exception as e:
+            print(f"Failed to send full notification: {str(e)}")
+
+    for sensor_id, phone in paid:
+        try:
+            if phone:
+                message = f"💸 Payment: ₹{BIN_EMPTY_PAYMENT} credited for emptying bin {sensor_id}"
+                await twilio_service.send_sms(message)
+        except Exception as e:
+            print(f"Failed to send payment SMS: {str(e)}")
+
+    return SensorEventBatchResponse(results=results)
+
+async def apply_sensor_events(db: AsyncSession, events: list):
+    """
+    Validate and write a batch of events without committing. Events are checked
+    one by one against state tracked in memory, then each bin's final state is
+    written with a fixed number of set-based statements however long the batch.
+    Like apply_sensor_status and apply_rfid, the writes are conditional on the
+    state read at the start of the batch, so a bin changed by another writer in
+    between raises StaleSensorState instead of being overwritten.
+    Returns (results, sensors that became full, (sensor_id, phone) payments made).
+    """
+    sensor_ids = {event.sensor_id for event in events}
+
+    # Results of events already applied by an earlier upload
+    event_ids = {event.event_id for event in events if event.event_id}
+    receipts = {}
+    if event_ids:
+        receipts_result = await db.execute(
+            select(SensorEventReceipt).where(SensorEventReceipt.event_id.in_(event_ids))
+        )
+        receipts = {receipt.event_id: receipt for receipt in receipts_result.scalars().all()}
+
+    # Load every sensor and its active logs (newest first) up front
+    sensors_result = await db.execute(select(Sensor).where(Sensor.sensor_id.in_(sensor_ids)))
+    sensors = {sensor.sensor_id: sensor for sensor in sensors_result.scalars().all()}
+    # Expected state, tracked here instead of on the ORM objects so nothing is flushed unguarded
+    statuses = {sensor_id: sensor.sensor_status for sensor_id, sensor in sensors.items()}
+
+    # sensor_id -> active logs as dicts, newest first; logs the batch opens have
+    # no id and hold exactly the columns they will be inserted with
+    active_logs = defaultdict(list)
+    existing_logs = {}  # log id -> (log, RFID read from the database)
+    logs_result = await db.execute(
+        select(SensorLog.sensor_id, SensorLog.id, SensorLog.RFID)
         .where(
             and_(
-                SensorLog.sensor_id == data.sensor_id,
-                SensorLog.sensor_status == True,
-                SensorLog.RFID.is_(None)
+                SensorLog.sensor_id.in_(sensor_ids),
+                SensorLog.sensor_status == True
             )
         )
         .order_by(SensorLog.timestamp.desc())
-        .limit(1)
     )
-    active_log = active_log.scalar_one_or_none()
+    for sensor_id, log_id, rfid in logs_result.all():
+        log = {"id": log_id, "sensor_id": sensor_id, "RFID": rfid, "sensor_status": True}
+        active_logs[sensor_id].append(log)
+        existing_logs[log_id] = (log, rfid)
 
-    if not active_log:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="No active log entry found"
+    # Resolve every RFID the batch can touch in one query
+    rfids = {event.rfid for event in events if event.type == "rfid" and event.rfid}
+    rfids.update(rfid for _, rfid in existing_logs.values() if rfid)
+    ragpickers_by_rfid = {}
+    if rfids:
+        ragpickers_result = await db.execute(
+            select(RagpickerDetails).where(RagpickerDetails.RFID.in_(rfids))
         )
+        for ragpicker in ragpickers_result.scalars().all():
+            ragpickers_by_rfid.setdefault(ragpicker.RFID, ragpicker)
 
-    # Update RFID in existing log
-    active_log.RFID = data.rfid
-    db.add(active_log)
-    await db.commit()
+    initial_statuses = dict(statuses)
+    touched = set()  # Sensors whose status the batch changed, even if back again
+    new_logs = []  # Rows to insert, in the order the batch opened them
+    results = []
+    full_sensors = []
+    emptied = []  # (sensor, RFID) pairs to pay out
 
-    return {"message": "RFID updated successfully"}
\ No newline at end of file
+    for index, event in enumerate(events):
+        def result(status_code: int, detail: str):
+            results.append(SensorEventResult(
+                index=index,
+                sensor_id=event.sensor_id,
+                status_code=status_code,
+                detail=detail
+            ))
+            if event.event_id:
+                receipt = SensorEventReceipt(
+                    event_id=event.event_id,
+                    sensor_id=event.sensor_id,
+                    status_code=status_code,
+                    detail=detail
+                )
+                db.add(receipt)
+                receipts[event.event_id] = receipt
+
+        receipt = receipts.get(event.event_id) if event.event_id else None
+        if receipt:
+            results.append(SensorEventResult(
+                index=index,
+                sensor_id=event.sensor_id,
+                status_code=receipt.status_code,
+                detail=receipt.detail
+            ))
+            continue
+
+        sensor = sensors.get(event.sensor_id)
+        logs = active_logs[event.sensor_id]
+
+        if event.type == "status":
+            if event.status is None:
+                result(status.HTTP_422_UNPROCESSABLE_ENTITY, "status is required for status events")
+                continue
+            if not sensor:
+                result(status.HTTP_404_NOT_FOUND, "Sensor not found")
+                continue
+            current_status = statuses[event.sensor_id]
+            if current_status == event.status:
+                result(status.HTTP_400_BAD_REQUEST, f"Sensor already in {event.status} state")
+                continue
+
+            if event.status:
+                if logs:
+                    result(status.HTTP_400_BAD_REQUEST, "Active log already exists")
+                    continue
+            else:
+                active_log = next((log for log in logs if log["RFID"] is not None), None)
+                if not active_log:
+                    result(status.HTTP_400_BAD_REQUEST, "RFID not scanned for current active log")
+                    continue
+
+            statuses[event.sensor_id] = event.status
+            touched.add(event.sensor_id)
+            if event.status:
+                log = {"sensor_id": event.sensor_id, "sensor_status": True, "RFID": None, "timestamp": datetime.utcnow()}
+                new_logs.append(log)
+                logs.insert(0, log)
+                full_sensors.append(sensor)
+            else:
+                active_log["sensor_status"] = False
+                active_log["timestamp"] = datetime.utcnow()
+                logs.remove(active_log)
+                emptied.append((sensor, active_log["RFID"]))
+
+            result(status.HTTP_200_OK, "Status updated successfully")
+        else:
+            if not event.rfid or event.rfid not in ragpickers_by_rfid:
+                result(status.HTTP_400_BAD_REQUEST, "Invalid RFID")
+                continue
+            active_log = next((log for log in logs if log["RFID"] is None), None)
+            if not active_log:
+                result(status.HTTP_404_NOT_FOUND, "No active log entry found")
+                continue
+            active_log["RFID"] = event.rfid
+            result(status.HTTP_200_OK, "RFID updated successfully")
+
+    await write_sensor_states(db, touched, statuses, initial_statuses, existing_logs, new_logs)
+    paid = await apply_batch_payments(db, emptied, ragpickers_by_rfid)
+    return results, full_sensors, paid
+
+async def write_sensor_states(
+    db: AsyncSession,
+    touched: set,
+    statuses: dict,
+    initial_statuses: dict,
+    existing_logs: dict,
+    new_logs: list
+):
+    """
+    Write the final state of a batch's bins: one UPDATE for the sensors, one for
+    the logs that were already open and one INSERT for the logs the batch opened.
+    Each UPDATE only matches rows still in the state the batch read, and raises
+    StaleSensorState unless it matched all of them.
+    """
+    if touched:
+        expected = defaultdict(list)
+        for sensor_id in touched:
+            expected[initial_statuses[sensor_id]].append(sensor_id)
+        full = [sensor_id for sensor_id in touched if statuses[sensor_id]]
+        result = await db.execute(
+            update(Sensor)
+            .where(or_(*(
+                and_(Sensor.sensor_id.in_(sensor_ids), Sensor.sensor_status.is_not_distinct_from(value))
+                for value, sensor_ids in expected.items()
+            )))
+            .values(sensor_status=case((Sensor.sensor_id.in_(full), True), else_=False))
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(touched):
+            raise StaleSensorState(", ".join(sorted(touched)))
+
+    changed = {
+        log_id: (log, rfid)
+        for log_id, (log, rfid) in existing_logs.items()
+        if log["RFID"] != rfid or not log["sensor_status"]
+    }
+    if changed:
+        untagged = [log_id for log_id, (_, rfid) in changed.items() if rfid is None]
+        tagged = [(log_id, rfid) for log_id, (_, rfid) in changed.items() if rfid is not None]
+        conditions = []
+        if untagged:
+            conditions.append(and_(SensorLog.id.in_(untagged), SensorLog.RFID.is_(None)))
+        if tagged:
+            conditions.append(tuple_(SensorLog.id, SensorLog.RFID).in_(tagged))
+
+        values = {}
+        new_rfids = {log_id: log["RFID"] for log_id, (log, rfid) in changed.items() if log["RFID"] != rfid}
+        if new_rfids:
+            values["RFID"] = case(new_rfids, value=SensorLog.id, else_=SensorLog.RFID)
+        closed = {log_id: log["timestamp"] for log_id, (log, _) in changed.items() if not log["sensor_status"]}
+        if closed:
+            values["sensor_status"] = case((SensorLog.id.in_(closed), False), else_=True)
+            values["timestamp"] = case(closed, value=SensorLog.id, else_=SensorLog.timestamp)
+
+        result = await db.execute(
+            update(SensorLog)
+            .where(and_(SensorLog.sensor_status == True, or_(*conditions)))
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != len(changed):
+            raise StaleSensorState(", ".join(sorted({log["sensor_id"] for log, _ in changed.values()})))
+
+    if new_logs:
+        # Keep NULL RFIDs in the parameters so open and closed logs insert as one batch
+        await db.execute(insert(SensorLog).execution_options(render_nulls=True), new_logs)
+
+async def apply_batch_payments(db: AsyncSession, emptied: list, ragpickers_by_rfid: dict):
+    """
+    Pay ragpickers for every bin emptied in a batch with one payout per company,
+    loading the phone numbers involved with one query.
+    Returns (sensor_id, phone) pairs for the payments that went through.
+    """
+    payable = [
+        (sensor, ragpickers_by_rfid[rfid])
+        for sensor, rfid in emptied
+        if rfid in ragpickers_by_rfid
+    ]
+    if not payable:
+        return []
+
+    clerk_ids = {ragpicker.clerkId for _, ragpicker in payable}
+    details_result = await db.execute(select(UserDetails).where(UserDetails.clerkId.in_(clerk_ids)))
+    phones = {details.clerkId: details.phone for details in details_result.scalars().all()}
+
+    made = await payments.pay_many_from_company(
+        db,
+        [
+            (sensor.company_id, ragpicker.clerkId, BIN_EMPTY_PAYMENT, sensor.sensor_id)
+            for sensor, ragpicker in payable
+        ],
+        reason=payments.BIN_EMPTIED
+    )
+    return [
+        (sensor.sensor_id, phones.get(ragpicker.clerkId))
+        for (sensor, ragpicker), ok in zip(payable, made)
+        if ok
+    ]
@@ -2,10 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.db.database import get_db
+from app.db.pagination import keyset_paginate, split_page
 from app.models.user import User, UserDetails
-from app.schemas.user import UserCreate, UserResponse, UserDetailsCreate, UserDetailsResponse
+from app.schemas.user import UserCreate, UserResponse, UserDetailsCreate, UserDetailsResponse, UserPage
 from app.services.s3 import upload_base64_image_to_s3, delete_file, is_url
-from typing import List, Dict
+from app.services.response_cache import ragpicker_directory_cache
+from app.services.geocoding import update_location
+from typing import List, Dict, Optional, Union
 import logging
 
 # Set up logger
@@ -38,14 +41,24 @@ async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_db))
     )
     db.add(db_user)
     await db.commit()
-    await db.refresh(db_user)
+    if db_user.role == "RAGPICKER":
+        ragpicker_directory_cache.invalidate_all()
     return db_user
 
-@router.get("/", response_model=List[UserResponse])
-async def get_users(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
+@router.get("/", response_model=Union[List[UserResponse], UserPage])
+async def get_users(skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: AsyncSession = Depends(get_db)):
     """
-    Get all users
+    Get all users.
+
+    Passing `cursor` (empty for the first page) switches to keyset pagination,
+    newest first, and returns a page with `next_cursor`.
     """
+    if cursor is not None:
+        query = keyset_paginate(select(User), User.createdAt, User.clerkId, cursor, limit)
+        result = await db.execute(query)
+        users, next_cursor = split_page(result.scalars().all(), limit, lambda user: (user.createdAt, user.clerkId))
+        return UserPage(items=users, next_cursor=next_cursor)
+    
     result = await db.execute(select(User).offset(skip).limit(limit))
     users = result.scalars().all()
     return users
@@ -80,13 +93,18 @@ async def update_user(clerk_id: str, user_data: UserCreate, db: AsyncSession = D
         )
     
     # Update user fields
+    role_changed = user.role != user_data.role
     user.email = user_data.email
     user.firstName = user_data.firstName
     user.lastName = user_data.lastName
     user.role = user_data.role
     
     await db.commit()
-    await db.refresh(user)
+    if role_changed:
+        # Joining or leaving the directory shifts every page
+        ragpicker_directory_cache.invalidate_all()
+    else:
+        ragpicker_directory_cache.invalidate(clerk_id)
     return user
 
 @router.delete("/{clerk_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -103,8 +121,11 @@ async def delete_user(clerk_id: str, db: AsyncSession = Depends(get_db)):
             detail=f"User with clerk ID {clerk_id} not found"
         )
     
+    was_ragpicker = user.role == "RAGPICKER"
     await db.delete(user)
     await db.commit()
+    if was_ragpicker:
+        ragpicker_directory_cache.invalidate_all()
     return None
 
 # User details endpoints
@@ -147,6 +168,7 @@ async def create_user_details(clerk_id: str, details: UserDetailsCreate, db: Asy
     result = await db.execute(select(UserDetails).where(UserDetails.clerkId == clerk_id))
     existing_details = result.scalars().first()
     
+    previous_address = existing_details.address if existing_details else None
     if existing_details:
         # If updating with a new profile pic, delete the old one if it exists
         if profile_pic_url and existing_details.profile_pic_url:
@@ -174,14 +196,19 @@ async def create_user_details(clerk_id: str, details: UserDetailsCreate, db: Asy
         )
         db.add(user_details)
     
+    # Coordinates for nearby search
+    await update_location(user_details, previous_address, details.latitude, details.longitude)
+    
     await db.commit()
-    await db.refresh(user_details)
+    ragpicker_directory_cache.invalidate(clerk_id)
     
     return UserDetailsResponse(
         clerkId=user_details.clerkId,
         phone=user_details.phone,
         address=user_details.address,
         bio=user_details.bio,
+        latitude=user_details.latitude,
+        longitude=user_details.longitude,
         profile_pic_url=user_details.profile_pic_url
     )
 
@@ -204,6 +231,8 @@ async def get_user_details(clerk_id: str, db: AsyncSession = Depends(get_db)):
         phone=user_details.phone,
         address=user_details.address,
         bio=user_details.bio,
+        latitude=user_details.latitude,
+        longitude=user_details.longitude,
         profile_pic_url=user_details.profile_pic_url
     )
 
@@ -261,20 +290,26 @@ async def update_user_details(clerk_id: str, details: UserDetailsCreate, db: Asy
             )
     
     # Update fields
+    previous_address = user_details.address
     user_details.phone = details.phone
     user_details.address = details.address
     user_details.bio = details.bio
     if profile_pic_url:
         user_details.profile_pic_url = profile_pic_url
     
+    # Coordinates for nearby search
+    await update_location(user_details, previous_address, details.latitude, details.longitude)
+    
     await db.commit()
-    await db.refresh(user_details)
+    ragpicker_directory_cache.invalidate(clerk_id)
     
     return UserDetailsResponse(
         clerkId=user_details.clerkId,
         phone=user_details.phone,
         address=user_details.address,
         bio=user_details.bio,
+        latitude=user_details.latitude,
+        longitude=user_details.longitude,
         profile_pic_url=user_details.profile_pic_url
     )
 
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from functools import lru_cache
 import os
 import logging
 
@@ -8,7 +8,14 @@ logger = logging.getLogger(__name__)
 
 # Set up templates
 templates_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
-templates = Jinja2Templates(directory=templates_dir)
+
+@lru_cache(maxsize=None)
+def get_templates():
+    """
+    Jinja2 is only loaded when a page is first rendered, not on cold start
+    """
+    from fastapi.templating import Jinja2Templates
+    return Jinja2Templates(directory=templates_dir)
 
 router = APIRouter(tags=["templates"])
 
@@ -18,7 +25,7 @@ async def index_page(request: Request):
     Serve the landing page that handles clerk_id parameter
     """
     logger.info("Serving index page")
-    return templates.TemplateResponse("index.html", {"request": request})
+    return get_templates().TemplateResponse("index.html", {"request": request})
 
 @router.get("/user-details", response_class=HTMLResponse)
 async def user_details_direct(request: Request):
@@ -26,7 +33,7 @@ async def user_details_direct(request: Request):
     Serve the user details page directly
     """
     logger.info("Serving user details page directly")
-    return templates.TemplateResponse("user_details.html", {"request": request})
+    return get_templates().TemplateResponse("user_details.html", {"request": request})
 
 @router.get("/ragpicker-wallet", response_class=HTMLResponse)
 async def ragpicker_wallet_page(request: Request):
@@ -34,7 +41,7 @@ async def ragpicker_wallet_page(request: Request):
     Serve the ragpicker wallet setup page
     """
     logger.info("Serving ragpicker wallet setup page")
-    return templates.TemplateResponse("ragpicker_details.html", {"request": request})
+    return get_templates().TemplateResponse("ragpicker_details.html", {"request": request})
 
 @router.get("/ragpicker-application", response_class=HTMLResponse)
 async def ragpicker_application_page(request: Request):
@@ -42,7 +49,7 @@ async def ragpicker_application_page(request: Request):
     Serve the ragpicker application submission page
     """
     logger.info("Serving ragpicker application submission page")
-    return templates.TemplateResponse("application_submission.html", {"request": request})
+    return get_templates().TemplateResponse("application_submission.html", {"request": request})
 
 # Admin dashboard routes removed to avoid conflicts with admin router 
 
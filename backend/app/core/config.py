@@ -27,6 +27,34 @@ else:
     ASYNC_DATABASE_URL = DATABASE_URL
     SYNC_DATABASE_URL = DATABASE_URL.replace("postgresql+asyncpg", "postgresql+psycopg2") if DATABASE_URL else None
 
+# Optional read replica for read-only endpoints
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+if READ_DATABASE_URL and READ_DATABASE_URL.startswith("postgresql+psycopg2") and ENVIRONMENT != "testing":
+    ASYNC_READ_DATABASE_URL = READ_DATABASE_URL.replace("postgresql+psycopg2", "postgresql+asyncpg")
+else:
+    ASYNC_READ_DATABASE_URL = READ_DATABASE_URL
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+REPLICA_LAG_CHECK_INTERVAL_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL_SECONDS", "10"))
+
+def _optional_number(name, cast):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else None
+
+# Async engine pooling profile: lambda, server or external (see app/db/pooling.py)
+DB_POOL_PROFILE = os.getenv("DB_POOL_PROFILE") or ("lambda" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "server")
+DB_POOL_SIZE = _optional_number("DB_POOL_SIZE", int)
+DB_MAX_OVERFLOW = _optional_number("DB_MAX_OVERFLOW", int)
+DB_POOL_TIMEOUT = _optional_number("DB_POOL_TIMEOUT", float)
+DB_POOL_RECYCLE = _optional_number("DB_POOL_RECYCLE", int)
+
+# Per-request SQL stats: statements slower than this are logged (parameters redacted)
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+QUERY_STATS_LOG_ENABLED = os.getenv("QUERY_STATS_LOG_ENABLED", "true").lower() == "true"
+
+# In-process metrics: /metrics for servers, EMF log lines under Lambda
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "WasteWhirl")
+METRICS_EMF_ENABLED = os.getenv("METRICS_EMF_ENABLED", "true" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "false").lower() == "true"
+
 # Support both bucket name environment variables
 AWS_S3_BUCKET_NAME = os.getenv("AWS_S3_BUCKET_NAME") or os.getenv("AWS_BUCKET_NAME")
 AWS_CLOUDFRONT_URL = os.getenv("AWS_CLOUDFRONT_URL")
@@ -35,16 +63,101 @@ TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 
+# SMS notification outbox
+NOTIFICATION_TRANSPORT = os.getenv("NOTIFICATION_TRANSPORT", "twilio" if ENVIRONMENT == "production" else "console")
+NOTIFICATION_WORKERS = int(os.getenv("NOTIFICATION_WORKERS", "4"))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_MAX_ATTEMPTS", "4"))
+NOTIFICATION_RETRY_BACKOFF_SECONDS = float(os.getenv("NOTIFICATION_RETRY_BACKOFF_SECONDS", "1"))
+NOTIFICATION_COALESCE_SECONDS = float(os.getenv("NOTIFICATION_COALESCE_SECONDS", "0.5"))
+NOTIFICATION_FLUSH_TIMEOUT_SECONDS = float(os.getenv("NOTIFICATION_FLUSH_TIMEOUT_SECONDS", "5"))
+# "memory" sends from background threads; "database" persists messages for the scheduled Lambda task to send
+NOTIFICATION_OUTBOX = os.getenv("NOTIFICATION_OUTBOX", "database" if os.getenv("AWS_LAMBDA_FUNCTION_NAME") else "memory")
+NOTIFICATION_DRAIN_BATCH_SIZE = int(os.getenv("NOTIFICATION_DRAIN_BATCH_SIZE", "500"))
+NOTIFICATION_LEASE_SECONDS = float(os.getenv("NOTIFICATION_LEASE_SECONDS", "120"))
+
+# In-process cache of sensor status / active log per bin
+SENSOR_STATE_CACHE_TTL_SECONDS = float(os.getenv("SENSOR_STATE_CACHE_TTL_SECONDS", "30"))
+SENSOR_STATE_CACHE_MAX_SIZE = int(os.getenv("SENSOR_STATE_CACHE_MAX_SIZE", "5000"))
+
+# Response cache for the ragpicker directory (/ragpickers/all-ragpickers)
+RAGPICKER_CACHE_TTL_SECONDS = float(os.getenv("RAGPICKER_CACHE_TTL_SECONDS", "30"))
+RAGPICKER_CACHE_MAX_SIZE = int(os.getenv("RAGPICKER_CACHE_MAX_SIZE", "256"))
+
+# Address geocoding for nearby search: offline (deterministic stand-in, not allowed in production) or nominatim
+GEOCODER_PROVIDER = os.getenv("GEOCODER_PROVIDER", "nominatim" if ENVIRONMENT == "production" else "offline")
+GEOCODER_URL = os.getenv("GEOCODER_URL", "https://nominatim.openstreetmap.org/search")
+GEOCODER_USER_AGENT = os.getenv("GEOCODER_USER_AGENT", "waste-whirl-backend")
+GEOCODER_TIMEOUT_SECONDS = float(os.getenv("GEOCODER_TIMEOUT_SECONDS", "5"))
+GEOCODER_OFFLINE_CENTER = tuple(float(part) for part in os.getenv("GEOCODER_OFFLINE_CENTER", "30.7333,76.7794").split(","))
+GEOCODER_OFFLINE_RADIUS_KM = float(os.getenv("GEOCODER_OFFLINE_RADIUS_KM", "15"))
+NEARBY_DEFAULT_RADIUS_KM = float(os.getenv("NEARBY_DEFAULT_RADIUS_KM", "5"))
+NEARBY_MAX_RADIUS_KM = float(os.getenv("NEARBY_MAX_RADIUS_KM", "50"))
+
+# Automatic dispatch of requests created without a ragpicker
+DISPATCH_BATCH_SIZE = int(os.getenv("DISPATCH_BATCH_SIZE", "1000"))
+DISPATCH_MAX_DISTANCE_KM = float(os.getenv("DISPATCH_MAX_DISTANCE_KM", "10"))
+DISPATCH_MAX_LOAD = int(os.getenv("DISPATCH_MAX_LOAD", "5"))  # Open (PENDING + ACCEPTED) requests per ragpicker
+DISPATCH_CANDIDATES_PER_REQUEST = int(os.getenv("DISPATCH_CANDIDATES_PER_REQUEST", "20"))
+DISPATCH_MAX_ATTEMPTS = int(os.getenv("DISPATCH_MAX_ATTEMPTS", "3"))
+DISPATCH_REJECTION_WINDOW_DAYS = int(os.getenv("DISPATCH_REJECTION_WINDOW_DAYS", "30"))
+# A request no ragpicker could take waits half its age, within these bounds, before it is tried again
+DISPATCH_RETRY_MIN_SECONDS = float(os.getenv("DISPATCH_RETRY_MIN_SECONDS", "60"))
+DISPATCH_RETRY_MAX_SECONDS = float(os.getenv("DISPATCH_RETRY_MAX_SECONDS", "3600"))
+
+# Collection routes over full bins (/sensors/routes)
+ROUTE_MAX_STOPS = int(os.getenv("ROUTE_MAX_STOPS", "500"))
+
+# Clerk API client
+CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
+CLERK_TIMEOUT_SECONDS = float(os.getenv("CLERK_TIMEOUT_SECONDS", "10"))
+CLERK_USER_CACHE_TTL_SECONDS = float(os.getenv("CLERK_USER_CACHE_TTL_SECONDS", "60"))
+CLERK_USER_CACHE_MAX_SIZE = int(os.getenv("CLERK_USER_CACHE_MAX_SIZE", "1000"))
+
 class Settings:
     API_V1_STR = API_V1_STR
     PROJECT_NAME = PROJECT_NAME
     ENVIRONMENT = ENVIRONMENT
     DATABASE_URL = ASYNC_DATABASE_URL
+    DB_POOL_PROFILE = DB_POOL_PROFILE
+    SLOW_QUERY_THRESHOLD_MS = SLOW_QUERY_THRESHOLD_MS
+    QUERY_STATS_LOG_ENABLED = QUERY_STATS_LOG_ENABLED
+    METRICS_NAMESPACE = METRICS_NAMESPACE
+    METRICS_EMF_ENABLED = METRICS_EMF_ENABLED
+    READ_DATABASE_URL = ASYNC_READ_DATABASE_URL
+    REPLICA_MAX_LAG_SECONDS = REPLICA_MAX_LAG_SECONDS
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS = REPLICA_LAG_CHECK_INTERVAL_SECONDS
     AWS_S3_BUCKET_NAME = AWS_S3_BUCKET_NAME
     AWS_CLOUDFRONT_URL = AWS_CLOUDFRONT_URL
     TWILIO_ACCOUNT_SID = TWILIO_ACCOUNT_SID
     TWILIO_AUTH_TOKEN = TWILIO_AUTH_TOKEN
     TWILIO_PHONE_NUMBER = TWILIO_PHONE_NUMBER
+    NOTIFICATION_TRANSPORT = NOTIFICATION_TRANSPORT
+    NOTIFICATION_WORKERS = NOTIFICATION_WORKERS
+    NOTIFICATION_MAX_ATTEMPTS = NOTIFICATION_MAX_ATTEMPTS
+    NOTIFICATION_RETRY_BACKOFF_SECONDS = NOTIFICATION_RETRY_BACKOFF_SECONDS
+    NOTIFICATION_COALESCE_SECONDS = NOTIFICATION_COALESCE_SECONDS
+    NOTIFICATION_FLUSH_TIMEOUT_SECONDS = NOTIFICATION_FLUSH_TIMEOUT_SECONDS
+    NOTIFICATION_OUTBOX = NOTIFICATION_OUTBOX
+    NOTIFICATION_DRAIN_BATCH_SIZE = NOTIFICATION_DRAIN_BATCH_SIZE
+    NOTIFICATION_LEASE_SECONDS = NOTIFICATION_LEASE_SECONDS
+    SENSOR_STATE_CACHE_TTL_SECONDS = SENSOR_STATE_CACHE_TTL_SECONDS
+    SENSOR_STATE_CACHE_MAX_SIZE = SENSOR_STATE_CACHE_MAX_SIZE
+    RAGPICKER_CACHE_TTL_SECONDS = RAGPICKER_CACHE_TTL_SECONDS
+    RAGPICKER_CACHE_MAX_SIZE = RAGPICKER_CACHE_MAX_SIZE
+    GEOCODER_PROVIDER = GEOCODER_PROVIDER
+    GEOCODER_URL = GEOCODER_URL
+    NEARBY_DEFAULT_RADIUS_KM = NEARBY_DEFAULT_RADIUS_KM
+    NEARBY_MAX_RADIUS_KM = NEARBY_MAX_RADIUS_KM
+    DISPATCH_BATCH_SIZE = DISPATCH_BATCH_SIZE
+    DISPATCH_MAX_DISTANCE_KM = DISPATCH_MAX_DISTANCE_KM
+    DISPATCH_MAX_LOAD = DISPATCH_MAX_LOAD
+    DISPATCH_MAX_ATTEMPTS = DISPATCH_MAX_ATTEMPTS
+    DISPATCH_RETRY_MIN_SECONDS = DISPATCH_RETRY_MIN_SECONDS
+    DISPATCH_RETRY_MAX_SECONDS = DISPATCH_RETRY_MAX_SECONDS
+    ROUTE_MAX_STOPS = ROUTE_MAX_STOPS
+    CLERK_TIMEOUT_SECONDS = CLERK_TIMEOUT_SECONDS
+    CLERK_USER_CACHE_TTL_SECONDS = CLERK_USER_CACHE_TTL_SECONDS
+    CLERK_USER_CACHE_MAX_SIZE = CLERK_USER_CACHE_MAX_SIZE
 
 settings = Settings()
 
@@ -0,0 +1,230 @@
+"""
+In-process request, database pool and outbound call metrics.
+
+Long-running servers expose them in Prometheus text format on /metrics.
+Under Mangum (Lambda) there is nothing to scrape, so the handler calls
+flush_emf() after each invocation to print CloudWatch Embedded Metric
+Format lines for whatever was recorded since the previous flush.
+
+Histograms use fixed bucket bounds; recording is a bisect and two adds.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+import json
+import threading
+import time
+from app.core.config import METRICS_NAMESPACE, METRICS_EMF_ENABLED
+
+# Upper bounds in seconds; the last bucket is +Inf
+REQUEST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+OUTBOUND_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# CloudWatch accepts at most 100 values per metric in one EMF document
+EMF_MAX_VALUES = 100
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Cumulative-on-read histogram over fixed bucket bounds
+    """
+    __slots__ = ("bounds", "counts", "total", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        running = 0
+        buckets = []
+        for bound, count in zip(self.bounds, self.counts):
+            running += count
+            buckets.append((_format_number(bound), running))
+        buckets.append(("+Inf", running + self.counts[-1]))
+        return buckets
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else f"{value:.1f}"
+
+
+def _labels(**labels) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render_labels(labels: Labels, extra: Iterable[Tuple[str, str]] = ()) -> str:
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def pool_gauges(pools: Dict[str, dict]) -> Dict[str, Dict[Labels, float]]:
+    """
+    Gauges from app.db.pooling.pool_stats() output, keyed by pool name (primary, replica)
+    """
+    gauges: Dict[str, Dict[Labels, float]] = defaultdict(dict)
+    for pool, stats in pools.items():
+        for state in ("checked_out", "checked_in", "overflow"):
+            if state in stats:
+                gauges["db_pool_connections"][_labels(pool=pool, state=state)] = stats[state]
+        if "checkouts" in stats:
+            gauges["db_pool_checkouts"][_labels(pool=pool)] = stats["checkouts"]
+            gauges["db_pool_failed_checkouts"][_labels(pool=pool)] = stats["failed_checkouts"]
+            gauges["db_pool_checkout_wait_seconds"][_labels(pool=pool)] = stats["wait_ms_total"] / 1000
+    return gauges
+
+
+class MetricsRegistry:
+    def __init__(self, namespace: str = METRICS_NAMESPACE, emf_enabled: bool = METRICS_EMF_ENABLED):
+        self.namespace = namespace
+        self.emf_enabled = emf_enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = defaultdict(dict)
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = defaultdict(dict)
+        self._help: Dict[str, str] = {}
+        self.in_flight = 0
+        # Raw samples since the last EMF flush, keyed by (metric, dimensions)
+        self._emf_samples: Dict[Tuple[str, Labels], List[float]] = defaultdict(list)
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, amount: float = 1.0, **labels):
+        key = _labels(**labels)
+        with self._lock:
+            series = self._counters[name]
+            series[key] = series.get(key, 0.0) + amount
+
+    def observe(self, name: str, value: float, bounds: Tuple[float, ...], **labels):
+        key = _labels(**labels)
+        with self._lock:
+            series = self._histograms[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(bounds)
+            histogram.observe(value)
+            if self.emf_enabled:
+                samples = self._emf_samples[(name, key)]
+                if len(samples) < EMF_MAX_VALUES:
+                    samples.append(value)
+
+    def track_in_flight(self, delta: int):
+        with self._lock:
+            self.in_flight += delta
+
+    # Recording helpers used by the middleware and service clients
+
+    def record_request(self, method: str, route: str, status_code: int, seconds: float):
+        self.inc("http_requests_total", method=method, route=route, status=status_code)
+        self.observe("http_request_duration_seconds", seconds, REQUEST_LATENCY_BUCKETS, method=method, route=route)
+
+    @contextmanager
+    def time_outbound(self, service: str, operation: str):
+        """
+        Time a call to an external service (s3, twilio, clerk)
+        """
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            self.observe(
+                "outbound_request_duration_seconds", time.perf_counter() - started,
+                OUTBOUND_LATENCY_BUCKETS, service=service, operation=operation
+            )
+            self.inc("outbound_requests_total", service=service, operation=operation, outcome=outcome)
+
+    # Exposition
+
+    def render_prometheus(self, gauges: Optional[Dict[str, Dict[Labels, float]]] = None) -> str:
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {
+                name: {key: (h.cumulative(), h.total, h.count) for key, h in series.items()}
+                for name, series in self._histograms.items()
+            }
+            in_flight = self.in_flight
+
+        all_gauges = {"http_requests_in_flight": {(): in_flight}}
+        all_gauges.update(gauges or {})
+
+        for name, series in sorted(counters.items()):
+            self._header(lines, name, "counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_render_labels(key)} {_format_number(value)}")
+
+        for name, series in sorted(histograms.items()):
+            self._header(lines, name, "histogram")
+            for key, (buckets, total, count) in sorted(series.items()):
+                for bound, cumulative in buckets:
+                    lines.append(f"{name}_bucket{_render_labels(key, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_render_labels(key)} {total:.6f}")
+                lines.append(f"{name}_count{_render_labels(key)} {count}")
+
+        for name, series in sorted(all_gauges.items()):
+            self._header(lines, name, "gauge")
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_render_labels(key)} {_format_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, metric_type: str):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    def flush_emf(self, print_fn=print):
+        """
+        Print one EMF document per metric series recorded since the last flush
+        """
+        if not self.emf_enabled:
+            return
+        with self._lock:
+            samples = self._emf_samples
+            self._emf_samples = defaultdict(list)
+        timestamp = int(time.time() * 1000)
+        for (name, key), values in samples.items():
+            dimensions = dict(key)
+            metric_name = name.replace("_seconds", "_ms")
+            print_fn(json.dumps({
+                "_aws": {
+                    "Timestamp": timestamp,
+                    "CloudWatchMetrics": [{
+                        "Namespace": self.namespace,
+                        "Dimensions": [sorted(dimensions)],
+                        "Metrics": [{"Name": metric_name, "Unit": "Milliseconds"}],
+                    }],
+                },
+                **dimensions,
+                metric_name: [round(value * 1000, 3) for value in values],
+            }))
+
+
+# Singleton instance
+metrics = MetricsRegistry()
+metrics.describe("http_requests_total", "HTTP requests by method, route template and status")
+metrics.describe("http_request_duration_seconds", "HTTP request latency by method and route template")
+metrics.describe("http_requests_in_flight", "HTTP requests currently being handled")
+metrics.describe("outbound_requests_total", "Calls to external services by outcome")
+metrics.describe("outbound_request_duration_seconds", "Latency of calls to S3, Twilio and Clerk")
+metrics.describe("db_pool_connections", "Database pool connections by state")
+metrics.describe("db_pool_checkout_wait_seconds", "Total time spent waiting for a pooled connection")
+metrics.describe("db_pool_checkouts", "Pooled connection checkouts since start")
+metrics.describe("db_pool_failed_checkouts", "Pooled connection checkouts that failed or timed out")
@@ -0,0 +1,76 @@
+from fastapi.requests import Request
+import json
+import logging
+import time
+from app.core.config import QUERY_STATS_LOG_ENABLED
+from app.core.metrics import metrics
+from app.db.query_stats import request_query_stats
+
+logger = logging.getLogger(__name__)
+
+# Longest statement text kept in the per-request log line
+MAX_LOGGED_STATEMENT_LENGTH = 300
+
+
+def route_template(request: Request, unmatched: str = None) -> str:
+    """
+    The matched route's path template (/requests/{request_id}), so metrics and
+    logs group by endpoint rather than by id. If nothing matched, `unmatched`
+    or else the raw path.
+    """
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or unmatched or request.url.path
+
+
+def server_timing(stats) -> str:
+    return (
+        f'db;dur={stats.total_time * 1000:.2f};desc="{stats.statements} queries", '
+        f"db-slowest;dur={stats.slowest_time * 1000:.2f}"
+    )
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """
+    Count the SQL run for each request and report it in a Server-Timing
+    header and one structured log line
+    """
+    started = time.perf_counter()
+    with request_query_stats() as stats:
+        response = await call_next(request)
+
+    response.headers["Server-Timing"] = server_timing(stats)
+
+    if QUERY_STATS_LOG_ENABLED:
+        slowest = stats.slowest_statement
+        if slowest:
+            slowest = " ".join(slowest.split())[:MAX_LOGGED_STATEMENT_LENGTH]
+        logger.info(json.dumps({
+            "event": "request_queries",
+            "method": request.method,
+            "route": route_template(request),
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "statements": stats.statements,
+            "commits": stats.commits,
+            "db_ms": round(stats.total_time * 1000, 3),
+            "slowest_ms": round(stats.slowest_time * 1000, 3),
+            "slowest_statement": slowest,
+        }))
+
+    return response
+
+
+async def metrics_middleware(request: Request, call_next):
+    """
+    Request count, latency histogram by route template and in-flight gauge
+    """
+    started = time.perf_counter()
+    metrics.track_in_flight(1)
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        metrics.track_in_flight(-1)
+        metrics.record_request(request.method, route_template(request, "unmatched"), status_code, time.perf_counter() - started)
@@ -1,7 +1,11 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy import create_engine
-from app.core.config import ASYNC_DATABASE_URL, SYNC_DATABASE_URL
+from app.core.config import ASYNC_DATABASE_URL, SYNC_DATABASE_URL, DB_POOL_PROFILE
+from app.core.config import ASYNC_READ_DATABASE_URL, REPLICA_MAX_LAG_SECONDS, REPLICA_LAG_CHECK_INTERVAL_SECONDS
+from app.db.pooling import engine_options
+from app.db.query_stats import install_query_listeners
+from app.db.replica import ReplicaMonitor
 import logging
 import os
 from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
@@ -55,19 +59,17 @@ def clean_connection_url(url):
 clean_async_url = clean_connection_url(ASYNC_DATABASE_URL)
 clean_sync_url = clean_connection_url(SYNC_DATABASE_URL)
 
-# Create async engine with cleaned URL
+# Create async engine with cleaned URL, pooled according to DB_POOL_PROFILE
 async_engine = create_async_engine(
     clean_async_url,
     echo=False,
     future=True,
+    **engine_options(clean_async_url, DB_POOL_PROFILE),
 )
 
-# Create sync engine with cleaned URL
-sync_engine = create_engine(
-    clean_sync_url,
-    echo=False,
-    future=True,
-)
+# The sync engine is only used by migrations and scripts, so it is created on
+# first use to keep its DBAPI import off the API's cold start
+sync_engine = None
 
 async_session_factory = sessionmaker(
     async_engine, 
@@ -75,6 +77,28 @@ async_session_factory = sessionmaker(
     expire_on_commit=False,
 )
 
+# Read replica for read-only endpoints, if one is configured
+read_engine = None
+read_session_factory = None
+replica_monitor = None
+if ASYNC_READ_DATABASE_URL:
+    clean_read_url = clean_connection_url(ASYNC_READ_DATABASE_URL)
+    read_engine = create_async_engine(
+        clean_read_url,
+        echo=False,
+        future=True,
+        **engine_options(clean_read_url, DB_POOL_PROFILE),
+    )
+    read_session_factory = sessionmaker(
+        read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
+    replica_monitor = ReplicaMonitor(read_engine, REPLICA_MAX_LAG_SECONDS, REPLICA_LAG_CHECK_INTERVAL_SECONDS)
+
+# Per-request statement counts, DB time and slow query logging
+install_query_listeners(async_engine, read_engine)
+
 Base = declarative_base()
 
 async def get_db():
@@ -88,6 +112,31 @@ async def get_db():
         finally:
             await session.close()
 
+async def get_read_db():
+    """
+    Session for read-only endpoints. Uses the read replica when one is
+    configured and not lagging too far behind, otherwise the primary.
+    Nothing is committed.
+    """
+    factory = async_session_factory
+    if replica_monitor is not None and await replica_monitor.use_replica():
+        factory = read_session_factory
+
+    async with factory() as session:
+        try:
+            yield session
+        finally:
+            await session.rollback()
+            await session.close()
+
 
 def get_sync_engine():
+    global sync_engine
+    if sync_engine is None:
+        # Create sync engine with cleaned URL
+        sync_engine = create_engine(
+            clean_sync_url,
+            echo=False,
+            future=True,
+        )
     return sync_engine
\ No newline at end of file
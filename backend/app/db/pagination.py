@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+
+def encode_cursor(sort_value: datetime, row_id) -> str:
+    """
+    Encode the (sort column, id) pair of the last row on a page as an opaque cursor.
+    Sort columns are server-defaulted timestamps and never NULL, which keeps
+    the row-value comparison in keyset_paginate on the (sort, id) indexes.
+    """
+    payload = json.dumps([sort_value.isoformat(), row_id])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str):
+    """
+    Decode a cursor produced by encode_cursor back into a (sort value, id) pair
+    """
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(sort_value), row_id
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+def keyset_paginate(query, sort_column, id_column, cursor: str, limit: int):
+    """
+    Apply keyset pagination to a query, newest first.
+
+    An empty cursor starts from the first page. One extra row is fetched so the
+    caller can tell whether another page exists (see split_page).
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(sort_column, id_column) < tuple_(sort_value, row_id))
+
+    return query.order_by(sort_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def split_page(rows, limit: int, cursor_key):
+    """
+    Trim the extra row fetched by keyset_paginate and build the next cursor.
+    cursor_key maps the last row on the page to its (sort value, id) pair.
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(*cursor_key(rows[-1]))
@@ -0,0 +1,167 @@
+"""
+Connection pooling profiles for the async engine.
+
+    lambda    one warm connection per container, checked with pre-ping and
+              recycled well before RDS/Postgres idle timeouts drop it
+    server    a sized pool for long-running uvicorn workers
+    external  no pooling in the app (NullPool) for use behind PgBouncer/RDS
+              Proxy; asyncpg's prepared statement caches are disabled
+              because transaction pooling can't keep them per connection
+
+The profile comes from DB_POOL_PROFILE and defaults to lambda inside AWS
+Lambda and server elsewhere. Sizes can be overridden with DB_POOL_SIZE,
+DB_MAX_OVERFLOW, DB_POOL_TIMEOUT and DB_POOL_RECYCLE.
+"""
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from typing import Optional
+from uuid import uuid4
+import threading
+import time
+from app.core.config import (
+    DB_POOL_PROFILE,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+)
+
+POOL_PROFILES = {
+    "lambda": {
+        "pool_size": 1,
+        "max_overflow": 2,
+        "pool_timeout": 10,
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    },
+    "server": {
+        "pool_size": 10,
+        "max_overflow": 10,
+        "pool_timeout": 30,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    },
+    "external": {},
+}
+
+
+class PoolWaitStats:
+    """
+    Running totals of how long callers waited to get a connection from the pool
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.failures = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float, failed: bool = False):
+        with self._lock:
+            if failed:
+                self.failures += 1
+                return
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "failed_checkouts": self.failures,
+                "wait_ms_total": round(self.total_wait * 1000, 3),
+                "wait_ms_avg": round(self.total_wait * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.max_wait * 1000, 3),
+            }
+
+
+class TimedPoolMixin:
+    """
+    Times every connection checkout; SQLAlchemy has no event for the wait itself
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except Exception:
+            self.wait_stats.record(time.perf_counter() - started, failed=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - started)
+        return record
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(TimedPoolMixin, NullPool):
+    pass
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def engine_options(url: str, profile: Optional[str] = None) -> dict:
+    """
+    Keyword arguments for create_async_engine for the given URL and profile
+    """
+    profile = profile or DB_POOL_PROFILE
+    if profile not in POOL_PROFILES:
+        raise ValueError(f"Unknown DB_POOL_PROFILE {profile!r}, expected one of {sorted(POOL_PROFILES)}")
+
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        # In-memory SQLite needs its StaticPool; file databases keep the
+        # dialect default of opening a connection per checkout
+        if parsed.database in (None, "", ":memory:"):
+            return {}
+        return {"poolclass": TimedNullPool}
+
+    if profile == "external":
+        options = {"poolclass": TimedNullPool}
+        if parsed.get_driver_name() == "asyncpg":
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": _unique_statement_name,
+            }
+        return options
+
+    options = dict(POOL_PROFILES[profile])
+    overrides = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    options["poolclass"] = TimedAsyncAdaptedQueuePool
+    return options
+
+
+def pool_stats(engine, profile: Optional[str] = None) -> dict:
+    """
+    Current pool occupancy and cumulative checkout wait times for an engine
+    """
+    pool = engine.pool
+    stats = {
+        "profile": profile or DB_POOL_PROFILE,
+        "pool_class": type(pool).__name__,
+    }
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+    wait_stats = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        stats.update(wait_stats.as_dict())
+    return stats
@@ -0,0 +1,148 @@
+"""
+Counts the SQL statements and commits issued by the engines.
+
+Every statement is attributed to the request that ran it (a ContextVar set by
+the query stats middleware, see app/core/middleware.py) and to any collectors
+opened with track_queries():
+
+    with track_queries() as stats:
+        client.post("/requests/", json=...)
+    print(stats.statements, stats.commits)
+
+track_queries() collectors are module level rather than per task so
+statements run on TestClient's worker thread are still counted. Statements
+slower than SLOW_QUERY_THRESHOLD_MS are logged with their parameters redacted.
+"""
+from sqlalchemy import event
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+import logging
+import threading
+import time
+from app.core.config import SLOW_QUERY_THRESHOLD_MS
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """
+    Statements, commits and database time seen while a collector was active
+    """
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        self.total_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def record_statement(self, statement: str, elapsed: float):
+        self.statements += 1
+        self.total_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+    def as_dict(self) -> dict:
+        return {
+            "statements": self.statements,
+            "commits": self.commits,
+            "db_ms": round(self.total_time * 1000, 3),
+            "slowest_ms": round(self.slowest_time * 1000, 3),
+            "slowest_statement": self.slowest_statement,
+        }
+
+
+# Stats for the request being handled; SQLAlchemy's async greenlets share the task's context
+_request_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+_collectors: List[QueryStats] = []
+_collectors_lock = threading.Lock()
+_instrumented = set()
+
+
+def _active_collectors() -> List[QueryStats]:
+    with _collectors_lock:
+        collectors = list(_collectors)
+    request_stats = _request_stats.get()
+    if request_stats is not None:
+        collectors.append(request_stats)
+    return collectors
+
+
+def redact_parameters(parameters, executemany: bool = False) -> str:
+    """
+    Describe bound parameters by type only, so values never reach the logs
+    """
+    if executemany:
+        rows = list(parameters or [])
+        return f"<{len(rows)} rows redacted>"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: <{type(value).__name__}>" for key, value in parameters.items()) + "}"
+    return "(" + ", ".join(f"<{type(value).__name__}>" for value in (parameters or ())) + ")"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    elapsed = time.perf_counter() - started
+    for stats in _active_collectors():
+        stats.record_statement(statement, elapsed)
+
+    if elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            f"Slow query ({elapsed * 1000:.1f} ms): {' '.join(statement.split())} "
+            f"parameters={redact_parameters(parameters, executemany)}"
+        )
+
+
+def _on_commit(conn):
+    for stats in _active_collectors():
+        stats.commits += 1
+
+
+def install_query_listeners(*engines):
+    """
+    Attach the counting listeners to the given engines (async or sync); safe to call repeatedly
+    """
+    for engine in engines:
+        if engine is None:
+            continue
+        sync_engine = getattr(engine, "sync_engine", engine)
+        if id(sync_engine) in _instrumented:
+            continue
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(sync_engine, "commit", _on_commit)
+        _instrumented.add(id(sync_engine))
+
+
+@contextmanager
+def track_queries():
+    """
+    Collect statement and commit counts for everything run inside the block
+    """
+    stats = QueryStats()
+    with _collectors_lock:
+        _collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        with _collectors_lock:
+            _collectors.remove(stats)
+
+
+@contextmanager
+def request_query_stats():
+    """
+    Attribute statements run by the current task (and tasks it starts) to a fresh QueryStats
+    """
+    stats = QueryStats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
@@ -0,0 +1,74 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from typing import Optional
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind the primary; 0 when it has replayed everything
+# it received (an idle primary otherwise looks like growing lag), and 0 when
+# the server is not a standby at all
+POSTGRES_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaMonitor:
+    """
+    Decides whether reads may go to the replica.
+
+    Replication lag is measured at most once per check_interval and shared by
+    all requests; the replica is skipped while it is further behind than
+    max_lag or while the lag check itself fails (replica down).
+    """
+    def __init__(self, engine: AsyncEngine, max_lag: float, check_interval: float):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag: Optional[float] = None
+        self.healthy = False
+        self.checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def measure_lag(self) -> float:
+        if self.engine.dialect.name != "postgresql":
+            # Local stand-ins (e.g. a second SQLite file) have no replication
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return 0.0
+        async with self.engine.connect() as conn:
+            return float((await conn.execute(POSTGRES_LAG_QUERY)).scalar() or 0.0)
+
+    async def use_replica(self) -> bool:
+        if time.monotonic() - self.checked_at < self.check_interval:
+            return self.healthy
+
+        async with self._lock:
+            # Another request may have refreshed it while we waited
+            if time.monotonic() - self.checked_at < self.check_interval:
+                return self.healthy
+            try:
+                self.lag = await self.measure_lag()
+                self.healthy = self.lag <= self.max_lag
+                if not self.healthy:
+                    logger.warning(f"Read replica is {self.lag:.1f}s behind, reading from primary")
+            except Exception as e:
+                self.lag = None
+                self.healthy = False
+                logger.error(f"Read replica lag check failed, reading from primary: {str(e)}")
+            self.checked_at = time.monotonic()
+            return self.healthy
+
+    def status(self) -> dict:
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+            "checked_seconds_ago": round(time.monotonic() - self.checked_at, 1) if self.checked_at else None,
+        }
@@ -0,0 +1,12 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def upsert_insert(db: AsyncSession):
+    """
+    Return the dialect-specific insert() that supports on_conflict_do_update,
+    for the database the session is bound to
+    """
+    if db.bind.dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
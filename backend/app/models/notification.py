@@ -0,0 +1,32 @@
+from sqlalchemy import Column, String, DateTime, Integer, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+
+class OutboxMessage(Base):
+    """
+    An SMS in the persistent notification outbox (see DatabaseOutbox in
+    app/services/notifications.py). sent_at is set once it has gone out; a
+    message still unsent after NOTIFICATION_MAX_ATTEMPTS attempts has failed.
+    """
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True)
+    to_phone = Column(String, nullable=False)
+    body = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Only unsent messages are ever looked up, and there are few of them
+        Index(
+            "ix_notification_outbox_unsent_to_phone_next_attempt_at",
+            "to_phone",
+            "next_attempt_at",
+            postgresql_where=sent_at.is_(None),
+            sqlite_where=sent_at.is_(None),
+        ),
+    )
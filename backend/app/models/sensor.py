@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Boolean, ForeignKey, DateTime, Integer
+from sqlalchemy import Column, String, Float, Boolean, ForeignKey, DateTime, Integer, Index
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -11,13 +11,50 @@ class Sensor(Base):
     location = Column(String)
     sensor_status = Column(Boolean, default=False)
     company_id = Column(Integer, ForeignKey("company_balances.id"), nullable=True)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+
+    __table_args__ = (
+        # Full bins per company for route planning
+        Index("ix_sensors_company_id_sensor_status", "company_id", "sensor_status"),
+    )
 
 
 class SensorLog(Base):
     __tablename__ = "sensor_logs"
+    # Fetch the server-side timestamp with RETURNING on insert
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     sensor_id = Column(String, ForeignKey("sensors.sensor_id"))
     RFID = Column(String, nullable=True)
     sensor_status = Column(Boolean)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now()) 
\ No newline at end of file
+    timestamp = Column(DateTime(timezone=True), server_default=func.now()) 
+
+    __table_args__ = (
+        # Keyset pagination over a sensor's history
+        Index("ix_sensor_logs_sensor_id_timestamp_id", "sensor_id", "timestamp", "id"),
+        Index("ix_sensor_logs_sensor_id_sensor_status_timestamp", "sensor_id", "sensor_status", "timestamp"),
+        # Only the handful of logs for currently full bins are active
+        Index(
+            "ix_sensor_logs_active_sensor_id_timestamp",
+            "sensor_id",
+            "timestamp",
+            postgresql_where=(sensor_status == True),
+            sqlite_where=(sensor_status == True),
+        ),
+    )
+
+
+class SensorEventReceipt(Base):
+    """
+    Result of a batch event sent with an event_id, so a device retrying an
+    upload whose response it never saw is not applied (or paid) twice
+    """
+    __tablename__ = "sensor_event_receipts"
+
+    event_id = Column(String, primary_key=True)
+    sensor_id = Column(String)
+    status_code = Column(Integer)
+    detail = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,11 +1,13 @@
-from sqlalchemy import Column, String, Float, Boolean, ForeignKey, DateTime, Integer, Enum
-from sqlalchemy.sql import func
+from sqlalchemy import Column, String, Float, Boolean, ForeignKey, DateTime, Integer, Enum, Index
+from sqlalchemy.sql import func, expression
 from app.db.database import Base
 import enum
 
 
 class User(Base):
     __tablename__ = "users"
+    # Load server-side timestamps from INSERT/UPDATE ... RETURNING instead of a refresh
+    __mapper_args__ = {"eager_defaults": True}
 
     clerkId = Column(String, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
@@ -14,6 +16,12 @@ class User(Base):
     createdAt = Column(DateTime(timezone=True), server_default=func.now())
     role = Column(String)  # Either 'Customer' or 'Ragpicker'
 
+    # Keyset pagination over users and ragpickers
+    __table_args__ = (
+        Index("ix_users_createdAt_clerkId", "createdAt", "clerkId"),
+        Index("ix_users_role_createdAt_clerkId", "role", "createdAt", "clerkId"),
+    )
+
 
 class UserDetails(Base):
     __tablename__ = "user_details"
@@ -23,6 +31,13 @@ class UserDetails(Base):
     address = Column(String)
     bio = Column(String)
     profile_pic_url = Column(String)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    geohash = Column(String(12), nullable=True)  # Indexed for nearby range scans, see app/services/geo.py
+
+    __table_args__ = (
+        Index("ix_user_details_geohash", "geohash"),
+    )
 
 
 class CustomerDetails(Base):
@@ -37,8 +52,11 @@ class RagpickerDetails(Base):
 
     clerkId = Column(String, ForeignKey("users.clerkId"), primary_key=True)
     wallet_address = Column(String)
-    RFID = Column(String, nullable=True)
+    RFID = Column(String, nullable=True, index=True)  # Looked up on every RFID scan and payment
     average_rating = Column(Float, default=0.0)
+    # Running totals so a new review updates average_rating without scanning reviews
+    rating_sum = Column(Float, default=0.0, server_default="0")
+    rating_count = Column(Integer, default=0, server_default="0")
 
 
 class Balances(Base):
@@ -57,8 +75,23 @@ class CompanyBalances(Base):
     balance = Column(Float, default=0.0)
 
 
+class LedgerEntry(Base):
+    """Append-only record of every balance transfer"""
+    __tablename__ = "ledger_entries"
+
+    id = Column(Integer, primary_key=True, index=True)
+    from_clerkId = Column(String, ForeignKey("users.clerkId"), nullable=True)  # Set for user to user transfers
+    from_company_id = Column(Integer, ForeignKey("company_balances.id"), nullable=True)  # Set for company payouts
+    to_clerkId = Column(String, ForeignKey("users.clerkId"), index=True)
+    amount = Column(Float)
+    reason = Column(String)  # REQUEST_COMPLETED, BIN_EMPTIED
+    reference = Column(String, nullable=True)  # Request ID or sensor ID the transfer is for
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Reviews(Base):
     __tablename__ = "reviews"
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     customer_clerkId = Column(String, ForeignKey("users.clerkId"))
@@ -67,18 +100,48 @@ class Reviews(Base):
     review = Column(String)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_reviews_ragpicker_clerkId_created_at", "ragpicker_clerkId", "created_at"),
+    )
+
 
 class Requests(Base):
     __tablename__ = "requests"
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     customer_clerkId = Column(String, ForeignKey("users.clerkId"))
-    ragpicker_clerkId = Column(String, ForeignKey("users.clerkId"))
+    ragpicker_clerkId = Column(String, ForeignKey("users.clerkId"))  # NULL while waiting for dispatch
     status = Column(String)  # PENDING, ACCEPTED, REJECTED, COMPLETED
     smart_contract_address = Column(String, nullable=True)  # Added for blockchain integration
+    auto_dispatch = Column(Boolean, default=False, server_default=expression.false())  # Ragpicker chosen by app/services/dispatch.py
+    dispatch_attempts = Column(Integer, default=0, server_default="0")
+    next_dispatch_at = Column(DateTime(timezone=True), nullable=True)  # Set when a dispatch run found no ragpicker
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Keyset pagination over requests
+        Index("ix_requests_created_at_id", "created_at", "id"),
+        # Customer and ragpicker dashboards, optionally filtered by status
+        Index("ix_requests_customer_clerkId_status_created_at", "customer_clerkId", "status", "created_at"),
+        Index("ix_requests_ragpicker_clerkId_status_created_at", "ragpicker_clerkId", "status", "created_at"),
+    )
+
+
+class RequestRejection(Base):
+    """A ragpicker turning down a request, kept for dispatch scoring"""
+    __tablename__ = "request_rejections"
+
+    id = Column(Integer, primary_key=True, index=True)
+    request_id = Column(Integer, ForeignKey("requests.id"), index=True)
+    ragpicker_clerkId = Column(String, ForeignKey("users.clerkId"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_request_rejections_ragpicker_clerkId_created_at", "ragpicker_clerkId", "created_at"),
+    )
+
 
 class ApplicationStatus(enum.Enum):
     PENDING = "PENDING"
@@ -88,11 +151,12 @@ class ApplicationStatus(enum.Enum):
 
 class RagpickerApplication(Base):
     __tablename__ = "ragpicker_applications"
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
     clerk_id = Column(String, ForeignKey("users.clerkId"))
     document_url = Column(String)  # S3 URL for the uploaded PDF
     notes = Column(String)
-    status = Column(String, default="PENDING")
+    status = Column(String, default="PENDING", index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class RagpickerDetailsBase(BaseModel):
@@ -42,6 +42,18 @@ class RagpickerListResponse(BaseModel):
     class Config:
         from_attributes = True 
 
+
+class RagpickerNearbyResponse(RagpickerListResponse):
+    latitude: float
+    longitude: float
+    distance_km: float
+
+
+class RagpickerPage(BaseModel):
+    """Keyset-paginated page of ragpickers"""
+    items: List[RagpickerListResponse]
+    next_cursor: Optional[str] = None
+
 class RagpickerDetailedResponse(BaseModel):
     # Ragpicker details
     clerkId: str
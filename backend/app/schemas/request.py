@@ -1,11 +1,12 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
 class RequestBase(BaseModel):
     customer_clerkId: str
-    ragpicker_clerkId: str
+    # Leave out to have a ragpicker assigned automatically
+    ragpicker_clerkId: Optional[str] = None
 
 
 class RequestCreate(RequestBase):
@@ -24,6 +25,7 @@ class RequestResponse(RequestBase):
     id: int
     status: str
     smart_contract_address: Optional[str] = None
+    auto_dispatch: bool = False
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -37,4 +39,10 @@ class RequestResponse(RequestBase):
     ragpicker_wallet_address: Optional[str] = None
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+
+class RequestPage(BaseModel):
+    """Keyset-paginated page of requests"""
+    items: List[RequestResponse]
+    next_cursor: Optional[str] = None
@@ -1,12 +1,16 @@
 # schemas/sensor.py
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import List, Literal, Optional
 
 class SensorBase(BaseModel):
     sensor_id: str
     sensor_name: str
     location: str
     company_id: int | None = None
+    # Geocoded from location when not given
+    latitude: float | None = Field(None, ge=-90, le=90)
+    longitude: float | None = Field(None, ge=-180, le=180)
 
 class SensorCreate(SensorBase):
     pass
@@ -32,6 +36,11 @@ class SensorLogResponse(SensorLogBase):
     class Config:
         orm_mode = True
 
+class SensorLogPage(BaseModel):
+    """Keyset-paginated page of sensor logs"""
+    items: List[SensorLogResponse]
+    next_cursor: Optional[str] = None
+
 
 class SensorStatusUpdate(BaseModel):
     sensor_id: str
@@ -39,4 +48,44 @@ class SensorStatusUpdate(BaseModel):
 
 class RFIDUpdate(BaseModel):
     sensor_id: str
-    rfid: str
\ No newline at end of file
+    rfid: str
+
+class SensorEvent(BaseModel):
+    """A single bin event: a status change ("status") or an RFID scan ("rfid")"""
+    type: Literal["status", "rfid"]
+    sensor_id: str
+    status: bool | None = None
+    rfid: str | None = None
+    # Idempotency key: an event_id already applied gets its stored result back
+    event_id: str | None = Field(None, max_length=64)
+
+class SensorEventBatch(BaseModel):
+    events: list[SensorEvent]
+
+class SensorEventResult(BaseModel):
+    index: int
+    sensor_id: str
+    status_code: int
+    detail: str
+
+class SensorEventBatchResponse(BaseModel):
+    results: list[SensorEventResult]
+
+
+class RouteStop(BaseModel):
+    sensor_id: str
+    sensor_name: str
+    location: str
+    latitude: float
+    longitude: float
+    distance_from_previous_km: float
+
+class CollectionRoute(BaseModel):
+    """Ordered stops over a company's full bins"""
+    start_latitude: float
+    start_longitude: float
+    return_to_start: bool
+    stops: list[RouteStop]
+    total_distance_km: float
+    unlocated_sensor_ids: list[str]  # Full bins without coordinates, left off the route
+    deferred_sensor_ids: list[str]  # Full bins beyond ROUTE_MAX_STOPS, furthest from the start
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from datetime import datetime
 from enum import Enum
@@ -24,10 +24,19 @@ class UserResponse(UserBase):
         from_attributes = True
 
 
+class UserPage(BaseModel):
+    """Keyset-paginated page of users"""
+    items: List[UserResponse]
+    next_cursor: Optional[str] = None
+
+
 class UserDetailsBase(BaseModel):
     phone: Optional[str] = None
     address: Optional[str] = None
     bio: Optional[str] = None
+    # Geocoded from the address when not given
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
 
 
 class UserDetailsCreate(UserDetailsBase):
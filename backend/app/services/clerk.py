@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from typing import List, Optional, TYPE_CHECKING
+import asyncio
+import logging
+import time
+from app.core.config import (
+    CLERK_SECRET_KEY,
+    CLERK_TIMEOUT_SECONDS,
+    CLERK_USER_CACHE_TTL_SECONDS,
+    CLERK_USER_CACHE_MAX_SIZE,
+)
+from app.core.metrics import metrics
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+# Clerk might have changed their API structure, so every known user endpoint is tried
+USER_API_BASES = [
+    "https://api.clerk.dev/v1/users",     # New API with v1
+    "https://api.clerk.com/v1/users",     # Old domain with v1
+    "https://clerk.com/v1/users",         # Base domain with v1
+    "https://api.clerk.dev/users",        # New API without v1
+    "https://api.clerk.com/users",        # Old domain without v1
+    "https://clerk.com/users",            # Base domain without v1
+]
+
+
+class ClerkError(Exception):
+    """
+    Raised when no Clerk endpoint variant accepted a request
+    """
+    def __init__(self, message: str, responses: List[dict]):
+        super().__init__(message)
+        self.responses = responses
+
+
+class ClerkClient:
+    """
+    Long-lived Clerk API client.
+
+    Keeps one pooled keep-alive httpx client, remembers which user endpoint
+    variant works so later calls make a single request, probes the variants
+    concurrently while that is unknown, and caches verified users briefly.
+    """
+    def __init__(self, secret_key: Optional[str] = CLERK_SECRET_KEY, transport: Optional["httpx.AsyncBaseTransport"] = None):
+        self.secret_key = secret_key
+        self.transport = transport
+        self.working_base: Optional[str] = None
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._users = OrderedDict()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.secret_key) and self.secret_key != "REPLACE_WITH_YOUR_CLERK_SECRET_KEY"
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None or self._client.is_closed:
+            # httpx is imported here to keep it off the cold start path
+            import httpx
+            self._client = httpx.AsyncClient(
+                headers={
+                    "Authorization": f"Bearer {self.secret_key}",
+                    "Content-Type": "application/json"
+                },
+                timeout=httpx.Timeout(CLERK_TIMEOUT_SECONDS, connect=5.0),
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _send(self, method: str, base: str, clerk_id: str, payload: Optional[dict]):
+        url = f"{base}/{clerk_id}"
+        try:
+            with metrics.time_outbound("clerk", method):
+                response = await self.client.request(method, url, json=payload)
+        except Exception as e:
+            logger.warning(f"{method} {url} failed: {str(e)}")
+            return None, {"url": url, "error": str(e)}
+
+        body = response.text[:200] if response.text else "No response body"
+        logger.info(f"{method} {url}: Status {response.status_code}")
+        return response, {"url": url, "status": response.status_code, "body": body}
+
+    async def _probe(self, method: str, clerk_id: str, payload: Optional[dict], bases: List[str]):
+        """
+        Send the request to every base concurrently, return the first 200 response
+        and remember which base served it
+        """
+        responses = []
+        tasks = {
+            asyncio.ensure_future(self._send(method, base, clerk_id, payload)): base
+            for base in bases
+        }
+        try:
+            for next_done in asyncio.as_completed(list(tasks)):
+                response, summary = await next_done
+                responses.append(summary)
+                if response is not None and response.status_code == 200:
+                    self.working_base = summary["url"].rsplit("/", 1)[0]
+                    logger.info(f"Using Clerk endpoint {self.working_base}")
+                    return response, responses
+        finally:
+            for task in tasks:
+                task.cancel()
+        return None, responses
+
+    async def request(self, method: str, clerk_id: str, payload: Optional[dict] = None) -> "httpx.Response":
+        """
+        Send a request for a user, using the remembered endpoint if there is one
+        and falling back to probing the other variants. Raises ClerkError if none succeed.
+        """
+        clerk_id = clerk_id.strip()
+        responses = []
+
+        if self.working_base:
+            response, summary = await self._send(method, self.working_base, clerk_id, payload)
+            responses.append(summary)
+            if response is not None and response.status_code == 200:
+                return response
+            # A 404 from the known endpoint means the user is missing, not the endpoint
+            if response is not None and response.status_code != 404:
+                self.working_base = None
+            else:
+                raise ClerkError(f"Clerk {method} for {clerk_id} failed", responses)
+
+        bases = [base for base in USER_API_BASES if base != self.working_base]
+        response, probe_responses = await self._probe(method, clerk_id, payload, bases)
+        responses.extend(probe_responses)
+        if response is None:
+            raise ClerkError(f"Clerk {method} for {clerk_id} failed", responses)
+        return response
+
+    async def get_user(self, clerk_id: str) -> dict:
+        """
+        Return the Clerk user, served from a short-lived cache when recently verified
+        """
+        clerk_id = clerk_id.strip()
+        cached = self._users.get(clerk_id)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        response = await self.request("GET", clerk_id)
+        user = response.json()
+        self._cache_user(clerk_id, user)
+        return user
+
+    async def update_role(self, clerk_id: str, new_role: str) -> dict:
+        """
+        Set the user's public_metadata role
+        """
+        payload = {"public_metadata": {"role": new_role}}
+        response = await self.request("PATCH", clerk_id, payload)
+        user = response.json()
+        self._cache_user(clerk_id.strip(), user)
+        return user
+
+    def _cache_user(self, clerk_id: str, user: dict):
+        if CLERK_USER_CACHE_MAX_SIZE <= 0:
+            return
+        self._users[clerk_id] = (time.monotonic() + CLERK_USER_CACHE_TTL_SECONDS, user)
+        self._users.move_to_end(clerk_id)
+        while len(self._users) > CLERK_USER_CACHE_MAX_SIZE:
+            self._users.popitem(last=False)
+
+
+# Singleton instance
+clerk_client = ClerkClient()
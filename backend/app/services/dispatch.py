@@ -0,0 +1,404 @@
+"""
+Automatic assignment of requests created without a ragpicker.
+
+Each run takes a batch of unassigned PENDING requests (oldest first) and all
+located ragpickers with spare capacity, scores request/ragpicker pairs within
+DISPATCH_MAX_DISTANCE_KM and assigns greedily, cheapest pair first:
+
+    cost = distance_km * DISTANCE_WEIGHT
+         + open_requests * LOAD_WEIGHT
+         - average_rating * RATING_WEIGHT
+         + recent_rejections * REJECTION_WEIGHT
+
+A ragpicker's open (PENDING + ACCEPTED) requests are their load; it rises as
+the batch hands them work, up to DISPATCH_MAX_LOAD, and pairs scored at an
+older load are re-scored before use. Ragpickers who already turned a request
+down are never offered it again. A request with no ragpicker in reach waits
+half its age (DISPATCH_RETRY_MIN_SECONDS to DISPATCH_RETRY_MAX_SECONDS)
+before it is loaded again, so old unassignable requests cannot fill every
+batch and starve newer ones. An optimal (Hungarian) assignment needs the
+full cost matrix and O(n^3) time, which thousands of open requests make
+impractical inside a Lambda invocation; the greedy pass only scores the
+DISPATCH_CANDIDATES_PER_REQUEST nearest ragpickers of each request, found
+through a grid index.
+
+Runs on the Lambda schedule (see main.handler) or locally with:
+
+    python -m app.services.dispatch [--loop SECONDS]
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from math import ceil, cos, floor, radians
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+import argparse
+import asyncio
+import heapq
+import logging
+import time
+from sqlalchemy import func, or_, update
+from sqlalchemy.future import select
+from app.core.config import (
+    DISPATCH_BATCH_SIZE,
+    DISPATCH_MAX_DISTANCE_KM,
+    DISPATCH_MAX_LOAD,
+    DISPATCH_CANDIDATES_PER_REQUEST,
+    DISPATCH_REJECTION_WINDOW_DAYS,
+    DISPATCH_RETRY_MIN_SECONDS,
+    DISPATCH_RETRY_MAX_SECONDS,
+)
+from app.core.metrics import metrics
+from app.services.geo import KM_PER_DEGREE_LAT, haversine_km
+
+logger = logging.getLogger(__name__)
+
+# Cost of one km of travel against one open request, one rating star and one recent rejection
+DISTANCE_WEIGHT = 1.0
+LOAD_WEIGHT = 2.0
+RATING_WEIGHT = 1.5
+REJECTION_WEIGHT = 1.0
+
+# Side of the cells ragpickers are bucketed into for the nearest-candidate search
+GRID_CELL_KM = 1.0
+
+DISPATCH_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Candidate:
+    __slots__ = ("clerk_id", "latitude", "longitude", "load", "rating", "rejections")
+
+    def __init__(self, clerk_id: str, latitude: float, longitude: float, load: int = 0, rating: float = 0.0, rejections: int = 0):
+        self.clerk_id = clerk_id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.load = load
+        self.rating = rating
+        self.rejections = rejections
+
+
+class OpenRequest:
+    __slots__ = ("id", "latitude", "longitude", "excluded", "attempts", "customer_name", "customer_address", "created_at")
+
+    def __init__(self, id: int, latitude: float, longitude: float, excluded: FrozenSet[str] = frozenset(),
+                 attempts: int = 0, customer_name: str = "Customer", customer_address: Optional[str] = None,
+                 created_at: Optional[datetime] = None):
+        self.id = id
+        self.latitude = latitude
+        self.longitude = longitude
+        self.excluded = excluded
+        self.attempts = attempts
+        self.customer_name = customer_name
+        self.customer_address = customer_address
+        self.created_at = created_at
+
+
+def retry_at(request: OpenRequest, now: datetime) -> datetime:
+    """
+    When to try a request that found no ragpicker again: after half its age,
+    clamped to the retry bounds. now must be timezone-aware.
+    """
+    created_at = request.created_at or now
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)  # SQLite hands back naive UTC
+    delay = (now - created_at).total_seconds() / 2
+    return now + timedelta(seconds=min(DISPATCH_RETRY_MAX_SECONDS, max(DISPATCH_RETRY_MIN_SECONDS, delay)))
+
+
+def pair_cost(distance_km: float, candidate: Candidate) -> float:
+    return (
+        distance_km * DISTANCE_WEIGHT
+        + candidate.load * LOAD_WEIGHT
+        - candidate.rating * RATING_WEIGHT
+        + candidate.rejections * REJECTION_WEIGHT
+    )
+
+
+class CandidateGrid:
+    """
+    Buckets candidates into cells about GRID_CELL_KM square (at their mean
+    latitude) so each request measures only the ragpickers in the rings of
+    cells around it instead of every ragpicker in the city
+    """
+    def __init__(self, candidates: List[Candidate], cell_km: float = GRID_CELL_KM):
+        self.candidates = candidates
+        self.cell_km = cell_km
+        self.lat_step = cell_km / KM_PER_DEGREE_LAT
+        mean_latitude = sum(c.latitude for c in candidates) / len(candidates) if candidates else 0.0
+        self.lng_step = self.lat_step / max(cos(radians(mean_latitude)), 0.01)
+        self.cells = defaultdict(list)
+        for index, candidate in enumerate(candidates):
+            self.cells[self._cell(candidate.latitude, candidate.longitude)].append(index)
+
+    def _cell(self, latitude: float, longitude: float):
+        return floor(latitude / self.lat_step), floor(longitude / self.lng_step)
+
+    def _ring(self, row: int, col: int, radius: int) -> Iterator[int]:
+        if radius == 0:
+            yield from self.cells.get((row, col), ())
+            return
+        for c in range(col - radius, col + radius + 1):
+            yield from self.cells.get((row - radius, c), ())
+            yield from self.cells.get((row + radius, c), ())
+        for r in range(row - radius + 1, row + radius):
+            yield from self.cells.get((r, col - radius), ())
+            yield from self.cells.get((r, col + radius), ())
+
+    def nearest(self, request: OpenRequest, count: int, max_distance_km: float, max_load: int) -> List[Tuple[float, int]]:
+        """
+        (distance, candidate index) of up to `count` of the nearest candidates
+        with spare capacity that have not declined the request
+        """
+        row, col = self._cell(request.latitude, request.longitude)
+        max_rings = ceil(max_distance_km / self.cell_km) + 1
+        found = []
+        for radius in range(max_rings + 1):
+            for index in self._ring(row, col, radius):
+                candidate = self.candidates[index]
+                if candidate.load >= max_load or candidate.clerk_id in request.excluded:
+                    continue
+                distance = haversine_km(request.latitude, request.longitude, candidate.latitude, candidate.longitude)
+                if distance <= max_distance_km:
+                    found.append((distance, index))
+            # Everything within `radius` cells has been seen once the ring is done
+            reached_km = radius * self.cell_km
+            if len(found) >= count and sum(1 for distance, _ in found if distance <= reached_km) >= count:
+                break
+        return heapq.nsmallest(count, found)
+
+
+def _greedy_pass(requests, candidates, grid, assignments, max_distance_km, max_load, candidates_per_request) -> int:
+    heap = []
+    for request_index, request in enumerate(requests):
+        if request.id in assignments:
+            continue
+        for distance, candidate_index in grid.nearest(request, candidates_per_request, max_distance_km, max_load):
+            candidate = candidates[candidate_index]
+            heap.append((pair_cost(distance, candidate), request_index, candidate_index, candidate.load, distance))
+    heapq.heapify(heap)
+
+    assigned = 0
+    while heap:
+        cost, request_index, candidate_index, scored_load, distance = heapq.heappop(heap)
+        request = requests[request_index]
+        if request.id in assignments:
+            continue
+        candidate = candidates[candidate_index]
+        if candidate.load >= max_load:
+            continue
+        if candidate.load != scored_load:
+            # Cost only grows with load, so retrying at the new cost keeps the order greedy
+            heapq.heappush(heap, (pair_cost(distance, candidate), request_index, candidate_index, candidate.load, distance))
+            continue
+        assignments[request.id] = candidate.clerk_id
+        candidate.load += 1
+        assigned += 1
+    return assigned
+
+
+def assign(
+    requests: List[OpenRequest],
+    candidates: List[Candidate],
+    max_distance_km: float = DISPATCH_MAX_DISTANCE_KM,
+    max_load: int = DISPATCH_MAX_LOAD,
+    candidates_per_request: int = DISPATCH_CANDIDATES_PER_REQUEST,
+) -> Dict[int, str]:
+    """
+    Greedy matching of requests to candidates. Returns {request id: ragpicker clerk ID}
+    and updates each candidate's load with the work it was given.
+
+    Requests whose nearby candidates all filled up during a pass get a fresh
+    set of candidates in the next pass, until a pass assigns nothing.
+    """
+    grid = CandidateGrid(candidates)
+    assignments = {}
+    while len(assignments) < len(requests):
+        if not _greedy_pass(requests, candidates, grid, assignments, max_distance_km, max_load, candidates_per_request):
+            break
+    return assignments
+
+
+async def load_open_requests(db, batch_size: int = DISPATCH_BATCH_SIZE, now: Optional[datetime] = None) -> List[OpenRequest]:
+    """
+    Oldest unassigned PENDING requests whose customer has a located address,
+    skipping those still waiting out a retry delay. On Postgres the rows stay
+    locked until commit and concurrent runs skip them.
+    """
+    from app.models.user import User, UserDetails, Requests, RequestRejection
+
+    now = now or datetime.now(timezone.utc)
+    query = (
+        select(
+            Requests.id,
+            Requests.dispatch_attempts,
+            Requests.created_at,
+            UserDetails.latitude,
+            UserDetails.longitude,
+            UserDetails.address,
+            User.firstName,
+            User.lastName,
+        )
+        .join(UserDetails, UserDetails.clerkId == Requests.customer_clerkId)
+        .join(User, User.clerkId == Requests.customer_clerkId)
+        .where(
+            Requests.ragpicker_clerkId.is_(None),
+            Requests.status == "PENDING",
+            UserDetails.latitude.is_not(None),
+            or_(Requests.next_dispatch_at.is_(None), Requests.next_dispatch_at <= now),
+        )
+        .order_by(Requests.created_at, Requests.id)
+        .limit(batch_size)
+        .with_for_update(of=Requests, skip_locked=True)
+    )
+    rows = (await db.execute(query)).all()
+    if not rows:
+        return []
+
+    # Ragpickers who already declined each request
+    excluded = defaultdict(set)
+    result = await db.execute(
+        select(RequestRejection.request_id, RequestRejection.ragpicker_clerkId)
+        .where(RequestRejection.request_id.in_([row.id for row in rows]))
+    )
+    for request_id, ragpicker_clerk_id in result.all():
+        excluded[request_id].add(ragpicker_clerk_id)
+
+    return [
+        OpenRequest(
+            id=row.id,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            excluded=frozenset(excluded.get(row.id, ())),
+            attempts=row.dispatch_attempts or 0,
+            customer_name=f"{row.firstName} {row.lastName}",
+            customer_address=row.address,
+            created_at=row.created_at,
+        )
+        for row in rows
+    ]
+
+
+async def load_candidates(db, max_load: int = DISPATCH_MAX_LOAD) -> List[Candidate]:
+    """
+    Located ragpickers with their rating, open requests and recent rejections,
+    skipping those already at max_load
+    """
+    from app.models.user import User, UserDetails, RagpickerDetails, Requests, RequestRejection
+
+    open_requests = (
+        select(Requests.ragpicker_clerkId, func.count().label("load"))
+        .where(Requests.ragpicker_clerkId.is_not(None), Requests.status.in_(("PENDING", "ACCEPTED")))
+        .group_by(Requests.ragpicker_clerkId)
+        .subquery()
+    )
+    since = datetime.now() - timedelta(days=DISPATCH_REJECTION_WINDOW_DAYS)
+    rejections = (
+        select(RequestRejection.ragpicker_clerkId, func.count().label("rejections"))
+        .where(RequestRejection.created_at >= since)
+        .group_by(RequestRejection.ragpicker_clerkId)
+        .subquery()
+    )
+    load = func.coalesce(open_requests.c.load, 0)
+    query = (
+        select(
+            User.clerkId,
+            UserDetails.latitude,
+            UserDetails.longitude,
+            RagpickerDetails.average_rating,
+            load.label("load"),
+            func.coalesce(rejections.c.rejections, 0).label("rejections"),
+        )
+        .join(UserDetails, UserDetails.clerkId == User.clerkId)
+        .outerjoin(RagpickerDetails, RagpickerDetails.clerkId == User.clerkId)
+        .outerjoin(open_requests, open_requests.c.ragpicker_clerkId == User.clerkId)
+        .outerjoin(rejections, rejections.c.ragpicker_clerkId == User.clerkId)
+        .where(User.role == "RAGPICKER", UserDetails.latitude.is_not(None), load < max_load)
+    )
+    return [
+        Candidate(
+            clerk_id=row.clerkId,
+            latitude=row.latitude,
+            longitude=row.longitude,
+            load=row.load,
+            rating=row.average_rating or 0.0,
+            rejections=row.rejections,
+        )
+        for row in (await db.execute(query)).all()
+    ]
+
+
+async def dispatch_pending(db, batch_size: int = DISPATCH_BATCH_SIZE):
+    """
+    Assign one batch of open requests. The caller commits.
+    Returns (assignments, open requests considered).
+    """
+    from app.models.user import Requests
+
+    now = datetime.now(timezone.utc)
+    requests = await load_open_requests(db, batch_size, now)
+    if not requests:
+        return {}, []
+    candidates = await load_candidates(db)
+    assignments = assign(requests, candidates)
+
+    # Assigned requests get their ragpicker; the rest back off so the next batch reaches newer requests
+    await db.execute(update(Requests), [
+        {"id": request.id, "ragpicker_clerkId": assignments[request.id],
+         "dispatch_attempts": request.attempts + 1, "next_dispatch_at": None, "updated_at": now}
+        if request.id in assignments else
+        {"id": request.id, "next_dispatch_at": retry_at(request, now)}
+        for request in requests
+    ])
+    return assignments, requests
+
+
+async def run_dispatch(batch_size: int = DISPATCH_BATCH_SIZE) -> int:
+    """
+    Assign one batch in its own transaction and notify the chosen ragpickers.
+    Returns the number of requests assigned.
+    """
+    from app.db.database import async_session_factory
+    from app.services.twilio_service import twilio_service
+
+    started = time.perf_counter()
+    async with async_session_factory() as db:
+        assignments, requests = await dispatch_pending(db, batch_size)
+        await db.commit()
+    elapsed = time.perf_counter() - started
+
+    metrics.inc("dispatch_assigned_total", len(assignments))
+    metrics.inc("dispatch_unassigned_total", len(requests) - len(assignments))
+    metrics.observe("dispatch_run_seconds", elapsed, DISPATCH_LATENCY_BUCKETS)
+    if requests:
+        logger.info(f"Dispatch assigned {len(assignments)} of {len(requests)} open requests in {elapsed * 1000:.0f}ms")
+
+    for request in requests:
+        if request.id not in assignments:
+            continue
+        try:
+            await twilio_service.send_notification(
+                notification_type="new_request",
+                customer_name=request.customer_name,
+                customer_address=request.customer_address or "No address provided",
+                request_id=str(request.id)
+            )
+        except Exception as e:
+            logger.error(f"Failed to send dispatch notification for request {request.id}: {str(e)}")
+    return len(assignments)
+
+
+async def _loop(interval: Optional[float], batch_size: int):
+    while True:
+        assigned = await run_dispatch(batch_size)
+        print(f"Assigned {assigned} requests")
+        if interval is None:
+            return
+        # Keep draining full batches, otherwise wait for the next tick
+        if assigned < batch_size:
+            await asyncio.sleep(interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assign open requests to ragpickers")
+    parser.add_argument("--batch-size", type=int, default=DISPATCH_BATCH_SIZE)
+    parser.add_argument("--loop", type=float, metavar="SECONDS", help="Keep dispatching every SECONDS")
+    args = parser.parse_args()
+    asyncio.run(_loop(args.loop, args.batch_size))
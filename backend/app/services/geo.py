@@ -0,0 +1,95 @@
+"""
+Geohash and distance helpers for nearby searches.
+
+User coordinates are stored with a geohash column under a plain B-tree index.
+A radius search covers its bounding box with a handful of geohash cells and
+turns each cell into a range scan (geohash >= cell AND geohash < cell + "~"),
+which works the same on Postgres and SQLite; exact distances are then checked
+in Python on the few candidates the ranges return.
+"""
+from math import asin, ceil, cos, radians, sin, sqrt
+from typing import List, Tuple
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # ~5m cells
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+# Most cells a search may cover before falling back to coarser cells
+MAX_COVER_CELLS = 16
+
+
+def encode_geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(latitude, longitude) span in degrees of a geohash cell"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    dlat = radians(lat2 - lat1)
+    dlng = radians(lng2 - lng1)
+    a = sin(dlat / 2) ** 2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * asin(min(1.0, sqrt(a)))
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float):
+    """(min_lat, max_lat, min_lng, max_lng) enclosing a circle, clamped to valid coordinates"""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    # Longitude degrees shrink towards the poles; near them just take everything
+    lat_cos = cos(radians(min(abs(latitude) + dlat, 89.9)))
+    dlng = min(180.0, radius_km / (KM_PER_DEGREE_LAT * lat_cos))
+    return (
+        max(-90.0, latitude - dlat), min(90.0, latitude + dlat),
+        max(-180.0, longitude - dlng), min(180.0, longitude + dlng),
+    )
+
+
+def covering_cells(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    """
+    Geohash prefixes whose cells together cover the search circle's bounding box,
+    at the finest precision that needs no more than MAX_COVER_CELLS cells
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_step, lng_step = cell_size(precision)
+        rows = ceil((max_lat - min_lat) / lat_step) + 1
+        cols = ceil((max_lng - min_lng) / lng_step) + 1
+        if rows * cols <= MAX_COVER_CELLS:
+            break
+    else:
+        return [""]  # Covers the whole world: one unbounded range
+
+    cells = set()
+    for row in range(rows + 1):
+        lat = min(max_lat, min_lat + row * lat_step)
+        for col in range(cols + 1):
+            lng = min(max_lng, min_lng + col * lng_step)
+            cells.add(encode_geohash(lat, lng, precision))
+    return sorted(cells)
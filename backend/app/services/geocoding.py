@@ -0,0 +1,188 @@
+"""
+Address geocoding for user details.
+
+Providers (GEOCODER_PROVIDER):
+
+    offline    deterministic stand-in: hashes the address to a point within
+               GEOCODER_OFFLINE_RADIUS_KM of GEOCODER_OFFLINE_CENTER; no network
+    nominatim  OpenStreetMap Nominatim search API (GEOCODER_URL)
+
+Coordinates for users saved before geocoding existed can be filled in with:
+
+    python -m app.services.geocoding [--limit N]
+"""
+from math import cos, pi, radians, sin, sqrt
+from typing import Optional, Tuple, TYPE_CHECKING
+import argparse
+import asyncio
+import hashlib
+import logging
+from app.core.config import (
+    ENVIRONMENT,
+    GEOCODER_PROVIDER,
+    GEOCODER_URL,
+    GEOCODER_USER_AGENT,
+    GEOCODER_TIMEOUT_SECONDS,
+    GEOCODER_OFFLINE_CENTER,
+    GEOCODER_OFFLINE_RADIUS_KM,
+)
+from app.core.metrics import metrics
+from app.services.geo import KM_PER_DEGREE_LAT, encode_geohash
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+Coordinates = Tuple[float, float]
+
+
+class OfflineGeocoder:
+    """
+    Maps each address to a stable pseudo-random point around a center, so
+    nearby search can be exercised in development and tests without a provider
+    """
+    def __init__(self, center: Coordinates = GEOCODER_OFFLINE_CENTER, radius_km: float = GEOCODER_OFFLINE_RADIUS_KM):
+        self.center = center
+        self.radius_km = radius_km
+
+    async def geocode(self, address: str) -> Optional[Coordinates]:
+        normalized = " ".join(address.lower().split())
+        if not normalized:
+            return None
+        digest = hashlib.sha256(normalized.encode("utf-8")).digest()
+        # Uniform over the disc: sqrt on the radius, any angle
+        distance = self.radius_km * sqrt(int.from_bytes(digest[:4], "big") / 0xFFFFFFFF)
+        angle = 2 * pi * int.from_bytes(digest[4:8], "big") / 0xFFFFFFFF
+        lat0, lng0 = self.center
+        latitude = lat0 + distance * cos(angle) / KM_PER_DEGREE_LAT
+        longitude = lng0 + distance * sin(angle) / (KM_PER_DEGREE_LAT * cos(radians(lat0)))
+        return round(latitude, 6), round(longitude, 6)
+
+    async def aclose(self):
+        pass
+
+
+class NominatimGeocoder:
+    """
+    Geocodes through a Nominatim-compatible search endpoint with a pooled client
+    """
+    def __init__(self, url: str = GEOCODER_URL, user_agent: str = GEOCODER_USER_AGENT, transport=None):
+        self.url = url
+        self.user_agent = user_agent
+        self.transport = transport
+        self._client: Optional["httpx.AsyncClient"] = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None or self._client.is_closed:
+            import httpx
+            self._client = httpx.AsyncClient(
+                headers={"User-Agent": self.user_agent},
+                timeout=httpx.Timeout(GEOCODER_TIMEOUT_SECONDS, connect=3.0),
+                transport=self.transport,
+            )
+        return self._client
+
+    async def geocode(self, address: str) -> Optional[Coordinates]:
+        if not address or not address.strip():
+            return None
+        with metrics.time_outbound("geocoder", "search"):
+            response = await self.client.get(self.url, params={"q": address, "format": "json", "limit": 1})
+        response.raise_for_status()
+        results = response.json()
+        if not results:
+            return None
+        return float(results[0]["lat"]), float(results[0]["lon"])
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_geocoder(name: str = GEOCODER_PROVIDER):
+    if name == "nominatim":
+        return NominatimGeocoder()
+    if name == "offline":
+        # Invented coordinates would silently skew nearby search, dispatch and routes
+        if ENVIRONMENT == "production":
+            raise ValueError("GEOCODER_PROVIDER 'offline' is a development stand-in and cannot be used in production")
+        return OfflineGeocoder()
+    raise ValueError(f"Unknown GEOCODER_PROVIDER {name!r}")
+
+
+# Singleton instance
+geocoder = create_geocoder()
+
+
+async def geocode_address(address: Optional[str], label: str = "") -> Optional[Coordinates]:
+    """
+    Geocode an address, logging and returning None on failure so saves never fail on it
+    """
+    if not address:
+        return None
+    try:
+        return await geocoder.geocode(address)
+    except Exception as e:
+        logger.warning(f"Geocoding failed for {label or address}: {str(e)}")
+        return None
+
+
+async def locate_user_details(user_details, latitude: Optional[float] = None, longitude: Optional[float] = None):
+    """
+    Set coordinates and geohash on a UserDetails row: explicit coordinates win,
+    otherwise the address is geocoded. A failed lookup leaves the row unlocated
+    rather than failing the save.
+    """
+    if latitude is None or longitude is None:
+        coordinates = await geocode_address(user_details.address, user_details.clerkId)
+        latitude, longitude = coordinates or (None, None)
+
+    user_details.latitude = latitude
+    user_details.longitude = longitude
+    user_details.geohash = encode_geohash(latitude, longitude) if latitude is not None else None
+
+
+async def update_location(user_details, previous_address: Optional[str], latitude: Optional[float] = None, longitude: Optional[float] = None):
+    """
+    Re-locate a UserDetails row after an edit, only when coordinates were given,
+    the address changed, or it has never been located
+    """
+    if latitude is None and longitude is None and user_details.address == previous_address \
+            and user_details.latitude is not None:
+        return
+    await locate_user_details(user_details, latitude, longitude)
+
+
+async def geocode_missing(db, limit: Optional[int] = None) -> int:
+    """
+    Geocode user details that have an address but no coordinates. Returns the number located.
+    """
+    from sqlalchemy import select
+    from app.models.user import UserDetails
+
+    query = select(UserDetails).where(UserDetails.latitude.is_(None), UserDetails.address.is_not(None))
+    if limit:
+        query = query.limit(limit)
+    rows = (await db.execute(query)).scalars().all()
+    for user_details in rows:
+        await locate_user_details(user_details)
+    return sum(1 for user_details in rows if user_details.latitude is not None)
+
+
+async def _backfill(limit: Optional[int]):
+    from app.db.database import async_session_factory
+
+    async with async_session_factory() as db:
+        located = await geocode_missing(db, limit)
+        await db.commit()
+    await geocoder.aclose()
+    print(f"Geocoded {located} user addresses")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Geocode user addresses that have no coordinates yet")
+    parser.add_argument("--limit", type=int, help="Only geocode this many rows")
+    args = parser.parse_args()
+    asyncio.run(_backfill(args.limit))
@@ -0,0 +1,416 @@
+"""
+Notification outbox.
+
+Handlers enqueue SMS notifications and return immediately; a dispatcher thread
+hands them to a small worker pool that talks to the transport (Twilio in
+production). Messages for the same recipient that arrive within a short window
+are coalesced into one SMS, at most one send per recipient is in flight at a
+time so ordering is kept, and failed sends are retried with exponential backoff.
+
+On AWS Lambda the container is frozen as soon as the response is returned, so
+background threads cannot send and sending before returning would put Twilio
+back on the response path. DatabaseOutbox instead writes the invocation's
+messages to the notification_outbox table and the scheduled invocation sends
+them, with the same coalescing, per-recipient ordering and retries.
+"""
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import asyncio
+import logging
+import random
+import threading
+import time
+from sqlalchemy import insert, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.future import select
+from app.core.config import (
+    NOTIFICATION_WORKERS,
+    NOTIFICATION_MAX_ATTEMPTS,
+    NOTIFICATION_RETRY_BACKOFF_SECONDS,
+    NOTIFICATION_COALESCE_SECONDS,
+    NOTIFICATION_DRAIN_BATCH_SIZE,
+    NOTIFICATION_LEASE_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Twilio rejects bodies longer than this
+MAX_BODY_LENGTH = 1600
+
+
+class Notification:
+    """
+    One pending SMS, possibly made of several coalesced messages
+    """
+    __slots__ = ("to", "messages", "attempts", "ready_at", "created_at")
+
+    def __init__(self, to: str, message: str, ready_at: float):
+        self.to = to
+        self.messages = [message]
+        self.attempts = 0
+        self.ready_at = ready_at
+        self.created_at = time.monotonic()
+
+    @property
+    def body(self) -> str:
+        return "\n".join(self.messages)
+
+    def can_absorb(self, message: str) -> bool:
+        return len(self.body) + 1 + len(message) <= MAX_BODY_LENGTH
+
+
+class ConsoleTransport:
+    """
+    Prints messages instead of sending them (development and testing)
+    """
+    def send(self, to: str, body: str) -> str:
+        print(f"SMS: {body}")
+        return "console"
+
+
+class FakeTransport:
+    """
+    Records messages in memory, with optional simulated latency and failures,
+    so dispatcher throughput can be benchmarked offline
+    """
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def send(self, to: str, body: str) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("Simulated transport failure")
+        with self._lock:
+            self.sent.append((to, body))
+            return f"fake-{len(self.sent)}"
+
+
+class NotificationOutbox:
+    """
+    In-process outbox drained by a dispatcher thread and a bounded worker pool
+    """
+    def __init__(
+        self,
+        transport,
+        workers: int = NOTIFICATION_WORKERS,
+        max_attempts: int = NOTIFICATION_MAX_ATTEMPTS,
+        backoff: float = NOTIFICATION_RETRY_BACKOFF_SECONDS,
+        coalesce_window: float = NOTIFICATION_COALESCE_SECONDS
+    ):
+        self.transport = transport
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.coalesce_window = coalesce_window
+
+        self._condition = threading.Condition()
+        self._pending = OrderedDict()  # recipient -> deque of Notification
+        self._in_flight = set()
+        self._flushing = 0
+        self._closed = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._dispatcher: Optional[threading.Thread] = None
+
+        self.stats = {"enqueued": 0, "coalesced": 0, "sent": 0, "retried": 0, "failed": 0}
+
+    def enqueue(self, to: str, message: str) -> None:
+        """
+        Queue a message for a recipient without blocking on the transport
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Notification outbox is closed")
+            self._start()
+            self.stats["enqueued"] += 1
+
+            queue = self._pending.setdefault(to, deque())
+            last = queue[-1] if queue else None
+            if last is not None and last.attempts == 0 and last.can_absorb(message):
+                last.messages.append(message)
+                self.stats["coalesced"] += 1
+            else:
+                queue.append(Notification(to, message, time.monotonic() + self.coalesce_window))
+            self._condition.notify_all()
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return sum(len(queue) for queue in self._pending.values()) + len(self._in_flight)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Send everything queued now, skipping the coalescing window, and wait until
+        the outbox is empty. Returns False if the timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                while self._pending or self._in_flight:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+                return True
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Flush and stop the dispatcher and workers
+        """
+        flushed = self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._dispatcher is not None:
+            self._dispatcher.join(timeout)
+        if self._executor is not None:
+            self._executor.shutdown(wait=flushed)
+        return flushed
+
+    def _start(self):
+        if self._dispatcher is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="notify")
+            self._dispatcher = threading.Thread(target=self._dispatch_loop, name="notify-dispatcher", daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch_loop(self):
+        with self._condition:
+            while not self._closed:
+                now = time.monotonic()
+                next_ready = None
+                for to in list(self._pending):
+                    if len(self._in_flight) >= self.workers:
+                        break
+                    if to in self._in_flight:
+                        continue
+                    notification = self._pending[to][0]
+                    ready_at = notification.ready_at
+                    # Flushing skips the coalescing window but not retry backoff
+                    if self._flushing and notification.attempts == 0:
+                        ready_at = now
+                    if ready_at > now:
+                        next_ready = ready_at if next_ready is None else min(next_ready, ready_at)
+                        continue
+
+                    self._pending[to].popleft()
+                    if not self._pending[to]:
+                        del self._pending[to]
+                    self._in_flight.add(to)
+                    self._executor.submit(self._deliver, notification)
+
+                timeout = None if next_ready is None else max(0.0, next_ready - now)
+                self._condition.wait(timeout)
+
+    def _deliver(self, notification: Notification):
+        notification.attempts += 1
+        error = None
+        try:
+            sid = self.transport.send(notification.to, notification.body)
+            logger.info(f"SMS sent to {notification.to}: {sid}")
+        except Exception as e:
+            error = e
+
+        with self._condition:
+            self._in_flight.discard(notification.to)
+            if error is None:
+                self.stats["sent"] += 1
+            elif notification.attempts < self.max_attempts:
+                delay = self.backoff * (2 ** (notification.attempts - 1))
+                logger.warning(f"Failed to send SMS to {notification.to} (attempt {notification.attempts}), retrying in {delay:.1f}s: {str(error)}")
+                notification.ready_at = time.monotonic() + delay
+                # Retry ahead of anything queued later for the same recipient
+                self._pending.setdefault(notification.to, deque()).appendleft(notification)
+                self.stats["retried"] += 1
+            else:
+                logger.error(f"Failed to send SMS to {notification.to} after {notification.attempts} attempts: {str(error)}")
+                self.stats["failed"] += 1
+            self._condition.notify_all()
+
+
+class DatabaseOutbox:
+    """
+    Outbox persisted in the notification_outbox table. enqueue() only buffers;
+    save() writes the buffer in one INSERT at the end of an invocation, and
+    drain() sends the messages that are due.
+    """
+    def __init__(
+        self,
+        transport,
+        session_factory=None,
+        workers: int = NOTIFICATION_WORKERS,
+        max_attempts: int = NOTIFICATION_MAX_ATTEMPTS,
+        backoff: float = NOTIFICATION_RETRY_BACKOFF_SECONDS,
+        batch_size: int = NOTIFICATION_DRAIN_BATCH_SIZE,
+        lease: float = NOTIFICATION_LEASE_SECONDS
+    ):
+        self.transport = transport
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.batch_size = batch_size
+        self.lease = lease
+
+        self._lock = threading.Lock()
+        self._buffer = []  # (recipient, message) not saved yet
+
+        self.stats = {"enqueued": 0, "coalesced": 0, "sent": 0, "retried": 0, "failed": 0}
+
+    def _sessions(self):
+        if self.session_factory is None:
+            from app.db.database import async_session_factory
+            self.session_factory = async_session_factory
+        return self.session_factory()
+
+    def enqueue(self, to: str, message: str) -> None:
+        with self._lock:
+            self._buffer.append((to, message))
+            self.stats["enqueued"] += 1
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    async def save(self) -> int:
+        """
+        Write buffered messages to the database; returns how many. On failure
+        they stay buffered for the next save.
+        """
+        from app.models.notification import OutboxMessage
+
+        with self._lock:
+            buffered, self._buffer = self._buffer, []
+        if not buffered:
+            return 0
+        now = datetime.now(timezone.utc)
+        try:
+            async with self._sessions() as db:
+                await db.execute(insert(OutboxMessage), [
+                    {"to_phone": to, "body": message, "next_attempt_at": now} for to, message in buffered
+                ])
+                await db.commit()
+        except Exception:
+            with self._lock:
+                self._buffer[:0] = buffered
+            raise
+        return len(buffered)
+
+    async def drain(self) -> int:
+        """
+        Send up to batch_size due messages, each recipient's coalesced into as
+        few SMS as fit and sent in order. Returns how many messages went out.
+        """
+        from app.models.notification import OutboxMessage
+
+        now = datetime.now(timezone.utc)
+        earlier = aliased(OutboxMessage)
+        # A message waits behind an earlier one to the same recipient that is backing off
+        blocked = (
+            select(earlier.id)
+            .where(
+                earlier.to_phone == OutboxMessage.to_phone,
+                earlier.id < OutboxMessage.id,
+                earlier.sent_at.is_(None),
+                earlier.attempts < self.max_attempts,
+                earlier.next_attempt_at > now,
+            )
+            .exists()
+        )
+        async with self._sessions() as db:
+            rows = (await db.execute(
+                select(OutboxMessage.id, OutboxMessage.to_phone, OutboxMessage.body, OutboxMessage.attempts)
+                .where(
+                    OutboxMessage.sent_at.is_(None),
+                    OutboxMessage.attempts < self.max_attempts,
+                    OutboxMessage.next_attempt_at <= now,
+                    ~blocked,
+                )
+                .order_by(OutboxMessage.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )).all()
+            if not rows:
+                return 0
+            # Lease the rows so an overlapping drain leaves them alone while they are sent
+            await db.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id.in_([row.id for row in rows]))
+                .values(next_attempt_at=now + timedelta(seconds=self.lease))
+            )
+            await db.commit()
+
+        # recipient -> [(Notification, its rows)], coalesced like the in-memory outbox
+        batches = OrderedDict()
+        for row in rows:
+            chunks = batches.setdefault(row.to_phone, [])
+            if chunks and chunks[-1][0].can_absorb(row.body):
+                chunks[-1][0].messages.append(row.body)
+                chunks[-1][1].append(row)
+                self.stats["coalesced"] += 1
+            else:
+                chunks.append((Notification(row.to_phone, row.body, 0.0), [row]))
+
+        workers = asyncio.Semaphore(self.workers)
+
+        async def send_recipient(chunks):
+            async with workers:
+                return await asyncio.to_thread(self._send_in_order, chunks)
+
+        outcomes = await asyncio.gather(*(send_recipient(chunks) for chunks in batches.values()))
+
+        finished = datetime.now(timezone.utc)
+        changes = []
+        sent = 0
+        for attempted in outcomes:
+            for notification, chunk_rows, error in attempted:
+                if error is None:
+                    sent += len(chunk_rows)
+                    self.stats["sent"] += 1
+                    changes += [{"id": row.id, "sent_at": finished} for row in chunk_rows]
+                    continue
+                attempts = max(row.attempts for row in chunk_rows) + 1
+                if attempts < self.max_attempts:
+                    delay = self.backoff * (2 ** (attempts - 1))
+                    logger.warning(f"Failed to send SMS to {notification.to} (attempt {attempts}), retrying in {delay:.1f}s: {str(error)}")
+                    self.stats["retried"] += 1
+                else:
+                    delay = 0.0
+                    logger.error(f"Failed to send SMS to {notification.to} after {attempts} attempts: {str(error)}")
+                    self.stats["failed"] += 1
+                changes += [
+                    {"id": row.id, "attempts": attempts, "last_error": str(error)[:500],
+                     "next_attempt_at": finished + timedelta(seconds=delay)}
+                    for row in chunk_rows
+                ]
+        # Rows left unsent behind a failure are released; the failed one still goes first
+        done = {change["id"] for change in changes}
+        changes += [{"id": row.id, "next_attempt_at": finished} for row in rows if row.id not in done]
+
+        async with self._sessions() as db:
+            await db.execute(update(OutboxMessage), changes)
+            await db.commit()
+        return sent
+
+    def _send_in_order(self, chunks):
+        """
+        Send one recipient's SMS in order, stopping at the first failure.
+        Returns (notification, rows, error) for each attempted SMS.
+        """
+        attempted = []
+        for notification, chunk_rows in chunks:
+            try:
+                sid = self.transport.send(notification.to, notification.body)
+                logger.info(f"SMS sent to {notification.to}: {sid}")
+                attempted.append((notification, chunk_rows, None))
+            except Exception as e:
+                attempted.append((notification, chunk_rows, e))
+                break
+        return attempted
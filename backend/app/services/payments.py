@@ -0,0 +1,169 @@
+from sqlalchemy import select, update, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.upsert import upsert_insert
+from app.models.user import Balances, CompanyBalances, LedgerEntry
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ledger reasons
+REQUEST_COMPLETED = "REQUEST_COMPLETED"
+BIN_EMPTIED = "BIN_EMPTIED"
+
+
+async def adjust_balances(db: AsyncSession, changes: Dict[str, float]) -> Dict[str, float]:
+    """
+    Add each amount to the matching user's balance in a single statement,
+    creating missing balance rows, and return the new balances by clerk ID
+    """
+    stmt = upsert_insert(db)(Balances).values(
+        [{"clerkId": clerk_id, "balance": amount} for clerk_id, amount in changes.items()]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Balances.clerkId],
+        set_={"balance": Balances.balance + stmt.excluded.balance}
+    ).returning(Balances.clerkId, Balances.balance)
+
+    result = await db.execute(stmt)
+    return {row.clerkId: row.balance for row in result.all()}
+
+
+async def transfer(
+    db: AsyncSession,
+    from_clerk_id: str,
+    to_clerk_id: str,
+    amount: float,
+    reason: str,
+    reference: Optional[str] = None
+) -> Dict[str, float]:
+    """
+    Move amount from one user to another and record it in the ledger.
+    Runs in the caller's transaction; returns the new balances by clerk ID.
+    """
+    changes = {from_clerk_id: -amount}
+    changes[to_clerk_id] = changes.get(to_clerk_id, 0.0) + amount
+
+    balances = await adjust_balances(db, changes)
+    await db.execute(
+        insert(LedgerEntry).values(
+            from_clerkId=from_clerk_id,
+            to_clerkId=to_clerk_id,
+            amount=amount,
+            reason=reason,
+            reference=reference
+        )
+    )
+    logger.info(f"Transferred {amount} from {from_clerk_id} to {to_clerk_id} ({reason} {reference})")
+    return balances
+
+
+async def pay_from_company(
+    db: AsyncSession,
+    company_id: Optional[int],
+    to_clerk_id: str,
+    amount: float,
+    reason: str,
+    reference: Optional[str] = None
+) -> Optional[float]:
+    """
+    Pay a user out of a company balance if the company can cover it, and record
+    it in the ledger. Runs in the caller's transaction; returns the user's new
+    balance, or None if the company does not exist or has insufficient funds.
+    """
+    if company_id is None:
+        return None
+
+    if not await _debit_company(db, company_id, amount):
+        return None
+
+    balances = await adjust_balances(db, {to_clerk_id: amount})
+    await db.execute(
+        insert(LedgerEntry).values(
+            from_company_id=company_id,
+            to_clerkId=to_clerk_id,
+            amount=amount,
+            reason=reason,
+            reference=reference
+        )
+    )
+    logger.info(f"Paid {amount} from company {company_id} to {to_clerk_id} ({reason} {reference})")
+    return balances[to_clerk_id]
+
+
+async def pay_many_from_company(
+    db: AsyncSession,
+    payouts: List[Tuple[Optional[int], str, float, Optional[str]]],
+    reason: str
+) -> List[bool]:
+    """
+    Make many (company_id, to_clerk_id, amount, reference) payouts at once, with
+    the same outcome as calling pay_from_company for each in order: a payout the
+    company cannot cover at that point is skipped. Each company is debited with
+    one statement, and all credits and ledger entries are written with one
+    statement each. Runs in the caller's transaction; returns whether each
+    payout went through.
+    """
+    by_company = defaultdict(list)
+    for index, (company_id, _, amount, _) in enumerate(payouts):
+        if company_id is not None:
+            by_company[company_id].append((index, amount))
+
+    paid = [False] * len(payouts)
+    for company_id, items in by_company.items():
+        total = sum(amount for _, amount in items)
+        debited = await _debit_company(db, company_id, total)
+        if not debited:
+            # Short of the total: lock the balance and keep the payouts that fit, in order
+            balance = (await db.execute(
+                select(CompanyBalances.balance)
+                .where(CompanyBalances.id == company_id)
+                .with_for_update()
+            )).scalar_one_or_none()
+            if balance is None:
+                continue
+            fitting = []
+            for index, amount in items:
+                if amount <= balance:
+                    fitting.append((index, amount))
+                    balance -= amount
+            items = fitting
+            total = sum(amount for _, amount in items)
+            if not items or not await _debit_company(db, company_id, total):
+                continue
+        for index, _ in items:
+            paid[index] = True
+
+    made = [payout for payout, ok in zip(payouts, paid) if ok]
+    if not made:
+        return paid
+
+    credits = defaultdict(float)
+    for _, to_clerk_id, amount, _ in made:
+        credits[to_clerk_id] += amount
+    await adjust_balances(db, credits)
+    await db.execute(insert(LedgerEntry), [
+        {
+            "from_company_id": company_id,
+            "to_clerkId": to_clerk_id,
+            "amount": amount,
+            "reason": reason,
+            "reference": reference
+        }
+        for company_id, to_clerk_id, amount, reference in made
+    ])
+    logger.info(f"Paid {len(made)} payouts totalling {sum(credits.values())} from companies ({reason})")
+    return paid
+
+
+async def _debit_company(db: AsyncSession, company_id: int, amount: float) -> bool:
+    """Debit a company balance only if it covers amount, without reading it first"""
+    result = await db.execute(
+        update(CompanyBalances)
+        .where(CompanyBalances.id == company_id, CompanyBalances.balance >= amount)
+        .values(balance=CompanyBalances.balance - amount)
+        .returning(CompanyBalances.balance)
+        .execution_options(synchronize_session=False)
+    )
+    return result.first() is not None
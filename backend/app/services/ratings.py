@@ -0,0 +1,108 @@
+"""
+Ragpicker rating aggregation.
+
+average_rating is kept up to date from running rating_sum / rating_count totals
+on RagpickerDetails. If the totals ever drift (manual edits, deleted reviews),
+rebuild them from the reviews table with:
+
+    python -m app.services.ratings [clerk_id ...]
+"""
+from sqlalchemy import select, update, insert, func, case, cast, Numeric
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.upsert import upsert_insert
+from app.models.user import RagpickerDetails, Reviews
+from typing import List, Optional
+import argparse
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def rounded_average(total, count):
+    """SQL expression for total / count rounded to 1 decimal place"""
+    return func.round(cast(total / count, Numeric), 1)
+
+
+async def record_rating(db: AsyncSession, ragpicker_clerk_id: str, rating: float):
+    """
+    Add a rating to the ragpicker's running totals and refresh average_rating in a
+    single statement, creating the ragpicker details row if it does not exist yet.
+    Runs in the caller's transaction.
+    """
+    rating = float(rating)
+    stmt = upsert_insert(db)(RagpickerDetails).values(
+        clerkId=ragpicker_clerk_id,
+        wallet_address=None,
+        RFID=None,
+        rating_sum=rating,
+        rating_count=1,
+        average_rating=round(rating, 1)
+    )
+    current_sum = func.coalesce(RagpickerDetails.rating_sum, 0.0)
+    current_count = func.coalesce(RagpickerDetails.rating_count, 0)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RagpickerDetails.clerkId],
+        set_={
+            "rating_sum": current_sum + rating,
+            "rating_count": current_count + 1,
+            "average_rating": rounded_average(current_sum + rating, current_count + 1),
+        }
+    )
+    await db.execute(stmt)
+
+
+async def repair_ratings(db: AsyncSession, clerk_ids: Optional[List[str]] = None) -> int:
+    """
+    Recompute rating totals and averages from the reviews table, for the given
+    ragpickers or for everyone. Returns the number of ragpicker details rows updated.
+    """
+    # Ragpickers with reviews but no details row yet
+    reviewed = select(Reviews.ragpicker_clerkId).distinct().where(
+        ~select(RagpickerDetails.clerkId)
+        .where(RagpickerDetails.clerkId == Reviews.ragpicker_clerkId)
+        .exists()
+    )
+    if clerk_ids:
+        reviewed = reviewed.where(Reviews.ragpicker_clerkId.in_(clerk_ids))
+    await db.execute(
+        insert(RagpickerDetails).from_select([RagpickerDetails.clerkId], reviewed)
+    )
+
+    total = (
+        select(func.coalesce(func.sum(Reviews.rating), 0.0))
+        .where(Reviews.ragpicker_clerkId == RagpickerDetails.clerkId)
+        .scalar_subquery()
+    )
+    count = (
+        select(func.count(Reviews.rating))
+        .where(Reviews.ragpicker_clerkId == RagpickerDetails.clerkId)
+        .scalar_subquery()
+    )
+    stmt = update(RagpickerDetails).values(
+        rating_sum=total,
+        rating_count=count,
+        average_rating=case((count > 0, rounded_average(total, count)), else_=0.0)
+    )
+    if clerk_ids:
+        stmt = stmt.where(RagpickerDetails.clerkId.in_(clerk_ids))
+
+    result = await db.execute(stmt.execution_options(synchronize_session=False))
+    logger.info(f"Repaired rating totals for {result.rowcount} ragpickers")
+    return result.rowcount
+
+
+async def _repair(clerk_ids: List[str]):
+    from app.db.database import async_session_factory
+
+    async with async_session_factory() as db:
+        updated = await repair_ratings(db, clerk_ids or None)
+        await db.commit()
+    print(f"Repaired rating totals for {updated} ragpickers")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild ragpicker rating totals from reviews")
+    parser.add_argument("clerk_ids", nargs="*", help="Only repair these ragpickers (default: all)")
+    args = parser.parse_args()
+    asyncio.run(_repair(args.clerk_ids))
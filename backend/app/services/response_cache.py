@@ -0,0 +1,159 @@
+"""
+Server-side cache of rendered JSON responses with ETags.
+
+Entries are tagged with the ids they were built from (e.g. ragpicker clerk
+IDs) so a write can drop just the pages containing that id; every entry also
+carries ALL_TAG for changes that reshuffle every page (a user gaining or
+losing the RAGPICKER role).
+
+Storage is pluggable: a backend needs get(key), set(key, entry),
+invalidate_tags(tags) and clear(). InMemoryCacheBackend is a per-process LRU
+with a TTL; since Lambda containers do not share memory, the TTL bounds how
+long another container can serve a page that was invalidated elsewhere.
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Set
+import hashlib
+import logging
+import time
+from app.core.config import RAGPICKER_CACHE_TTL_SECONDS, RAGPICKER_CACHE_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+ALL_TAG = "*"
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    True if an If-None-Match header value covers the given ETag
+    """
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    # Weak comparison: W/"x" matches "x"
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+class CacheEntry:
+    __slots__ = ("body", "etag", "tags", "expires_at")
+
+    def __init__(self, body: bytes, tags: Set[str], ttl: float):
+        self.body = body
+        self.etag = make_etag(body)
+        self.tags = tags
+        self.expires_at = time.monotonic() + ttl
+
+
+class InMemoryCacheBackend:
+    """
+    LRU of CacheEntry with per-entry expiry and a tag -> keys index
+    """
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[str]] = {}
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CacheEntry):
+        if self.max_size <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        keys = set()
+        for tag in tags:
+            keys |= self._keys_by_tag.get(tag, set())
+        for key in keys:
+            self._remove(key)
+        return len(keys)
+
+    def clear(self):
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResponseCache:
+    """
+    Cache of serialized response bodies for one endpoint family
+    """
+    def __init__(self, name: str, backend, ttl: float):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Bumped by every invalidation; see put()
+        self.generation = 0
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, body: bytes, tags: Iterable[str] = (), generation: Optional[int] = None) -> CacheEntry:
+        """
+        Store a response body. Pass the generation read before loading the data:
+        if an invalidation happened meanwhile the body may predate that write,
+        so it is returned but not stored.
+        """
+        entry = CacheEntry(body, set(tags) | {ALL_TAG}, self.ttl)
+        if generation is None or generation == self.generation:
+            self.backend.set(key, entry)
+        return entry
+
+    def invalidate(self, *tags: str):
+        """
+        Drop cached responses built from any of these ids
+        """
+        self.generation += 1
+        dropped = self.backend.invalidate_tags(tags)
+        if dropped:
+            logger.debug(f"{self.name} cache: dropped {dropped} entries for {tags}")
+
+    def invalidate_all(self):
+        self.generation += 1
+        self.backend.invalidate_tags([ALL_TAG])
+
+
+# Singleton instance
+ragpicker_directory_cache = ResponseCache(
+    "ragpicker-directory",
+    InMemoryCacheBackend(RAGPICKER_CACHE_MAX_SIZE),
+    RAGPICKER_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,133 @@
+"""
+Collection routes over full bins.
+
+A route starts at a depot or a ragpicker's location and visits every stop
+once, optionally returning to the start. The order comes from a nearest-
+neighbour tour improved with 2-opt over a precomputed haversine distance
+matrix. 2-opt only tries to connect each stop to one of its NEIGHBOURS
+nearest stops, which keeps a pass at O(n * NEIGHBOURS) instead of O(n^2)
+and plans routes of several hundred bins in well under a second.
+"""
+from typing import List, Sequence, Tuple
+import heapq
+import time
+from app.services.geo import haversine_km
+
+# Nearest stops each stop may be reconnected to by 2-opt
+NEIGHBOURS = 12
+# Safety net on 2-opt passes; real inputs settle long before this
+MAX_PASSES = 50
+
+Point = Tuple[float, float]
+
+
+def distance_matrix(points: Sequence[Point]) -> List[List[float]]:
+    size = len(points)
+    matrix = [[0.0] * size for _ in range(size)]
+    for i in range(size):
+        lat1, lng1 = points[i]
+        row = matrix[i]
+        for j in range(i + 1, size):
+            distance = haversine_km(lat1, lng1, points[j][0], points[j][1])
+            row[j] = distance
+            matrix[j][i] = distance
+    return matrix
+
+
+def nearest_neighbour_tour(matrix: List[List[float]], start: int = 0) -> List[int]:
+    unvisited = set(range(len(matrix)))
+    unvisited.discard(start)
+    tour = [start]
+    while unvisited:
+        row = matrix[tour[-1]]
+        nearest = min(unvisited, key=row.__getitem__)
+        unvisited.remove(nearest)
+        tour.append(nearest)
+    return tour
+
+
+def path_length(matrix: List[List[float]], path: Sequence[int]) -> float:
+    return sum(matrix[a][b] for a, b in zip(path, path[1:]))
+
+
+def two_opt(matrix: List[List[float]], path: List[int], fixed_end: bool, neighbours: int = NEIGHBOURS) -> List[int]:
+    """
+    Improve a path whose first node is fixed (and last node too if fixed_end)
+    by reversing segments while that shortens it
+    """
+    path = list(path)
+    size = len(path)
+    last = size - 2 if fixed_end else size - 1  # Last position a reversal may touch
+    if last < 2:
+        return path
+    position = [0] * len(matrix)
+    for index, node in enumerate(path):
+        position[node] = index
+    nearest = [
+        heapq.nsmallest(neighbours, (j for j in range(len(matrix)) if j != i), key=matrix[i].__getitem__)
+        for i in range(len(matrix))
+    ]
+
+    def reversal_gain(i: int, j: int) -> float:
+        """Length saved by reversing path[i..j]"""
+        before, first, last_node = path[i - 1], path[i], path[j]
+        gain = matrix[before][first] - matrix[before][last_node]
+        if j + 1 < size:
+            after = path[j + 1]
+            gain += matrix[last_node][after] - matrix[first][after]
+        return gain
+
+    def reverse(i: int, j: int):
+        path[i:j + 1] = path[i:j + 1][::-1]
+        for index in range(i, j + 1):
+            position[path[index]] = index
+
+    for _ in range(MAX_PASSES):
+        improved = False
+        for i in range(1, last + 1):
+            a, b = path[i - 1], path[i]
+            current = matrix[a][b]
+            for c in nearest[a]:
+                if matrix[a][c] >= current:
+                    break
+                k = position[c]
+                if i < k <= last and reversal_gain(i, k) > 1e-9:
+                    # a now leads straight to c
+                    reverse(i, k)
+                    improved = True
+                    break
+                if 1 <= k + 1 < i and reversal_gain(k + 1, i - 1) > 1e-9:
+                    # c now leads straight to a
+                    reverse(k + 1, i - 1)
+                    improved = True
+                    break
+        if not improved:
+            break
+    return path
+
+
+def plan_route(start: Point, stops: Sequence[Point], return_to_start: bool = False):
+    """
+    Order `stops` into a short route from `start`. Returns (stop order as
+    indexes into `stops`, leg distances in km, total km, planning time in s).
+    """
+    started = time.perf_counter()
+    if not stops:
+        return [], [], 0.0, time.perf_counter() - started
+
+    # Node 0 is the start; with a round trip the start is repeated as a fixed last node
+    points = [start, *stops]
+    if return_to_start:
+        points.append(start)
+    matrix = distance_matrix(points)
+    end = len(points) - 1
+
+    if return_to_start:
+        tour = nearest_neighbour_tour([row[:end] for row in matrix[:end]]) + [end]
+    else:
+        tour = nearest_neighbour_tour(matrix)
+    tour = two_opt(matrix, tour, fixed_end=return_to_start)
+
+    legs = [matrix[a][b] for a, b in zip(tour, tour[1:])]
+    order = [node - 1 for node in (tour[1:-1] if return_to_start else tour[1:])]
+    return order, legs, sum(legs), time.perf_counter() - started
@@ -1,12 +1,12 @@
 import os
 import logging
-import boto3
+import threading
 from uuid import uuid4
-from botocore.exceptions import NoCredentialsError, ClientError
 from io import BytesIO
 from fastapi import HTTPException, UploadFile, status
 from starlette.concurrency import run_in_threadpool
 import base64
+from app.core.metrics import metrics
 
 # Try to load .env only in development
 try:
@@ -41,39 +41,55 @@ logger.info(f"AWS Configuration - CloudFront: {'Set' if AWS_CLOUDFRONT_URL else
 logger.info(f"AWS Configuration - Access Key ID: {'Set' if AWS_ACCESS_KEY_ID else 'Not Set'}")
 logger.info(f"AWS Configuration - Secret Key: {'Set' if AWS_SECRET_ACCESS_KEY else 'Not Set'}")
 
-# Initialize S3 client based on environment
-s3_client = None
-try:
-    # Check if running in AWS Lambda or EC2 (with IAM role)
-    if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') or not (AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY):
-        logger.info("Running in AWS environment with IAM role or Lambda execution role")
-        s3_client = boto3.client('s3', region_name=AWS_REGION)
-    else:
-        # Using explicit credentials
-        logger.info("Using explicit AWS credentials from environment variables")
-        s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            region_name=AWS_REGION,
-        )
-    
-    # Test connection
-    response = s3_client.list_buckets()
-    logger.info(f"Successfully connected to AWS S3. Buckets: {len(response['Buckets'])}")
-except Exception as e:
-    logger.error(f"Failed to initialize S3 client: {str(e)}")
-    # Don't set s3_client to None - keep the instance for simplified error handling
+# The S3 client is built on first use rather than at import, so cold starts
+# don't pay for importing boto3 or a round trip to S3
+_s3_client = None
+_s3_client_lock = threading.Lock()
+
+def get_s3_client():
+    """
+    Return the shared S3 client, creating it on first call.
+    Returns None if the client could not be created.
+    """
+    global _s3_client
+    if _s3_client is not None:
+        return _s3_client
+
+    with _s3_client_lock:
+        if _s3_client is None:
+            try:
+                import boto3
+
+                # Check if running in AWS Lambda or EC2 (with IAM role)
+                if os.environ.get('AWS_LAMBDA_FUNCTION_NAME') or not (AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY):
+                    logger.info("Running in AWS environment with IAM role or Lambda execution role")
+                    _s3_client = boto3.client('s3', region_name=AWS_REGION)
+                else:
+                    # Using explicit credentials
+                    logger.info("Using explicit AWS credentials from environment variables")
+                    _s3_client = boto3.client(
+                        "s3",
+                        aws_access_key_id=AWS_ACCESS_KEY_ID,
+                        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+                        region_name=AWS_REGION,
+                    )
+            except Exception as e:
+                logger.error(f"Failed to initialize S3 client: {str(e)}")
+    return _s3_client
 
 async def upload_image_to_s3(file: UploadFile, folder="profiles") -> str:
     """
     Upload a file object to S3
     """
+    # Imported here, like boto3 in get_s3_client, to keep botocore off the cold start
+    from botocore.exceptions import NoCredentialsError, ClientError
+
     try:
         # Log the upload attempt
         logger.info(f"Uploading file to S3: {file.filename}, content_type: {file.content_type}")
             
         # Check if S3 client is initialized
+        s3_client = get_s3_client()
         if s3_client is None:
             logger.error("S3 client is not initialized")
             raise HTTPException(
@@ -106,13 +122,14 @@ async def upload_image_to_s3(file: UploadFile, folder="profiles") -> str:
 
         file_stream = BytesIO(file_content)
 
-        await run_in_threadpool(
-            s3_client.upload_fileobj,
-            file_stream,
-            AWS_S3_BUCKET_NAME,
-            unique_filename,
-            ExtraArgs={"ContentType": file.content_type}
-        )
+        with metrics.time_outbound("s3", "upload"):
+            await run_in_threadpool(
+                s3_client.upload_fileobj,
+                file_stream,
+                AWS_S3_BUCKET_NAME,
+                unique_filename,
+                ExtraArgs={"ContentType": file.content_type}
+            )
 
         # Generate the URL based on CloudFront availability
         url = (
@@ -142,11 +159,14 @@ async def upload_base64_image_to_s3(base64_image: str, file_extension: str = "jp
     """
     Upload a base64 encoded image to S3
     """
+    from botocore.exceptions import NoCredentialsError, ClientError
+
     try:
         # Log the upload attempt
         logger.info(f"Uploading base64 image to S3 with extension: {file_extension}")
             
         # Check if S3 client is initialized
+        s3_client = get_s3_client()
         if s3_client is None:
             logger.error("S3 client is not initialized")
             raise HTTPException(
@@ -199,13 +219,14 @@ async def upload_base64_image_to_s3(base64_image: str, file_extension: str = "jp
         logger.info(f"Attempting to upload to S3 bucket: {AWS_S3_BUCKET_NAME}, key: {unique_filename}")
         
         try:
-            await run_in_threadpool(
-                s3_client.upload_fileobj,
-                file_stream,
-                AWS_S3_BUCKET_NAME,
-                unique_filename,
-                ExtraArgs={"ContentType": content_type}
-            )
+            with metrics.time_outbound("s3", "upload"):
+                await run_in_threadpool(
+                    s3_client.upload_fileobj,
+                    file_stream,
+                    AWS_S3_BUCKET_NAME,
+                    unique_filename,
+                    ExtraArgs={"ContentType": content_type}
+                )
         except Exception as e:
             logger.error(f"S3 upload operation failed: {str(e)}")
             raise
@@ -236,10 +257,13 @@ async def delete_file(filename: str, folder="profiles") -> bool:
     """
     Delete a file from S3 by filename
     """
+    from botocore.exceptions import ClientError
+
     try:
         logger.info(f"Deleting file from S3: {filename}")
             
         # Check if S3 client is initialized
+        s3_client = get_s3_client()
         if s3_client is None:
             logger.error("S3 client is not initialized")
             raise HTTPException(
@@ -257,11 +281,12 @@ async def delete_file(filename: str, folder="profiles") -> bool:
         logger.info(f"Deleting S3 object: bucket={AWS_S3_BUCKET_NAME}, key={key}")
         
         # Delete the file using async wrapper
-        await run_in_threadpool(
-            s3_client.delete_object,
-            Bucket=AWS_S3_BUCKET_NAME,
-            Key=key
-        )
+        with metrics.time_outbound("s3", "delete"):
+            await run_in_threadpool(
+                s3_client.delete_object,
+                Bucket=AWS_S3_BUCKET_NAME,
+                Key=key
+            )
         
         logger.info(f"File deleted successfully: {key}")
         return True
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+from typing import Optional
+import logging
+import time
+from app.core.config import SENSOR_STATE_CACHE_TTL_SECONDS, SENSOR_STATE_CACHE_MAX_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class StaleSensorState(Exception):
+    """
+    Raised when a conditional write finds the database no longer matches the cached state
+    """
+    pass
+
+
+class SensorState:
+    """
+    Snapshot of what the status/RFID endpoints need to know about a bin
+    """
+    __slots__ = ("sensor_status", "location", "company_id", "active_log_id", "active_log_rfid", "expires_at")
+
+    def __init__(self, sensor_status, location, company_id, active_log_id=None, active_log_rfid=None):
+        self.sensor_status = sensor_status
+        self.location = location
+        self.company_id = company_id
+        self.active_log_id = active_log_id
+        self.active_log_rfid = active_log_rfid
+        self.expires_at = 0.0
+
+
+class SensorStateCache:
+    """
+    In-process LRU cache of SensorState keyed by sensor_id.
+
+    Entries expire after ttl seconds so state written by other containers is picked
+    up eventually, and the least recently used entry is evicted past max_size.
+    """
+    def __init__(self, max_size: int = SENSOR_STATE_CACHE_MAX_SIZE, ttl: float = SENSOR_STATE_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def get(self, sensor_id: str) -> Optional[SensorState]:
+        state = self._entries.get(sensor_id)
+        if state is None:
+            return None
+        if state.expires_at <= time.monotonic():
+            del self._entries[sensor_id]
+            return None
+        self._entries.move_to_end(sensor_id)
+        return state
+
+    def set(self, sensor_id: str, state: SensorState):
+        if self.max_size <= 0:
+            return
+        state.expires_at = time.monotonic() + self.ttl
+        self._entries[sensor_id] = state
+        self._entries.move_to_end(sensor_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, sensor_id: str):
+        self._entries.pop(sensor_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Singleton instance
+sensor_state_cache = SensorStateCache()
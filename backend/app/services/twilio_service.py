@@ -1,43 +1,72 @@
-from twilio.rest import Client
 from app.core.config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, TWILIO_PHONE_NUMBER
-from fastapi import HTTPException
+from app.core.config import NOTIFICATION_TRANSPORT, NOTIFICATION_OUTBOX
+from app.core.metrics import metrics
+from app.services.notifications import NotificationOutbox, DatabaseOutbox, ConsoleTransport, FakeTransport
 import logging
-from app.core.config import ENVIRONMENT
 
 logger = logging.getLogger(__name__)
 
-class TwilioService:
+# All notifications currently go to this number
+DEFAULT_TO_PHONE = "+917696763029"
+
+class TwilioTransport:
     """
-    Twilio service for sending SMS messages
+    Sends SMS through the Twilio REST API (blocking; called from outbox workers)
+
+    The Twilio client is imported and built on the first send to keep it off
+    the cold start path.
     """
     def __init__(self):
-        self.account_sid = TWILIO_ACCOUNT_SID
-        self.auth_token = TWILIO_AUTH_TOKEN
         self.phone_number = TWILIO_PHONE_NUMBER
-        self.client = Client(self.account_sid, self.auth_token)
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from twilio.rest import Client
+            self._client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        return self._client
+
+    def send(self, to: str, body: str) -> str:
+        with metrics.time_outbound("twilio", "send_sms"):
+            sms = self.client.messages.create(
+                body=body,
+                from_=self.phone_number,
+                to=to
+            )
+        return sms.sid
+
+def create_transport(name: str = NOTIFICATION_TRANSPORT):
+    if name == "twilio":
+        return TwilioTransport()
+    if name == "fake":
+        return FakeTransport()
+    return ConsoleTransport()
+
+def create_outbox(kind: str = NOTIFICATION_OUTBOX):
+    if kind == "database":
+        return DatabaseOutbox(create_transport())
+    return NotificationOutbox(create_transport())
+
+class TwilioService:
+    """
+    Twilio service for sending SMS messages
+
+    Messages are queued on a notification outbox and sent in the background
+    (or, on Lambda, by the scheduled task), so handlers never wait on the Twilio API.
+    """
+    def __init__(self, outbox=None):
+        self.outbox = outbox or create_outbox()
     
-    async def send_sms(self, message: str) -> bool:
+    async def send_sms(self, message: str, to_phone: str = DEFAULT_TO_PHONE) -> bool:
         """
-        Send an SMS message using Twilio
+        Queue an SMS message for sending
         """
         try:
-            to_phone = "+917696763029"
-            
-            if ENVIRONMENT != "production":
-                print(f"SMS: {message}")
-                return True
-            else:
-                sms = self.client.messages.create(
-                    body=message,
-                    from_=self.phone_number,
-                    to=to_phone
-                )
-                
-                logger.info(f"SMS sent to {to_phone}: {sms.sid}")
-                return True
-        
+            self.outbox.enqueue(to_phone, message)
+            return True
         except Exception as e:
-            logger.error(f"Failed to send SMS: {str(e)}")
+            logger.error(f"Failed to queue SMS: {str(e)}")
             # Don't raise an exception, just return False
             # This is to prevent API failures if SMS sending fails
             return False
@@ -51,6 +80,7 @@ class TwilioService:
             "request_created": "Your garbage collection request has been created. A ragpicker will respond soon.",
             "request_accepted": "Good news! Your garbage collection request #{request_id} has been accepted by {ragpicker_name}. They will arrive at {customer_address} soon.",
             "request_rejected": "Your garbage collection request #{request_id} has been rejected by {ragpicker_name}. Please try booking another ragpicker.",
+            "request_reassigned": "Your garbage collection request #{request_id} was declined by {ragpicker_name}. We are finding another ragpicker for you.",
             "request_completed_customer": "Your garbage collection request #{request_id} with {ragpicker_name} has been marked as completed. {amount} tokens have been transferred. Your new balance: {new_balance} tokens. Thank you for using Waste Whirl!",
             
             # Ragpicker notifications
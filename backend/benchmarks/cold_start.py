@@ -0,0 +1,159 @@
+"""
+Track Lambda cold start cost: module import time of main (via python -X importtime)
+and time to first response through the Mangum handler with a synthetic API
+Gateway event. Every run is a fresh interpreter, like a new Lambda container.
+
+Run from the backend directory:
+
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --runs 10 --path /health --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executed in a fresh interpreter; prints one JSON line of timings
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+path = sys.argv[1]
+event = {
+    "resource": "/{proxy+}",
+    "path": path,
+    "httpMethod": "GET",
+    "headers": {"Host": "localhost", "Accept": "application/json"},
+    "multiValueHeaders": {},
+    "queryStringParameters": None,
+    "multiValueQueryStringParameters": None,
+    "pathParameters": {"proxy": path.lstrip("/")},
+    "stageVariables": None,
+    "requestContext": {
+        "resourcePath": "/{proxy+}",
+        "httpMethod": "GET",
+        "path": "/Prod" + path,
+        "stage": "Prod",
+        "requestId": "cold-start-benchmark",
+        "identity": {"sourceIp": "127.0.0.1", "userAgent": "cold-start-benchmark"},
+    },
+    "body": None,
+    "isBase64Encoded": False,
+}
+
+class Context:
+    function_name = "cold-start-benchmark"
+    aws_request_id = "cold-start-benchmark"
+    def get_remaining_time_in_millis(self):
+        return 30000
+
+first = main.handler(event, Context())
+responded = time.perf_counter()
+second = main.handler(event, Context())
+warm = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_response_ms": (responded - imported) * 1000,
+    "warm_response_ms": (warm - responded) * 1000,
+    "status": first["statusCode"],
+    "warm_status": second["statusCode"],
+}))
+"""
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault("ENVIRONMENT", "testing")
+    env.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+    env.setdefault("AWS_LAMBDA_FUNCTION_NAME", "cold-start-benchmark")
+    env.setdefault("NOTIFICATION_TRANSPORT", "fake")
+    env["PYTHONPATH"] = BACKEND_DIR + os.pathsep + env.get("PYTHONPATH", "")
+    return env
+
+
+def measure_first_response(path):
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD, path],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True
+    )
+    total = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"Cold start run failed:\n{result.stderr}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process_ms"] = total
+    return timings
+
+
+def import_profile():
+    """Parse python -X importtime output into (module, self_us, cumulative_us, indent)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us), len(name) - len(name.lstrip())))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/health", help="Path requested by the synthetic event")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level packages to list")
+    parser.add_argument("--json", action="store_true", help="Print a single JSON summary line")
+    args = parser.parse_args()
+
+    runs = [measure_first_response(args.path) for _ in range(args.runs)]
+    summary = {
+        key: round(statistics.median(run[key] for run in runs), 1)
+        for key in ("process_ms", "import_ms", "first_response_ms", "warm_response_ms")
+    }
+    summary["status"] = runs[0]["status"]
+
+    modules = import_profile()
+    summary["importtime_main_ms"] = 0.0
+    summary["slowest_imports_ms"] = {}
+    main_index = next((i for i, m in enumerate(modules) if m[0] == "main"), None)
+    if main_index is not None:
+        _, _, main_total, main_indent = modules[main_index]
+        # importtime lists a module's imports before it, indented one level deeper
+        children = []
+        for name, _, cumulative, indent in reversed(modules[:main_index]):
+            if indent <= main_indent:
+                break
+            if indent == main_indent + 2:
+                children.append((name, cumulative))
+        children.sort(key=lambda m: m[1], reverse=True)
+        summary["importtime_main_ms"] = round(main_total / 1000, 1)
+        summary["slowest_imports_ms"] = {name: round(cumulative / 1000, 1) for name, cumulative in children[:args.top]}
+
+    if args.json:
+        print(json.dumps(summary))
+        return
+
+    print(f"Cold start over {args.runs} runs (median), GET {args.path} -> {summary['status']}")
+    print(f"  interpreter start to exit   {summary['process_ms']:8.1f} ms")
+    print(f"  import main                 {summary['import_ms']:8.1f} ms")
+    print(f"  first response via Mangum   {summary['first_response_ms']:8.1f} ms")
+    print(f"  warm response via Mangum    {summary['warm_response_ms']:8.1f} ms")
+    print(f"  -X importtime total (main)  {summary['importtime_main_ms']:8.1f} ms")
+    print("Slowest imports under main (cumulative):")
+    for name, ms in summary["slowest_imports_ms"].items():
+        print(f"  {ms:8.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Simulate dispatching thousands of open requests to ragpickers.
+
+Requests and ragpickers are scattered uniformly over a city-sized disc.
+Ragpickers start with random load, ratings and rejection history. The
+in-memory run times app.services.dispatch.assign on its own and compares it
+with a naive baseline: each request, oldest first, takes the nearest ragpicker
+with capacity, scanning the full list. The baseline ignores load, rating and
+rejections. --db also seeds a throwaway database and times the whole
+dispatch_pending path in batches: load, assign, bulk update and commit.
+
+Run from the backend directory:
+
+    python -m benchmarks.dispatch --requests 5000 --ragpickers 2000
+    python -m benchmarks.dispatch --requests 20000 --ragpickers 5000 --db
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from math import cos, pi, radians, sin, sqrt
+
+CENTER = (30.7333, 76.7794)
+
+
+def random_point(rng: random.Random, radius_km: float):
+    from app.services.geo import KM_PER_DEGREE_LAT
+
+    distance = radius_km * sqrt(rng.random())
+    angle = 2 * pi * rng.random()
+    latitude = CENTER[0] + distance * cos(angle) / KM_PER_DEGREE_LAT
+    longitude = CENTER[1] + distance * sin(angle) / (KM_PER_DEGREE_LAT * cos(radians(CENTER[0])))
+    return latitude, longitude
+
+
+def make_population(n_requests: int, n_ragpickers: int, radius_km: float, max_load: int, seed_value: int):
+    from app.services.dispatch import Candidate, OpenRequest
+
+    rng = random.Random(seed_value)
+    candidates = []
+    for i in range(n_ragpickers):
+        latitude, longitude = random_point(rng, radius_km)
+        candidates.append(Candidate(
+            f"user_{i}", latitude, longitude,
+            load=rng.randrange(max_load), rating=round(rng.uniform(1, 5), 2), rejections=rng.choice((0, 0, 0, 1, 2)),
+        ))
+    requests = []
+    for i in range(n_requests):
+        latitude, longitude = random_point(rng, radius_km)
+        # A few requests were already declined by a random ragpicker
+        excluded = frozenset({f"user_{rng.randrange(n_ragpickers)}"}) if rng.random() < 0.1 else frozenset()
+        requests.append(OpenRequest(i + 1, latitude, longitude, excluded))
+    return requests, candidates
+
+
+def nearest_baseline(requests, candidates, max_distance_km: float, max_load: int):
+    from app.services.geo import haversine_km
+
+    assignments = {}
+    for request in requests:
+        best, best_distance = None, max_distance_km
+        for candidate in candidates:
+            if candidate.load >= max_load or candidate.clerk_id in request.excluded:
+                continue
+            distance = haversine_km(request.latitude, request.longitude, candidate.latitude, candidate.longitude)
+            if distance <= best_distance:
+                best, best_distance = candidate, distance
+        if best is not None:
+            assignments[request.id] = best.clerk_id
+            best.load += 1
+    return assignments
+
+
+def describe(name, assignments, requests, candidates, elapsed):
+    from app.services.geo import haversine_km
+
+    by_id = {candidate.clerk_id: candidate for candidate in candidates}
+    distances = [
+        haversine_km(request.latitude, request.longitude, by_id[assignments[request.id]].latitude,
+                     by_id[assignments[request.id]].longitude)
+        for request in requests if request.id in assignments
+    ]
+    ratings = [by_id[clerk_id].rating for clerk_id in assignments.values()]
+    loads = [candidate.load for candidate in candidates]
+    print(f"{name:<10} {len(assignments):>8} {len(requests) - len(assignments):>10} {elapsed * 1000:>10.1f} "
+          f"{len(assignments) / elapsed if elapsed else 0:>12.0f} "
+          f"{statistics.mean(distances) if distances else 0:>8.2f} "
+          f"{statistics.mean(ratings) if ratings else 0:>8.2f} {max(loads):>6}")
+
+
+def run_in_memory(args):
+    from app.services.dispatch import assign
+
+    header = f"{'matcher':<10} {'assigned':>8} {'unassigned':>10} {'ms':>10} {'assigned/s':>12} {'mean km':>8} {'rating':>8} {'load':>6}"
+    print(header)
+    print("-" * len(header))
+
+    requests, candidates = make_population(args.requests, args.ragpickers, args.radius, args.max_load, args.seed)
+    started = time.perf_counter()
+    assignments = assign(requests, candidates, args.max_distance, args.max_load)
+    describe("greedy", assignments, requests, candidates, time.perf_counter() - started)
+
+    if not args.skip_baseline:
+        requests, candidates = make_population(args.requests, args.ragpickers, args.radius, args.max_load, args.seed)
+        started = time.perf_counter()
+        assignments = nearest_baseline(requests, candidates, args.max_distance, args.max_load)
+        describe("nearest", assignments, requests, candidates, time.perf_counter() - started)
+
+
+def seed_database(url: str, args):
+    """Located customers and ragpickers plus args.requests unassigned PENDING requests"""
+    from datetime import datetime, timedelta
+    from sqlalchemy import create_engine
+    from app.db.database import Base
+    from app.models.user import User, UserDetails, RagpickerDetails, Requests
+    from app.services.geo import encode_geohash
+    from benchmarks.seed import sync_url
+
+    requests, candidates = make_population(args.requests, args.ragpickers, args.radius, args.max_load, args.seed)
+    now = datetime.utcnow()
+    engine = create_engine(sync_url(url), future=True)
+    with engine.begin() as conn:
+        Base.metadata.drop_all(conn)
+        Base.metadata.create_all(conn)
+        conn.execute(User.__table__.insert(), [
+            {"clerkId": candidate.clerk_id, "email": f"{candidate.clerk_id}@example.com", "firstName": "Rag",
+             "lastName": candidate.clerk_id, "role": "RAGPICKER"}
+            for candidate in candidates
+        ] + [
+            {"clerkId": f"customer_{request.id}", "email": f"customer_{request.id}@example.com", "firstName": "Cust",
+             "lastName": str(request.id), "role": "CUSTOMER"}
+            for request in requests
+        ])
+        conn.execute(UserDetails.__table__.insert(), [
+            {"clerkId": candidate.clerk_id, "address": "bench", "latitude": candidate.latitude,
+             "longitude": candidate.longitude, "geohash": encode_geohash(candidate.latitude, candidate.longitude)}
+            for candidate in candidates
+        ] + [
+            {"clerkId": f"customer_{request.id}", "address": f"{request.id} Example Street", "latitude": request.latitude,
+             "longitude": request.longitude, "geohash": encode_geohash(request.latitude, request.longitude)}
+            for request in requests
+        ])
+        conn.execute(RagpickerDetails.__table__.insert(), [
+            {"clerkId": candidate.clerk_id, "average_rating": candidate.rating} for candidate in candidates
+        ])
+        # Existing load as ACCEPTED requests from the first customer
+        conn.execute(Requests.__table__.insert(), [
+            {"customer_clerkId": "customer_1", "ragpicker_clerkId": candidate.clerk_id, "status": "ACCEPTED",
+             "auto_dispatch": False, "dispatch_attempts": 0, "created_at": now - timedelta(days=1)}
+            for candidate in candidates for _ in range(candidate.load)
+        ])
+        conn.execute(Requests.__table__.insert(), [
+            {"customer_clerkId": f"customer_{request.id}", "ragpicker_clerkId": None, "status": "PENDING",
+             "auto_dispatch": True, "dispatch_attempts": 0, "created_at": now - timedelta(seconds=args.requests - i)}
+            for i, request in enumerate(requests)
+        ])
+    engine.dispose()
+
+
+async def dispatch_all(batch_size: int):
+    from app.db.database import async_session_factory, async_engine
+    from app.services.dispatch import dispatch_pending
+
+    batches = []
+    while True:
+        started = time.perf_counter()
+        async with async_session_factory() as db:
+            assignments, requests = await dispatch_pending(db, batch_size)
+            await db.commit()
+        batches.append((len(requests), len(assignments), time.perf_counter() - started))
+        # Stop once a batch makes no progress: what is left has no ragpicker in reach
+        if not assignments:
+            break
+    await async_engine.dispose()
+    return batches
+
+
+def run_database(args, url: str):
+    started = time.perf_counter()
+    seed_database(url, args)
+    print(f"\nSeeded {args.requests} open requests and {args.ragpickers} ragpickers in {time.perf_counter() - started:.1f}s")
+
+    batches = asyncio.run(dispatch_all(args.batch_size))
+    assigned = sum(batch[1] for batch in batches)
+    elapsed = sum(batch[2] for batch in batches)
+    print(f"dispatch_pending: {assigned} assigned in {len(batches)} batches of up to {args.batch_size}, "
+          f"{elapsed:.2f}s ({assigned / elapsed:.0f} assigned/s), "
+          f"slowest batch {max(batch[2] for batch in batches) * 1000:.0f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="open requests")
+    parser.add_argument("--ragpickers", type=int, default=2000)
+    parser.add_argument("--radius", type=float, default=15.0, help="city radius in km")
+    parser.add_argument("--max-distance", type=float, default=10.0, help="furthest assignment in km")
+    parser.add_argument("--max-load", type=int, default=5, help="open requests per ragpicker")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-baseline", action="store_true", help="skip the O(requests x ragpickers) baseline")
+    parser.add_argument("--db", action="store_true", help="also time dispatch_pending against a seeded database")
+    parser.add_argument("--url", help="async SQLAlchemy URL of a throwaway database for --db (default: temporary SQLite file)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    # Config is read on import, so the settings must be in place before any app module loads
+    url = args.url or "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(prefix="ww-dispatch-"), "dispatch.db")
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("ENVIRONMENT", "testing")
+    os.environ["DISPATCH_MAX_DISTANCE_KM"] = str(args.max_distance)
+    os.environ["DISPATCH_MAX_LOAD"] = str(args.max_load)
+
+    run_in_memory(args)
+    if args.db:
+        run_database(args, url)
+
+
+if __name__ == "__main__":
+    main()
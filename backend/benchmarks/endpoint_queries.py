@@ -0,0 +1,53 @@
+"""
+Count the SQL statements and commits each write endpoint issues, so extra
+round trips (re-reads after commit, refreshes, second commits) show up in review.
+
+Runs tests/test_query_budgets.py, which holds the scenarios and budgets and
+fails when an endpoint goes over its budget, and prints what each endpoint
+measured.
+
+Run from the backend directory:
+
+    python -m benchmarks.endpoint_queries
+    python -m benchmarks.endpoint_queries --check
+"""
+import argparse
+import os
+import sys
+
+import pytest
+
+TEST_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "test_query_budgets.py")
+
+
+class MeasurementTable:
+    """Collects the counts the test records with record_property"""
+    def __init__(self):
+        self.rows = []
+
+    def pytest_runtest_logreport(self, report):
+        properties = dict(report.user_properties)
+        if report.when == "call" and "endpoint" in properties:
+            self.rows.append((properties, report.outcome))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="exit non-zero if an endpoint exceeds its budget")
+    args = parser.parse_args()
+
+    table = MeasurementTable()
+    exit_code = pytest.main([TEST_PATH, "-q", "-p", "no:cacheprovider"], plugins=[table])
+
+    print(f"\n{'endpoint':<42} {'status':>6} {'stmts':>6} {'commits':>8} {'db ms':>8}")
+    for properties, outcome in table.rows:
+        print(f"{properties['endpoint']:<42} {properties['status']:>6} {properties['statements']:>6} "
+              f"{properties['commits']:>8} {properties['db_ms']:>8.2f}"
+              f"{'  over budget' if outcome == 'failed' else ''}")
+
+    if args.check:
+        sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
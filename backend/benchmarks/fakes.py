@@ -0,0 +1,66 @@
+"""
+In-process stand-ins for S3, Twilio and Clerk so benchmarks never touch the
+network. Each fake can add a fixed latency to approximate the real service.
+"""
+import json
+import threading
+import time
+
+
+class FakeS3Client:
+    """
+    Implements the two boto3 S3 client calls the app makes
+    """
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.objects = {}
+        self._lock = threading.Lock()
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.objects[(bucket, key)] = fileobj.read()
+
+    def delete_object(self, Bucket, Key):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.objects.pop((Bucket, Key), None)
+        return {}
+
+
+def clerk_transport(latency: float = 0.0):
+    """
+    httpx transport answering Clerk user lookups and role updates for any user
+    """
+    import asyncio
+    import httpx
+
+    async def handle(request: "httpx.Request") -> "httpx.Response":
+        if latency:
+            await asyncio.sleep(latency)
+        clerk_id = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+        user = {"id": clerk_id, "public_metadata": {}}
+        if request.method == "PATCH" and request.content:
+            user.update(json.loads(request.content))
+        return httpx.Response(200, json=user)
+
+    return httpx.MockTransport(handle)
+
+
+def install_fakes(s3_latency: float = 0.0, sms_latency: float = 0.0, clerk_latency: float = 0.0):
+    """
+    Point the app's S3 client, SMS transport and Clerk client at the fakes.
+    Call after importing the app and before sending requests.
+    """
+    from app.services import s3
+    from app.services.clerk import clerk_client
+    from app.services.notifications import FakeTransport
+    from app.services.twilio_service import twilio_service
+
+    s3._s3_client = FakeS3Client(s3_latency)
+    twilio_service.outbox.transport = FakeTransport(latency=sms_latency)
+    clerk_client.secret_key = "sk_bench"
+    clerk_client.transport = clerk_transport(clerk_latency)
+    clerk_client._client = None
@@ -0,0 +1,247 @@
+"""
+Load test the hot API endpoints in-process against a seeded local database.
+
+The FastAPI app is driven through httpx's ASGI transport by --concurrency
+concurrent clients for --duration seconds, with a weighted mix of request,
+sensor, ragpicker and review calls. S3, Twilio and Clerk are replaced by the
+fakes in benchmarks/fakes.py. Reports throughput, p50/p95/p99 latency and SQL
+statements per request (from the Server-Timing header) for every endpoint.
+
+Run from the backend directory:
+
+    python -m benchmarks.load_test --scale 0.05 --duration 15
+    python -m benchmarks.load_test --url postgresql+asyncpg://localhost/waste_whirl_bench --concurrency 32
+    python -m benchmarks.load_test --url sqlite+aiosqlite:////tmp/bench.db --skip-seed --json
+
+SQLite serialises writers, so write-heavy mixes at high concurrency measure
+lock waits more than the app; use a local Postgres for those.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+# (scenario, weight); each scenario may issue more than one call
+SCENARIO_WEIGHTS = [
+    ("list_requests", 15),
+    ("get_request", 15),
+    ("customer_requests", 10),
+    ("ragpicker_requests", 5),
+    ("all_ragpickers", 10),
+    ("ragpicker_reviews", 10),
+    ("create_review", 5),
+    ("request_lifecycle", 10),
+    ("bin_cycle", 20),
+]
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class Results:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_samples = {}
+
+    def record(self, name: str, response, elapsed: float):
+        self.latencies[name].append(elapsed)
+        match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+        if match:
+            self.queries[name].append(int(match.group(1)))
+        if response.status_code >= 400:
+            self.errors[name] += 1
+            self.error_samples.setdefault(name, f"{response.status_code} {response.text[:120]}")
+
+
+class LoadContext:
+    """What the scenarios need to know about the seeded data"""
+    def __init__(self, volumes: dict, concurrency: int):
+        from benchmarks import seed as seeding
+
+        self.seeding = seeding
+        self.users = volumes["users"]
+        self.customers = [i for i in range(self.users) if not seeding.is_ragpicker(i)]
+        self.ragpickers = [i for i in range(self.users) if seeding.is_ragpicker(i)]
+        self.max_request_id = volumes["requests"]
+        # Each client owns a disjoint set of bins so sensor cycles never conflict
+        sensors = list(range(volumes["sensors"]))
+        self.bins_by_worker = [sensors[worker::concurrency] for worker in range(concurrency)]
+
+
+async def call(client, results, name, method, url, **kwargs):
+    started = time.perf_counter()
+    response = await client.request(method, url, **kwargs)
+    results.record(name, response, time.perf_counter() - started)
+    return response
+
+
+async def run_scenario(scenario, client, results, ctx: LoadContext, rng: random.Random, worker: int, state: dict):
+    s = ctx.seeding
+    if scenario == "list_requests":
+        await call(client, results, "GET /requests/?cursor", "GET", "/requests/", params={"cursor": "", "limit": 20})
+    elif scenario == "get_request":
+        await call(client, results, "GET /requests/{id}", "GET", f"/requests/{rng.randint(1, ctx.max_request_id)}")
+    elif scenario == "customer_requests":
+        customer = s.clerk_id(rng.choice(ctx.customers))
+        await call(client, results, "GET /requests/customer/{id}", "GET", f"/requests/customer/{customer}")
+    elif scenario == "ragpicker_requests":
+        ragpicker = s.clerk_id(rng.choice(ctx.ragpickers))
+        await call(client, results, "GET /requests/ragpicker/{id}", "GET", f"/requests/ragpicker/{ragpicker}")
+    elif scenario == "all_ragpickers":
+        await call(client, results, "GET /ragpickers/all-ragpickers", "GET", "/ragpickers/all-ragpickers",
+                   params={"limit": 50})
+    elif scenario == "ragpicker_reviews":
+        ragpicker = s.clerk_id(rng.choice(ctx.ragpickers))
+        await call(client, results, "GET /reviews/ragpicker/{id}", "GET", f"/reviews/ragpicker/{ragpicker}")
+    elif scenario == "create_review":
+        await call(client, results, "POST /reviews/", "POST", "/reviews/", json={
+            "customer_clerkId": s.clerk_id(rng.choice(ctx.customers)),
+            "ragpicker_clerkId": s.clerk_id(rng.choice(ctx.ragpickers)),
+            "rating": rng.randint(1, 5),
+            "review": "bench",
+        })
+    elif scenario == "request_lifecycle":
+        response = await call(client, results, "POST /requests/", "POST", "/requests/", json={
+            "customer_clerkId": s.clerk_id(rng.choice(ctx.customers)),
+            "ragpicker_clerkId": s.clerk_id(rng.choice(ctx.ragpickers)),
+        })
+        if response.status_code == 201:
+            request_id = response.json()["id"]
+            await call(client, results, "PUT /requests/{id}/status", "PUT", f"/requests/{request_id}/status",
+                       json={"status": "ACCEPTED"})
+    elif scenario == "bin_cycle":
+        bins = ctx.bins_by_worker[worker]
+        if not bins:
+            return
+        state["bin"] = (state.get("bin", -1) + 1) % len(bins)
+        bin_id = s.sensor_id(bins[state["bin"]])
+        full = await call(client, results, "POST /sensors/update-status", "POST", "/sensors/update-status",
+                          json={"sensor_id": bin_id, "status": True})
+        if full.status_code != 200:
+            return
+        scanned = await call(client, results, "POST /sensors/rfid", "POST", "/sensors/rfid",
+                             json={"sensor_id": bin_id, "rfid": s.rfid(rng.choice(ctx.ragpickers))})
+        if scanned.status_code != 200:
+            return
+        await call(client, results, "POST /sensors/update-status", "POST", "/sensors/update-status",
+                   json={"sensor_id": bin_id, "status": False})
+
+
+async def worker_loop(worker, app, results, ctx, deadline, seed_value):
+    import httpx
+
+    rng = random.Random(seed_value + worker)
+    names = [name for name, _ in SCENARIO_WEIGHTS]
+    weights = [weight for _, weight in SCENARIO_WEIGHTS]
+    state = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        while time.perf_counter() < deadline:
+            scenario = rng.choices(names, weights)[0]
+            await run_scenario(scenario, client, results, ctx, rng, worker, state)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(results: Results, elapsed: float) -> dict:
+    summary = {}
+    for name in sorted(results.latencies):
+        latencies = results.latencies[name]
+        queries = results.queries.get(name) or [0]
+        summary[name] = {
+            "count": len(latencies),
+            "errors": results.errors.get(name, 0),
+            "rps": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "queries_avg": round(statistics.mean(queries), 2),
+            "queries_max": max(queries),
+        }
+    return summary
+
+
+def print_report(summary: dict, elapsed: float, results: Results):
+    header = f"{'endpoint':<34} {'count':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'q/req':>6} {'q max':>6}"
+    print(header)
+    print("-" * len(header))
+    for name, row in summary.items():
+        print(f"{name:<34} {row['count']:>7} {row['errors']:>5} {row['rps']:>8.1f} {row['p50_ms']:>8.2f} "
+              f"{row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['queries_avg']:>6.1f} {row['queries_max']:>6}")
+    total = sum(row["count"] for row in summary.values())
+    errors = sum(row["errors"] for row in summary.values())
+    print(f"\n{total} calls in {elapsed:.1f}s ({total / elapsed:.1f} req/s), {errors} errors")
+    for name, sample in results.error_samples.items():
+        print(f"  {name}: {sample}")
+
+
+async def run_load(app, ctx, concurrency, duration, seed_value):
+    results = Results()
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        worker_loop(worker, app, results, ctx, deadline, seed_value) for worker in range(concurrency)
+    ))
+    return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Async SQLAlchemy URL of a throwaway database (default: temporary SQLite file)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for the seeded volumes")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse an already seeded database at --url (same --scale)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sms-latency", type=float, default=0.2, help="simulated Twilio latency (s)")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args()
+
+    url = args.url or "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(prefix="ww-load-"), "load.db")
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("ENVIRONMENT", "testing")
+    os.environ["NOTIFICATION_TRANSPORT"] = "fake"
+    os.environ["QUERY_STATS_LOG_ENABLED"] = "false"
+    os.environ.setdefault("SLOW_QUERY_THRESHOLD_MS", "1000")
+    logging.basicConfig(level=logging.WARNING)
+
+    from benchmarks import seed as seeding
+    from benchmarks.fakes import install_fakes
+
+    log = (lambda message: print(message, file=sys.stderr)) if args.json else print
+    if args.skip_seed:
+        volumes = seeding.scaled_volumes(args.scale)
+    else:
+        volumes = seeding.seed(url, args.scale, args.seed, log=log)
+
+    import main as app_main
+    logging.getLogger().setLevel(logging.WARNING)
+    from app.services.twilio_service import twilio_service
+    install_fakes(sms_latency=args.sms_latency)
+
+    ctx = LoadContext(volumes, args.concurrency)
+    log(f"Running {args.concurrency} clients for {args.duration:.0f}s ...")
+    results, elapsed = asyncio.run(run_load(app_main.app, ctx, args.concurrency, args.duration, args.seed))
+    twilio_service.outbox.close(5)
+
+    summary = summarize(results, elapsed)
+    if args.json:
+        print(json.dumps({"elapsed_s": round(elapsed, 2), "volumes": volumes, "endpoints": summary}, indent=2))
+    else:
+        print_report(summary, elapsed, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Measure what SMS notifications cost a request handler, sending inline versus
+through the notification outbox, using a fake transport with simulated Twilio
+latency so nothing leaves the machine.
+
+Run from the backend directory:
+
+    python -m benchmarks.notifications
+    python -m benchmarks.notifications --messages 2000 --recipients 50 --latency 0.3 --failure-rate 0.05
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("NOTIFICATION_TRANSPORT", "fake")
+
+from app.services.notifications import NotificationOutbox, FakeTransport
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def inline_run(messages, recipients, transport):
+    """The old behaviour: the blocking send runs on the event loop"""
+    handler_times = []
+    start = time.perf_counter()
+    for i in range(messages):
+        t = time.perf_counter()
+        try:
+            transport.send(f"+91{i % recipients:010d}", f"Bin {i} is full")
+        except Exception:
+            pass
+        handler_times.append(time.perf_counter() - t)
+    return time.perf_counter() - start, handler_times
+
+
+async def outbox_run(messages, recipients, outbox):
+    handler_times = []
+    start = time.perf_counter()
+    for i in range(messages):
+        t = time.perf_counter()
+        outbox.enqueue(f"+91{i % recipients:010d}", f"Bin {i} is full")
+        handler_times.append(time.perf_counter() - t)
+        # Let other handlers run, as they would between requests
+        await asyncio.sleep(0)
+    await asyncio.to_thread(outbox.flush)
+    return time.perf_counter() - start, handler_times
+
+
+def report(name, total, handler_times, sent):
+    print(f"{name}")
+    print(f"  total {total:.2f}s, {len(handler_times) / total:.0f} notifications/s, {sent} SMS sent")
+    print(f"  time in handler p50 {percentile(handler_times, 50) * 1000:.3f}ms "
+          f"p99 {percentile(handler_times, 99) * 1000:.3f}ms "
+          f"mean {statistics.mean(handler_times) * 1000:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--recipients", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated Twilio round trip in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--coalesce", type=float, default=0.5, help="Coalescing window in seconds")
+    parser.add_argument("--skip-inline", action="store_true", help="Skip the slow inline baseline")
+    args = parser.parse_args()
+
+    if not args.skip_inline:
+        transport = FakeTransport(latency=args.latency, failure_rate=args.failure_rate)
+        total, handler_times = asyncio.run(inline_run(args.messages, args.recipients, transport))
+        report("inline send", total, handler_times, len(transport.sent))
+
+    transport = FakeTransport(latency=args.latency, failure_rate=args.failure_rate)
+    outbox = NotificationOutbox(
+        transport,
+        workers=args.workers,
+        backoff=0.05,
+        coalesce_window=args.coalesce
+    )
+    total, handler_times = asyncio.run(outbox_run(args.messages, args.recipients, outbox))
+    outbox.close()
+    report("outbox", total, handler_times, len(transport.sent))
+    print(f"  stats {outbox.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Compare query plans and timings of the hot lookups before and after the
+indexes added in migration a71e9c3b5d02.
+
+Run from the backend directory against a throwaway database (all tables are
+dropped and recreated):
+
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --url postgresql+psycopg2://localhost/waste_whirl_bench
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, select, text
+from app.db.database import Base
+from app.models.user import User, RagpickerDetails, Reviews, Requests, RagpickerApplication
+from app.models.sensor import Sensor, SensorLog
+
+# Indexes introduced for the hot lookups, dropped for the "before" run
+HOT_LOOKUP_INDEXES = [
+    "ix_requests_customer_clerkId_status_created_at",
+    "ix_requests_ragpicker_clerkId_status_created_at",
+    "ix_sensor_logs_sensor_id_sensor_status_timestamp",
+    "ix_sensor_logs_active_sensor_id_timestamp",
+    "ix_ragpicker_details_RFID",
+    "ix_reviews_ragpicker_clerkId_created_at",
+    "ix_ragpicker_applications_status",
+]
+
+STATUSES = ["PENDING", "ACCEPTED", "REJECTED", "COMPLETED"]
+
+
+def hot_queries():
+    """The lookups issued by the request, sensor, review and admin endpoints"""
+    return {
+        "requests by customer + status": select(Requests)
+            .where(Requests.customer_clerkId == "user_10", Requests.status == "ACCEPTED")
+            .order_by(Requests.created_at.desc()),
+        "requests by ragpicker + status": select(Requests)
+            .where(Requests.ragpicker_clerkId == "user_11", Requests.status == "PENDING")
+            .order_by(Requests.created_at.desc()),
+        "active sensor log": select(SensorLog)
+            .where(SensorLog.sensor_id == "bin_7", SensorLog.sensor_status == True)
+            .order_by(SensorLog.timestamp.desc())
+            .limit(1),
+        "ragpicker by RFID": select(RagpickerDetails).where(RagpickerDetails.RFID == "rfid_42"),
+        "reviews for ragpicker": select(Reviews)
+            .where(Reviews.ragpicker_clerkId == "user_11")
+            .order_by(Reviews.created_at.desc()),
+        "pending applications": select(RagpickerApplication).where(RagpickerApplication.status == "PENDING"),
+    }
+
+
+def seed(conn, users: int, requests: int, sensors: int, sensor_logs: int, reviews: int):
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    clerk_ids = [f"user_{i}" for i in range(users)]
+
+    conn.execute(User.__table__.insert(), [
+        {"clerkId": clerk_id, "email": f"{clerk_id}@example.com", "firstName": "First", "lastName": str(i),
+         "role": "RAGPICKER" if i % 2 else "CUSTOMER", "createdAt": now - timedelta(minutes=i)}
+        for i, clerk_id in enumerate(clerk_ids)
+    ])
+    conn.execute(RagpickerDetails.__table__.insert(), [
+        {"clerkId": clerk_id, "wallet_address": None, "RFID": f"rfid_{i}", "average_rating": 0.0}
+        for i, clerk_id in enumerate(clerk_ids) if i % 2
+    ])
+    conn.execute(Requests.__table__.insert(), [
+        {"customer_clerkId": rng.choice(clerk_ids), "ragpicker_clerkId": rng.choice(clerk_ids),
+         "status": rng.choice(STATUSES), "created_at": now - timedelta(seconds=i)}
+        for i in range(requests)
+    ])
+    conn.execute(Reviews.__table__.insert(), [
+        {"customer_clerkId": rng.choice(clerk_ids), "ragpicker_clerkId": rng.choice(clerk_ids),
+         "rating": rng.randint(1, 5), "review": "ok", "created_at": now - timedelta(seconds=i)}
+        for i in range(reviews)
+    ])
+    conn.execute(RagpickerApplication.__table__.insert(), [
+        {"clerk_id": clerk_id, "document_url": "", "notes": "", "status": "PENDING" if i % 50 == 0 else "ACCEPTED",
+         "created_at": now}
+        for i, clerk_id in enumerate(clerk_ids)
+    ])
+    conn.execute(Sensor.__table__.insert(), [
+        {"sensor_id": f"bin_{i}", "sensor_name": f"Bin {i}", "location": "", "sensor_status": False}
+        for i in range(sensors)
+    ])
+    # Almost every log is closed; only the newest log of some bins is still active
+    conn.execute(SensorLog.__table__.insert(), [
+        {"sensor_id": f"bin_{i % sensors}", "RFID": None, "sensor_status": i >= sensor_logs - sensors // 10,
+         "timestamp": now - timedelta(seconds=sensor_logs - i)}
+        for i in range(sensor_logs)
+    ])
+
+
+def explain(conn, stmt) -> str:
+    sql = str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return "\n".join(row[-1] for row in rows)
+    rows = conn.execute(text(f"EXPLAIN ANALYZE {sql}")).all()
+    return "\n".join(row[0] for row in rows)
+
+
+def time_query(conn, stmt, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(stmt).all()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def report(conn, label: str, repeat: int):
+    print(f"\n=== {label} ===")
+    timings = {}
+    for name, stmt in hot_queries().items():
+        timings[name] = time_query(conn, stmt, repeat)
+        print(f"\n-- {name}: {timings[name]:.3f} ms (median of {repeat})")
+        print(explain(conn, stmt))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Sync SQLAlchemy URL of a throwaway database (default: temporary SQLite file)")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--sensors", type=int, default=500)
+    parser.add_argument("--sensor-logs", type=int, default=300000)
+    parser.add_argument("--reviews", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    url = args.url or "sqlite:///" + os.path.join(tempfile.gettempdir(), "waste_whirl_query_plans.db")
+    engine = create_engine(url, future=True)
+
+    indexes = [
+        index
+        for table in Base.metadata.tables.values()
+        for index in table.indexes
+        if index.name in HOT_LOOKUP_INDEXES
+    ]
+
+    with engine.begin() as conn:
+        Base.metadata.drop_all(conn)
+        Base.metadata.create_all(conn)
+        for index in indexes:
+            index.drop(conn)
+        print(f"Seeding {url} ...")
+        seed(conn, args.users, args.requests, args.sensors, args.sensor_logs, args.reviews)
+
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+        before = report(conn, "before", args.repeat)
+
+    with engine.begin() as conn:
+        for index in indexes:
+            index.create(conn)
+        conn.execute(text("ANALYZE"))
+        after = report(conn, "after", args.repeat)
+
+    print("\n=== summary (median ms) ===")
+    for name in before:
+        speedup = before[name] / after[name] if after[name] else float("inf")
+        print(f"{name:<32} {before[name]:>10.3f} {after[name]:>10.3f}  x{speedup:.1f}")
+
+
+if __name__ == "__main__":
+    main()
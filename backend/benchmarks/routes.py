@@ -0,0 +1,57 @@
+"""
+Time collection route planning for growing numbers of full bins.
+
+Bins are scattered uniformly over a city-sized disc with the depot at its
+centre. For each size the report shows the time to plan a route with
+app.services.routing.plan_route, the nearest-neighbour route length and how
+much 2-opt shortens it.
+
+Run from the backend directory:
+
+    python -m benchmarks.routes
+    python -m benchmarks.routes --sizes 100 500 1000 --round-trip
+"""
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.dispatch import CENTER, random_point
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 100, 200, 500])
+    parser.add_argument("--radius", type=float, default=15.0, help="city radius in km")
+    parser.add_argument("--runs", type=int, default=5, help="random layouts per size")
+    parser.add_argument("--round-trip", action="store_true", help="return to the depot")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from app.services.routing import distance_matrix, nearest_neighbour_tour, path_length, plan_route
+
+    header = f"{'bins':>6} {'p50 ms':>8} {'max ms':>8} {'NN km':>9} {'2-opt km':>9} {'saved':>7}"
+    print(header)
+    print("-" * len(header))
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        timings, nn_lengths, lengths = [], [], []
+        for _ in range(args.runs):
+            bins = [random_point(rng, args.radius) for _ in range(size)]
+            started = time.perf_counter()
+            _, _, total, _ = plan_route(CENTER, bins, args.round_trip)
+            timings.append(time.perf_counter() - started)
+            lengths.append(total)
+
+            points = [CENTER, *bins]
+            tour = nearest_neighbour_tour(distance_matrix(points))
+            if args.round_trip:
+                tour.append(0)
+            nn_lengths.append(path_length(distance_matrix(points), tour))
+        nn, opt = statistics.mean(nn_lengths), statistics.mean(lengths)
+        print(f"{size:>6} {statistics.median(timings) * 1000:>8.1f} {max(timings) * 1000:>8.1f} "
+              f"{nn:>9.1f} {opt:>9.1f} {(nn - opt) / nn * 100:>6.1f}%")
+
+
+if __name__ == "__main__":
+    main()
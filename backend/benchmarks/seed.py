@@ -0,0 +1,177 @@
+"""
+Seed a throwaway database with realistic volumes for the load and simulation
+benchmarks. Volumes are multiplied by --scale; 1.0 gives 10k users, 1M
+sensor logs, 200k requests and 500k reviews.
+
+Timestamps are always set explicitly: SQLite's CURRENT_TIMESTAMP has one
+second resolution, so relying on server defaults would give thousands of rows
+the same created_at and make keyset pages degenerate.
+
+Run from the backend directory (all tables are dropped and recreated):
+
+    python -m benchmarks.seed --url sqlite:////tmp/waste_whirl_bench.db --scale 0.1
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+
+VOLUMES = {
+    "users": 10_000,
+    "sensors": 2_000,
+    "sensor_logs": 1_000_000,
+    "requests": 200_000,
+    "reviews": 500_000,
+}
+
+# Every RAGPICKER_EVERY-th user is a ragpicker, the rest are customers
+RAGPICKER_EVERY = 3
+COMPANY_ID = 1
+CHUNK_SIZE = 20_000
+STATUSES = ["PENDING", "ACCEPTED", "REJECTED", "COMPLETED"]
+
+
+def scaled_volumes(scale: float) -> dict:
+    return {name: max(1, int(count * scale)) for name, count in VOLUMES.items()}
+
+
+def sync_url(url: str) -> str:
+    """Synchronous driver URL for an app (async) database URL"""
+    return url.replace("sqlite+aiosqlite", "sqlite").replace("postgresql+asyncpg", "postgresql+psycopg2")
+
+
+def clerk_id(i: int) -> str:
+    return f"user_{i}"
+
+
+def is_ragpicker(i: int) -> bool:
+    return i % RAGPICKER_EVERY == 0
+
+
+def rfid(i: int) -> str:
+    return f"rfid_{i}"
+
+
+def sensor_id(i: int) -> str:
+    return f"bin_{i}"
+
+
+def _insert_chunked(conn, table, rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            conn.execute(table.insert(), chunk)
+            chunk = []
+    if chunk:
+        conn.execute(table.insert(), chunk)
+
+
+def seed(url: str, scale: float = 1.0, seed_value: int = 42, log=print) -> dict:
+    """
+    Drop and recreate all tables at `url` and fill them. Returns the volumes used.
+    """
+    from app.db.database import Base
+    from app.models.user import (
+        User, UserDetails, CustomerDetails, RagpickerDetails, Balances, CompanyBalances, Reviews, Requests
+    )
+    from app.models.sensor import Sensor, SensorLog
+
+    volumes = scaled_volumes(scale)
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    users = volumes["users"]
+    customers = [i for i in range(users) if not is_ragpicker(i)]
+    ragpickers = [i for i in range(users) if is_ragpicker(i)]
+    sensors = volumes["sensors"]
+
+    engine = create_engine(sync_url(url), future=True)
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        Base.metadata.drop_all(conn)
+        Base.metadata.create_all(conn)
+
+        log(f"Seeding {volumes} ...")
+        _insert_chunked(conn, User.__table__, (
+            {"clerkId": clerk_id(i), "email": f"{clerk_id(i)}@example.com", "firstName": "First",
+             "lastName": str(i), "role": "RAGPICKER" if is_ragpicker(i) else "CUSTOMER",
+             "createdAt": now - timedelta(minutes=i)}
+            for i in range(users)
+        ))
+        _insert_chunked(conn, UserDetails.__table__, (
+            {"clerkId": clerk_id(i), "phone": f"+91{9000000000 + i}", "address": f"{i} Example Street",
+             "bio": None, "profile_pic_url": None}
+            for i in range(users)
+        ))
+        _insert_chunked(conn, CustomerDetails.__table__, (
+            {"clerkId": clerk_id(i), "wallet_address": f"0xc{i}"} for i in customers
+        ))
+        _insert_chunked(conn, Balances.__table__, (
+            {"clerkId": clerk_id(i), "balance": 1_000_000.0} for i in range(users)
+        ))
+        conn.execute(CompanyBalances.__table__.insert(), [
+            {"id": COMPANY_ID, "company_name": "Bench Co", "company_password": "", "balance": 1e12}
+        ])
+
+        _insert_chunked(conn, Requests.__table__, (
+            {"customer_clerkId": clerk_id(rng.choice(customers)), "ragpicker_clerkId": clerk_id(rng.choice(ragpickers)),
+             "status": rng.choice(STATUSES), "smart_contract_address": None,
+             "created_at": now - timedelta(seconds=i), "updated_at": None}
+            for i in range(volumes["requests"])
+        ))
+
+        rating_totals = {}
+
+        def review_rows():
+            for i in range(volumes["reviews"]):
+                ragpicker = rng.choice(ragpickers)
+                rating = rng.randint(1, 5)
+                total, count = rating_totals.get(ragpicker, (0.0, 0))
+                rating_totals[ragpicker] = (total + rating, count + 1)
+                yield {"customer_clerkId": clerk_id(rng.choice(customers)), "ragpicker_clerkId": clerk_id(ragpicker),
+                       "rating": rating, "review": "ok", "created_at": now - timedelta(seconds=i)}
+
+        _insert_chunked(conn, Reviews.__table__, review_rows())
+        _insert_chunked(conn, RagpickerDetails.__table__, (
+            {"clerkId": clerk_id(i), "wallet_address": f"0xr{i}", "RFID": rfid(i),
+             "average_rating": round(rating_totals[i][0] / rating_totals[i][1], 2) if i in rating_totals else 0.0,
+             "rating_sum": rating_totals.get(i, (0.0, 0))[0], "rating_count": rating_totals.get(i, (0.0, 0))[1]}
+            for i in ragpickers
+        ))
+
+        # Every bin starts empty with a history of closed (emptied) logs
+        _insert_chunked(conn, Sensor.__table__, (
+            {"sensor_id": sensor_id(i), "sensor_name": f"Bin {i}", "location": f"Ward {i % 50}",
+             "sensor_status": False, "company_id": COMPANY_ID}
+            for i in range(sensors)
+        ))
+        sensor_logs = volumes["sensor_logs"]
+        _insert_chunked(conn, SensorLog.__table__, (
+            {"sensor_id": sensor_id(i % sensors), "RFID": rfid(rng.choice(ragpickers)), "sensor_status": False,
+             "timestamp": now - timedelta(seconds=sensor_logs - i)}
+            for i in range(sensor_logs)
+        ))
+
+        if conn.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE"))
+    engine.dispose()
+
+    log(f"Seeded in {time.perf_counter() - started:.1f}s")
+    return volumes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="SQLAlchemy URL of a throwaway database (sync or async driver)")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    seed(args.url, args.scale, args.seed)
+
+
+if __name__ == "__main__":
+    main()
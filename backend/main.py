@@ -1,11 +1,10 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from mangum import Mangum
 import os
+import asyncio
 from fastapi import HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.requests import Request
 import logging
 from app.api.api import api_router
@@ -13,6 +12,16 @@ from app.api.admin import router as admin_router
 from app.api.endpoints.sensors import router as sensor_router
 from app.api.templates import router as templates_router
 from app.core.config import ENVIRONMENT, PROJECT_NAME, API_V1_STR, DATABASE_URL
+from app.core.config import NOTIFICATION_FLUSH_TIMEOUT_SECONDS
+from app.core.middleware import query_stats_middleware, metrics_middleware
+from app.core.metrics import metrics, pool_gauges
+from app.db.database import async_engine, read_engine, replica_monitor
+from app.db.pooling import pool_stats
+from app.services.clerk import clerk_client
+from app.services.geocoding import geocoder
+from app.services.dispatch import run_dispatch
+from app.services.notifications import DatabaseOutbox
+from app.services.twilio_service import twilio_service
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -40,6 +49,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# SQL statement count and DB time per request (Server-Timing header + log line)
+app.middleware("http")(query_stats_middleware)
+# Request counts, latency histograms and in-flight requests for /metrics
+app.middleware("http")(metrics_middleware)
+
 @app.on_event("startup")
 async def startup_db_client():
     """
@@ -51,6 +65,7 @@ async def startup_db_client():
         logger.info(f"Database URL is set. Starts with: {DATABASE_URL[:20]}...")
     else:
         logger.warning("DATABASE_URL is not set! Using fallback database.")
+    logger.info(f"Database pool: {pool_stats(async_engine)}")
     
     # Check if .env file exists at the correct location
     if os.path.isfile(".env"):
@@ -66,6 +81,19 @@ async def startup_db_client():
         env_vars = {k: v for k, v in os.environ.items() if "SECRET" not in k and "KEY" not in k and "PASSWORD" not in k}
         logger.info(f"Environment variables: {env_vars}")
 
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    """
+    Close pooled outbound HTTP connections and send any queued notifications
+    """
+    await clerk_client.aclose()
+    await geocoder.aclose()
+    if isinstance(twilio_service.outbox, DatabaseOutbox):
+        await twilio_service.outbox.save()
+    else:
+        # Flush rather than close: the outbox must stay usable if the app serves again afterwards
+        await asyncio.to_thread(twilio_service.outbox.flush, NOTIFICATION_FLUSH_TIMEOUT_SECONDS)
+
 @app.get("/docs", include_in_schema=False)
 async def api_documentation(request: Request):
     return HTMLResponse(
@@ -94,6 +122,8 @@ async def api_documentation(request: Request):
 
 # Static files and templates setup
 if ENVIRONMENT == "development":
+    from fastapi.staticfiles import StaticFiles
+    from fastapi.templating import Jinja2Templates
     app.mount("/static", StaticFiles(directory="app/static"), name="static")
     templates = Jinja2Templates(directory="app/templates")
 
@@ -111,8 +141,71 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
-# AWS Lambda handler
-handler = Mangum(app)
+@app.get("/health/db-pool")
+async def db_pool_health():
+    """
+    Connection pool occupancy and checkout wait times for monitoring
+    """
+    stats = {"primary": pool_stats(async_engine)}
+    if read_engine is not None:
+        stats["replica"] = {**pool_stats(read_engine), **replica_monitor.status()}
+    return stats
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """
+    In-process metrics in Prometheus text format
+    """
+    pools = {"primary": pool_stats(async_engine)}
+    if read_engine is not None:
+        pools["replica"] = pool_stats(read_engine)
+    return PlainTextResponse(
+        metrics.render_prometheus(pool_gauges(pools)),
+        media_type="text/plain; version=0.0.4"
+    )
+
+# AWS Lambda handler. Mangum's lifespan="auto" would run the startup/shutdown events around
+# every invocation, closing the pooled keep-alive clients after each request; on Lambda they
+# live as long as the container, and the shutdown event only runs under uvicorn.
+mangum_handler = Mangum(app, lifespan="off")
+
+async def run_scheduled_tasks():
+    """
+    One dispatch batch, then send the notifications waiting in the database
+    outbox, including the new_request messages this dispatch just queued
+    """
+    result = {"assigned": await run_dispatch()}
+    if isinstance(twilio_service.outbox, DatabaseOutbox):
+        await twilio_service.outbox.save()
+        result["sent"] = await twilio_service.outbox.drain()
+    return result
+
+def handler(event, context):
+    """
+    Lambda freezes the container between invocations, so nothing queued may
+    be left in memory when this returns. Notifications are written to the
+    database outbox in one INSERT instead of being sent, which keeps Twilio
+    off the response path; the scheduled invocation sends them. This
+    invocation's metrics are written as EMF log lines.
+
+    Scheduled {"task": "dispatch"} events run run_scheduled_tasks instead of an HTTP request.
+    """
+    # Same event loop Mangum uses, so pooled connections stay usable
+    loop = asyncio.get_event_loop()
+    try:
+        if isinstance(event, dict) and event.get("task") == "dispatch":
+            return loop.run_until_complete(run_scheduled_tasks())
+        return mangum_handler(event, context)
+    finally:
+        if isinstance(twilio_service.outbox, DatabaseOutbox):
+            try:
+                loop.run_until_complete(twilio_service.outbox.save())
+            except Exception as e:
+                # Still buffered: saved with the next invocation if this container is reused
+                logger.error(f"Failed to save queued notifications: {str(e)}")
+        else:
+            twilio_service.outbox.flush(NOTIFICATION_FLUSH_TIMEOUT_SECONDS)
+        metrics.flush_emf()
 
 if __name__ == "__main__":
     import uvicorn
@@ -9,7 +9,7 @@ load_dotenv()
 config = context.config
 
 from app.core.config import SYNC_DATABASE_URL
-from app.db.database import get_sync_engine, sync_engine
+from app.db.database import get_sync_engine
 
 config.set_main_option("sqlalchemy.url", SYNC_DATABASE_URL)
 
@@ -17,7 +17,8 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 from app.models.user import User, UserDetails, CustomerDetails, RagpickerDetails, Balances, CompanyBalances, Reviews, Requests
-from app.models.sensor import Sensor, SensorLog
+from app.models.sensor import Sensor, SensorLog, SensorEventReceipt
+from app.models.notification import OutboxMessage
 from app.db.database import Base
 
 target_metadata = Base.metadata
@@ -53,6 +54,7 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    sync_engine = get_sync_engine()
     if sync_engine:
         connectable = sync_engine
     else:
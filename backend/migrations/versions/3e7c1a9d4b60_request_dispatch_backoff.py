@@ -0,0 +1,26 @@
+"""request dispatch backoff
+
+Revision ID: 3e7c1a9d4b60
+Revises: 9b4e6d2f8a17
+Create Date: 2026-10-19 10:12:44.615390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e7c1a9d4b60'
+down_revision: Union[str, None] = '9b4e6d2f8a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('requests', sa.Column('next_dispatch_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('requests', 'next_dispatch_at')
@@ -0,0 +1,32 @@
+"""keyset pagination indexes
+
+Revision ID: 5c2f8d1e7a43
+Revises: 914bd2e1d300
+Create Date: 2026-10-17 10:12:44.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c2f8d1e7a43'
+down_revision: Union[str, None] = '914bd2e1d300'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_requests_created_at_id', 'requests', ['created_at', 'id'], unique=False)
+    op.create_index('ix_users_createdAt_clerkId', 'users', ['createdAt', 'clerkId'], unique=False)
+    op.create_index('ix_users_role_createdAt_clerkId', 'users', ['role', 'createdAt', 'clerkId'], unique=False)
+    op.create_index('ix_sensor_logs_sensor_id_timestamp_id', 'sensor_logs', ['sensor_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sensor_logs_sensor_id_timestamp_id', table_name='sensor_logs')
+    op.drop_index('ix_users_role_createdAt_clerkId', table_name='users')
+    op.drop_index('ix_users_createdAt_clerkId', table_name='users')
+    op.drop_index('ix_requests_created_at_id', table_name='requests')
@@ -0,0 +1,45 @@
+"""notification outbox
+
+Revision ID: 6a2d8f5c1e93
+Revises: 3e7c1a9d4b60
+Create Date: 2026-10-19 14:27:09.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a2d8f5c1e93'
+down_revision: Union[str, None] = '3e7c1a9d4b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('notification_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('to_phone', sa.String(), nullable=False),
+    sa.Column('body', sa.String(), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_notification_outbox_unsent_to_phone_next_attempt_at',
+        'notification_outbox',
+        ['to_phone', 'next_attempt_at'],
+        unique=False,
+        postgresql_where=sa.text('sent_at IS NULL'),
+        sqlite_where=sa.text('sent_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_outbox_unsent_to_phone_next_attempt_at', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
@@ -0,0 +1,33 @@
+"""sensor event receipts
+
+Revision ID: 9b4e6d2f8a17
+Revises: f2e8b4a61d93
+Create Date: 2026-10-18 16:05:31.482217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4e6d2f8a17'
+down_revision: Union[str, None] = 'f2e8b4a61d93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('sensor_event_receipts',
+    sa.Column('event_id', sa.String(), nullable=False),
+    sa.Column('sensor_id', sa.String(), nullable=True),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('detail', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('event_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sensor_event_receipts')
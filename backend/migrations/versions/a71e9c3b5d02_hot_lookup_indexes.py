@@ -0,0 +1,45 @@
+"""hot lookup indexes
+
+Revision ID: a71e9c3b5d02
+Revises: 5c2f8d1e7a43
+Create Date: 2026-10-17 11:04:27.906511
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a71e9c3b5d02'
+down_revision: Union[str, None] = '5c2f8d1e7a43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_requests_customer_clerkId_status_created_at', 'requests', ['customer_clerkId', 'status', 'created_at'], unique=False)
+    op.create_index('ix_requests_ragpicker_clerkId_status_created_at', 'requests', ['ragpicker_clerkId', 'status', 'created_at'], unique=False)
+    op.create_index('ix_sensor_logs_sensor_id_sensor_status_timestamp', 'sensor_logs', ['sensor_id', 'sensor_status', 'timestamp'], unique=False)
+    op.create_index(
+        'ix_sensor_logs_active_sensor_id_timestamp',
+        'sensor_logs',
+        ['sensor_id', 'timestamp'],
+        unique=False,
+        postgresql_where=sa.text('sensor_status = true'),
+        sqlite_where=sa.text('sensor_status = 1'),
+    )
+    op.create_index(op.f('ix_ragpicker_details_RFID'), 'ragpicker_details', ['RFID'], unique=False)
+    op.create_index('ix_reviews_ragpicker_clerkId_created_at', 'reviews', ['ragpicker_clerkId', 'created_at'], unique=False)
+    op.create_index(op.f('ix_ragpicker_applications_status'), 'ragpicker_applications', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ragpicker_applications_status'), table_name='ragpicker_applications')
+    op.drop_index('ix_reviews_ragpicker_clerkId_created_at', table_name='reviews')
+    op.drop_index(op.f('ix_ragpicker_details_RFID'), table_name='ragpicker_details')
+    op.drop_index('ix_sensor_logs_active_sensor_id_timestamp', table_name='sensor_logs')
+    op.drop_index('ix_sensor_logs_sensor_id_sensor_status_timestamp', table_name='sensor_logs')
+    op.drop_index('ix_requests_ragpicker_clerkId_status_created_at', table_name='requests')
+    op.drop_index('ix_requests_customer_clerkId_status_created_at', table_name='requests')
@@ -0,0 +1,34 @@
+"""user coordinates
+
+Revision ID: b3f6a9d2c718
+Revises: e8b51f04c9a7
+Create Date: 2026-10-17 21:10:24.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3f6a9d2c718'
+down_revision: Union[str, None] = 'e8b51f04c9a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_details', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('user_details', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('user_details', sa.Column('geohash', sa.String(length=12), nullable=True))
+    op.create_index('ix_user_details_geohash', 'user_details', ['geohash'], unique=False)
+
+    # Existing addresses are geocoded separately: python -m app.services.geocoding
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_details_geohash', table_name='user_details')
+    op.drop_column('user_details', 'geohash')
+    op.drop_column('user_details', 'longitude')
+    op.drop_column('user_details', 'latitude')
@@ -0,0 +1,43 @@
+"""payment ledger
+
+Revision ID: c4d93a6f1e88
+Revises: a71e9c3b5d02
+Create Date: 2026-10-17 12:21:09.552730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d93a6f1e88'
+down_revision: Union[str, None] = 'a71e9c3b5d02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ledger_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('from_clerkId', sa.String(), nullable=True),
+    sa.Column('from_company_id', sa.Integer(), nullable=True),
+    sa.Column('to_clerkId', sa.String(), nullable=True),
+    sa.Column('amount', sa.Float(), nullable=True),
+    sa.Column('reason', sa.String(), nullable=True),
+    sa.Column('reference', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['from_clerkId'], ['users.clerkId'], ),
+    sa.ForeignKeyConstraint(['from_company_id'], ['company_balances.id'], ),
+    sa.ForeignKeyConstraint(['to_clerkId'], ['users.clerkId'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_ledger_entries_id'), 'ledger_entries', ['id'], unique=False)
+    op.create_index(op.f('ix_ledger_entries_to_clerkId'), 'ledger_entries', ['to_clerkId'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_ledger_entries_to_clerkId'), table_name='ledger_entries')
+    op.drop_index(op.f('ix_ledger_entries_id'), table_name='ledger_entries')
+    op.drop_table('ledger_entries')
@@ -0,0 +1,45 @@
+"""request dispatch
+
+Revision ID: d5a1c7e94b26
+Revises: b3f6a9d2c718
+Create Date: 2026-10-17 22:41:07.903215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a1c7e94b26'
+down_revision: Union[str, None] = 'b3f6a9d2c718'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('requests', sa.Column('auto_dispatch', sa.Boolean(), server_default=sa.false(), nullable=True))
+    op.add_column('requests', sa.Column('dispatch_attempts', sa.Integer(), server_default='0', nullable=True))
+
+    op.create_table('request_rejections',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('request_id', sa.Integer(), nullable=True),
+    sa.Column('ragpicker_clerkId', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['request_id'], ['requests.id'], ),
+    sa.ForeignKeyConstraint(['ragpicker_clerkId'], ['users.clerkId'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_request_rejections_id'), 'request_rejections', ['id'], unique=False)
+    op.create_index(op.f('ix_request_rejections_request_id'), 'request_rejections', ['request_id'], unique=False)
+    op.create_index('ix_request_rejections_ragpicker_clerkId_created_at', 'request_rejections', ['ragpicker_clerkId', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_request_rejections_ragpicker_clerkId_created_at', table_name='request_rejections')
+    op.drop_index(op.f('ix_request_rejections_request_id'), table_name='request_rejections')
+    op.drop_index(op.f('ix_request_rejections_id'), table_name='request_rejections')
+    op.drop_table('request_rejections')
+    op.drop_column('requests', 'dispatch_attempts')
+    op.drop_column('requests', 'auto_dispatch')
@@ -0,0 +1,43 @@
+"""ragpicker rating totals
+
+Revision ID: e8b51f04c9a7
+Revises: c4d93a6f1e88
+Create Date: 2026-10-17 13:02:51.140387
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b51f04c9a7'
+down_revision: Union[str, None] = 'c4d93a6f1e88'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('ragpicker_details', sa.Column('rating_sum', sa.Float(), server_default='0', nullable=True))
+    op.add_column('ragpicker_details', sa.Column('rating_count', sa.Integer(), server_default='0', nullable=True))
+
+    # Backfill the totals from existing reviews
+    op.execute(
+        """
+        UPDATE ragpicker_details SET
+            rating_sum = (
+                SELECT COALESCE(SUM(reviews.rating), 0) FROM reviews
+                WHERE reviews."ragpicker_clerkId" = ragpicker_details."clerkId"
+            ),
+            rating_count = (
+                SELECT COUNT(reviews.rating) FROM reviews
+                WHERE reviews."ragpicker_clerkId" = ragpicker_details."clerkId"
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('ragpicker_details', 'rating_count')
+    op.drop_column('ragpicker_details', 'rating_sum')
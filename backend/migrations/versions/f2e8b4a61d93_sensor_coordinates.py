@@ -0,0 +1,30 @@
+"""sensor coordinates
+
+Revision ID: f2e8b4a61d93
+Revises: d5a1c7e94b26
+Create Date: 2026-10-18 09:12:44.271906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2e8b4a61d93'
+down_revision: Union[str, None] = 'd5a1c7e94b26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('sensors', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('sensors', sa.Column('longitude', sa.Float(), nullable=True))
+    op.create_index('ix_sensors_company_id_sensor_status', 'sensors', ['company_id', 'sensor_status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sensors_company_id_sensor_status', table_name='sensors')
+    op.drop_column('sensors', 'longitude')
+    op.drop_column('sensors', 'latitude')
@@ -0,0 +1,12 @@
+"""
+The app reads its configuration on import, so test settings are applied
+here, before any test module imports it: a throwaway SQLite database and
+SMS printed to the console instead of sent.
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(prefix="ww-tests-"), "test.db")
+os.environ["ENVIRONMENT"] = "testing"
+os.environ["NOTIFICATION_TRANSPORT"] = "console"
+os.environ["NOTIFICATION_OUTBOX"] = "memory"
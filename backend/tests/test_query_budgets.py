@@ -0,0 +1,110 @@
+"""
+SQL statements and commits per write endpoint. Each endpoint has a budget of
+(statements, commits) and the test fails when it is exceeded, so extra round
+trips (re-reads after commit, refreshes, second commits) are caught.
+
+The endpoints run in order through the ASGI app, each building on the rows
+the previous ones created; no endpoint needing S3 or Clerk is exercised.
+python -m benchmarks.endpoint_queries prints the measured counts as a table.
+"""
+import asyncio
+import pytest
+
+# Upper bounds per endpoint as (statements, commits)
+BUDGETS = {
+    "POST /users/": (2, 1),
+    "PUT /users/{clerk_id}": (2, 1),
+    "POST /customers/{clerk_id}/details": (3, 1),
+    "POST /ragpickers/{clerk_id}/details": (3, 1),
+    "PUT /ragpickers/{clerk_id}/details": (3, 1),
+    "POST /requests/": (3, 1),
+    "PUT /requests/{id}/status": (2, 1),
+    "PUT /requests/{id}/smart-contract": (2, 1),
+    "PUT /requests/{id}/complete": (4, 1),
+    "POST /reviews/": (4, 1),
+    "POST /sensors/": (2, 1),
+    "POST /sensors/update-status (full)": (4, 1),
+    "POST /sensors/rfid": (2, 1),
+    "POST /sensors/update-status (emptied)": (6, 1),
+    "POST /admin/applications/{id}/review": (3, 1),
+}
+
+CUSTOMER = {"clerkId": "bench_customer", "email": "customer@example.com",
+            "firstName": "Casey", "lastName": "Customer", "role": "CUSTOMER"}
+RAGPICKER = {"clerkId": "bench_ragpicker", "email": "ragpicker@example.com",
+             "firstName": "Riley", "lastName": "Picker", "role": "RAGPICKER"}
+
+# (name, method, path, body) in an order that builds on itself; "setup" steps have no budget
+SCENARIOS = [
+    ("setup", "POST", "/users/", RAGPICKER),
+    ("POST /users/", "POST", "/users/", CUSTOMER),
+    ("PUT /users/{clerk_id}", "PUT", "/users/bench_customer", {**CUSTOMER, "lastName": "Client"}),
+    ("POST /customers/{clerk_id}/details", "POST", "/customers/bench_customer/details", {"wallet_address": "0xc"}),
+    ("POST /ragpickers/{clerk_id}/details", "POST", "/ragpickers/bench_ragpicker/details", {"wallet_address": "0xr"}),
+    ("PUT /ragpickers/{clerk_id}/details", "PUT", "/ragpickers/bench_ragpicker/details", {"RFID": "rfid_bench"}),
+    ("POST /requests/", "POST", "/requests/",
+     {"customer_clerkId": "bench_customer", "ragpicker_clerkId": "bench_ragpicker"}),
+    ("PUT /requests/{id}/status", "PUT", "/requests/1/status", {"status": "ACCEPTED"}),
+    ("PUT /requests/{id}/smart-contract", "PUT", "/requests/1/smart-contract", {"smart_contract_address": "0xsc"}),
+    ("PUT /requests/{id}/complete", "PUT", "/requests/1/complete", None),
+    ("POST /reviews/", "POST", "/reviews/",
+     {"customer_clerkId": "bench_customer", "ragpicker_clerkId": "bench_ragpicker", "rating": 5, "review": "ok"}),
+    ("POST /sensors/", "POST", "/sensors/",
+     {"sensor_id": "bench_bin", "sensor_name": "Bench bin", "location": "Depot", "company_id": 1}),
+    ("POST /sensors/update-status (full)", "POST", "/sensors/update-status", {"sensor_id": "bench_bin", "status": True}),
+    ("POST /sensors/rfid", "POST", "/sensors/rfid", {"sensor_id": "bench_bin", "rfid": "rfid_bench"}),
+    ("POST /sensors/update-status (emptied)", "POST", "/sensors/update-status", {"sensor_id": "bench_bin", "status": False}),
+    ("POST /admin/applications/{id}/review", "POST", "/admin/applications/1/review", {"status": "REJECTED"}),
+]
+
+
+async def seed(async_engine):
+    """Schema plus the rows no public endpoint creates: a company account and an application"""
+    from app.db.database import Base
+    from app.models.user import CompanyBalances, RagpickerApplication
+    import app.models.sensor  # noqa: F401 - registers the sensor tables
+
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(CompanyBalances.__table__.insert(), [
+            {"id": 1, "company_name": "Bench Co", "company_password": "", "balance": 1000.0}
+        ])
+        await conn.execute(RagpickerApplication.__table__.insert(), [
+            {"clerk_id": "bench_ragpicker", "document_url": "https://example.com/doc.pdf",
+             "notes": "bench", "status": "PENDING"}
+        ])
+
+
+@pytest.fixture(scope="module")
+def client():
+    from fastapi.testclient import TestClient
+    import main
+    from app.db.database import async_engine
+    from app.db.query_stats import install_query_listeners
+    from app.services.twilio_service import twilio_service
+
+    asyncio.run(seed(async_engine))
+    install_query_listeners(async_engine)
+    with TestClient(main.app) as client:
+        yield client
+    twilio_service.outbox.close(5)
+
+
+@pytest.mark.parametrize("name, method, path, body", SCENARIOS, ids=[scenario[0] for scenario in SCENARIOS])
+def test_query_budget(client, record_property, name, method, path, body):
+    from app.db.query_stats import track_queries
+
+    with track_queries() as stats:
+        response = client.request(method, path, json=body)
+    assert response.status_code < 400, f"HTTP {response.status_code} {response.text[:200]}"
+    if name == "setup":
+        return
+
+    for key, value in (("endpoint", name), ("status", response.status_code), ("statements", stats.statements),
+                       ("commits", stats.commits), ("db_ms", stats.total_time * 1000)):
+        record_property(key, value)
+    max_statements, max_commits = BUDGETS[name]
+    assert stats.statements <= max_statements and stats.commits <= max_commits, (
+        f"{stats.statements} statements / {stats.commits} commits, budget {max_statements} / {max_commits}"
+    )
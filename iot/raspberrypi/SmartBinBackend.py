@@ -1,40 +1,17 @@
 from fastapi import FastAPI, File, UploadFile
 from fastapi.responses import JSONResponse
-import numpy as np
-from tflite_runtime.interpreter import Interpreter
 from PIL import Image
 import io
+from classifier import WasteClassifier, category_name, load_interpreter
 
 app = FastAPI()
 
-# Load the TFLite model
-interpreter = Interpreter(model_path="waste_classification_model_quantized.tflite")
-interpreter.allocate_tensors()
-
-# Get input and output tensors
-input_details = interpreter.get_input_details()
-output_details = interpreter.get_output_details()
+# Load the TFLite model once; predictions reuse its preallocated input tensor
+classifier = WasteClassifier(load_interpreter())
 
 # Prediction function
-def predict(image: np.ndarray):
-    # Resize and normalize the image to match the input tensor shape
-    image = image.resize((180,180))
-    image = np.array(image, dtype=np.float32) / 255.0
-    image = np.expand_dims(image, axis=0)
-
-
-    # Set input tensor and run inference
-    interpreter.set_tensor(input_details[0]['index'], image)
-    interpreter.invoke()
-
-    # Get the result from the output tensor
-    output_data = interpreter.get_tensor(output_details[0]['index'])
-
-    # Get the predicted class and probability
-    prediction = np.argmax(output_data)
-    probability = np.max(output_data)
-    
-    return prediction, probability
+def predict(image: Image.Image):
+    return classifier.predict(image)
 
 @app.post("/predict/")
 async def predict_image(file: UploadFile = File(...)):
@@ -47,7 +24,7 @@ async def predict_image(file: UploadFile = File(...)):
         prediction, probability = predict(image)
 
         # Return the prediction result
-        category = "Organic Waste" if prediction == 0 else "Recycle Waste"
+        category = category_name(prediction)
         return JSONResponse(content={
             "category": category,
             "probability": float(probability)
@@ -0,0 +1,89 @@
+"""
+Trigger-to-result latency: spawning a classification process per trigger
+versus asking the resident classification service.
+
+Both use the fake camera and dummy model from simulation.py, so this runs
+anywhere; --camera-warmup stands in for the camera's settle time (2s on the
+Pi, paid on every spawn but only once by the service).
+
+    python benchmark_classification.py
+    python benchmark_classification.py --triggers 200 --spawns 5 --camera-warmup 0
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from classification_service import ClassificationClient, ClassificationServer, create_classifier
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(name, latencies):
+    print(f"{name:<10} {len(latencies):>6} {statistics.median(latencies) * 1000:>10.1f} "
+          f"{percentile(latencies, 95) * 1000:>10.1f} {max(latencies) * 1000:>10.1f}")
+
+
+def spawn_per_trigger(count, camera_warmup):
+    latencies = []
+    command = [sys.executable, os.path.join(HERE, "classification_service.py"), "--once", "--simulate",
+               "--camera-warmup", str(camera_warmup)]
+    for _ in range(count):
+        started = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def resident(count, camera_warmup):
+    path = os.path.join(os.getcwd(), "classifier.sock")
+    started = time.perf_counter()
+    classifier = create_classifier(simulate=True, camera_warmup=camera_warmup)
+    server = ClassificationServer(classifier, path)
+    startup = time.perf_counter() - started
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    client = ClassificationClient(path)
+    latencies = []
+    try:
+        for _ in range(count):
+            started = time.perf_counter()
+            client.classify()
+            latencies.append(time.perf_counter() - started)
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+        classifier.close()
+    return latencies, startup
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--triggers", type=int, default=100, help="triggers sent to the resident service")
+    parser.add_argument("--spawns", type=int, default=3, help="triggers run as a fresh process each")
+    parser.add_argument("--camera-warmup", type=float, default=2.0)
+    args = parser.parse_args()
+    # The socket is created in the working directory; keep it out of the checkout
+    os.chdir(tempfile.mkdtemp(prefix="ww-classifier-"))
+
+    header = f"{'mode':<10} {'runs':>6} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}"
+    print(header)
+    print("-" * len(header))
+    report("spawn", spawn_per_trigger(args.spawns, args.camera_warmup))
+    latencies, startup = resident(args.triggers, args.camera_warmup)
+    report("resident", latencies)
+    print(f"\nResident service start-up (paid once): {startup * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Per-frame preprocessing cost: the old float32 / 255 conversion versus
+WasteClassifier.preprocess, which writes into a preallocated input tensor
+in the model's own dtype.
+
+Uses dummy interpreters with a float32, a uint8 and an int8 input tensor,
+so this runs anywhere with numpy and Pillow. Frames come at the model's
+input size: the resize is the same in both paths and would drown out the
+conversion being measured.
+
+    python benchmark_preprocessing.py
+    python benchmark_preprocessing.py --frames 2000
+"""
+import argparse
+import statistics
+import time
+import numpy as np
+from PIL import Image
+
+from classifier import WasteClassifier
+from simulation import DummyInterpreter, FakeCamera
+
+MODELS = {
+    "float32": {},
+    "uint8": {"quantized": True},
+    "int8": {"quantized": True, "input_dtype": np.int8, "input_quantization": (1 / 255, -128)},
+}
+
+
+def float_preprocess(image, size):
+    """What predict() did before: a fresh float32 array every frame"""
+    image = image.resize(size)
+    image = np.array(image, dtype=np.float32) / 255.0
+    return np.expand_dims(image, axis=0)
+
+
+def time_frames(preprocess, frames):
+    timings = []
+    for frame in frames:
+        started = time.perf_counter()
+        preprocess(frame)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=500)
+    args = parser.parse_args()
+
+    header = f"{'input':<10} {'path':<12} {'p50 us':>10} {'tensor bytes':>14}"
+    print(header)
+    print("-" * len(header))
+    for name, options in MODELS.items():
+        classifier = WasteClassifier(DummyInterpreter(**options))
+        camera = FakeCamera()
+        camera.resolution = classifier.image_size
+        frames = [Image.fromarray(camera.frame()) for _ in range(min(args.frames, 20))]
+        frames = (frames * (args.frames // len(frames) + 1))[:args.frames]
+        baseline = float_preprocess(frames[0], classifier.image_size)
+        print(f"{name:<10} {'float / 255':<12} "
+              f"{time_frames(lambda f: float_preprocess(f, classifier.image_size), frames):>10.0f} {baseline.nbytes:>14}")
+        print(f"{name:<10} {'preallocated':<12} "
+              f"{time_frames(classifier.preprocess, frames):>10.0f} {classifier.input_buffer.nbytes:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Resident waste classification service.
+
+Keeps the TFLite interpreter and the camera open and classifies on request
+over a Unix socket. A trigger then costs one capture and one inference
+instead of a Python start-up, the numpy/tflite/PIL imports, a model load and
+a 2s camera warm-up.
+
+Protocol: one JSON object per line, one reply line each.
+    {"command": "classify"} -> {"category", "prediction", "probability", "capture_ms", "inference_ms"}
+    {"command": "ping"}     -> {"ok": true}
+Failures come back as {"error": "..."}.
+
+    python classification_service.py                    # on the Pi
+    python classification_service.py --simulate         # fake camera and dummy model
+    python classification_service.py --once --simulate  # classify once, print and exit
+    python classification_service.py --save-captures captures/  # also keep every capture as a JPEG
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+
+SOCKET_PATH = os.environ.get("CLASSIFIER_SOCKET", "/tmp/waste-whirl-classifier.sock")
+
+
+class ClassificationError(Exception):
+    pass
+
+
+class ClassificationHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # Clients keep the connection open and send one command per line
+        for line in self.rfile:
+            try:
+                command = json.loads(line).get("command")
+                if command == "classify":
+                    # One capture at a time: the camera and interpreter are shared
+                    with self.server.lock:
+                        reply = self.server.classifier.classify()
+                elif command == "ping":
+                    reply = {"ok": True}
+                else:
+                    reply = {"error": f"Unknown command {command!r}"}
+            except Exception as e:
+                reply = {"error": str(e)}
+            self.wfile.write((json.dumps(reply) + "\n").encode())
+
+
+class ClassificationServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, classifier, path=SOCKET_PATH):
+        # A socket file left by a previous run would block the bind
+        if os.path.exists(path):
+            os.remove(path)
+        super().__init__(path, ClassificationHandler)
+        self.classifier = classifier
+        self.lock = threading.Lock()
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+class ClassificationClient:
+    """
+    Persistent connection to the service; reconnects once if the service restarted
+    """
+    def __init__(self, path=SOCKET_PATH, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.path)
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+
+    def _call(self, message):
+        for attempt in range(2):
+            try:
+                if self._sock is None:
+                    self._connect()
+                self._sock.sendall((json.dumps(message) + "\n").encode())
+                line = self._reader.readline()
+                if not line:
+                    raise ConnectionError("Classification service closed the connection")
+                reply = json.loads(line)
+                break
+            except (OSError, ValueError):
+                self.close()
+                if attempt:
+                    raise
+        if "error" in reply:
+            raise ClassificationError(reply["error"])
+        return reply
+
+    def classify(self):
+        return self._call({"command": "classify"})
+
+    def ping(self):
+        return self._call({"command": "ping"})
+
+    def close(self):
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+            self._sock = None
+            self._reader = None
+
+
+def create_classifier(simulate=False, model_path=None, camera_warmup=None, capture_dir=None):
+    from classifier import (CAMERA_WARMUP_SECONDS, CAPTURE_DIR, MODEL_PATH, WasteClassifier, load_interpreter,
+                            open_camera)
+
+    warmup = CAMERA_WARMUP_SECONDS if camera_warmup is None else camera_warmup
+    capture_dir = capture_dir or CAPTURE_DIR
+    if simulate:
+        from simulation import DummyInterpreter, FakeCamera
+        return WasteClassifier(DummyInterpreter(), open_camera(FakeCamera, warmup=warmup), capture_dir)
+    return WasteClassifier(load_interpreter(model_path or MODEL_PATH), open_camera(warmup=warmup), capture_dir)
+
+
+def _stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident waste classification service")
+    parser.add_argument("--socket", default=SOCKET_PATH)
+    parser.add_argument("--model", help="TFLite model path")
+    parser.add_argument("--simulate", action="store_true", help="use a fake camera and a dummy model")
+    parser.add_argument("--camera-warmup", type=float, help="seconds to let the camera settle after opening")
+    parser.add_argument("--once", action="store_true", help="classify once, print the result and exit")
+    parser.add_argument("--save-captures", metavar="DIR", help="also save every capture as a JPEG in DIR")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    classifier = create_classifier(args.simulate, args.model, args.camera_warmup, args.save_captures)
+    try:
+        if args.once:
+            print(json.dumps(classifier.classify()))
+            return
+
+        server = ClassificationServer(classifier, args.socket)
+        # Stopping the service (systemd sends SIGTERM) must still release the camera
+        signal.signal(signal.SIGTERM, _stop)
+        print(f"✅ Classifier ready in {time.perf_counter() - started:.1f}s, listening on {args.socket}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Classifier stopped by user")
+        finally:
+            server.server_close()
+    finally:
+        classifier.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Waste classification with the quantized TFLite model and the Pi camera.
+
+Loading the model and warming up the camera take far longer than a capture
+and an inference, so a WasteClassifier opens both once and is reused for
+every trigger (see classification_service.py). Frames are written into a
+preallocated input tensor in the model's own input dtype.
+
+Captures stay in memory: the camera's resizer scales each frame to the
+model's input size and writes raw RGB into a reused buffer, so there is no
+JPEG encode, SD card write and decode per trigger. Set CLASSIFIER_CAPTURE_DIR
+(or pass capture_dir) to also keep every capture as a JPEG for debugging or
+auditing; those are written by a background thread.
+"""
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+import numpy as np
+from PIL import Image
+
+MODEL_PATH = "waste_classification_model_quantized.tflite"
+CAMERA_RESOLUTION = (640, 480)
+CAMERA_WARMUP_SECONDS = 2
+CAPTURE_DIR = os.environ.get("CLASSIFIER_CAPTURE_DIR")
+# Captures waiting to be saved; further ones are dropped rather than slowing classification
+CAPTURE_QUEUE_SIZE = 8
+
+
+def load_interpreter(model_path=MODEL_PATH):
+    from tflite_runtime.interpreter import Interpreter
+
+    interpreter = Interpreter(model_path=model_path)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def open_camera(camera_factory=None, resolution=CAMERA_RESOLUTION, warmup=CAMERA_WARMUP_SECONDS):
+    """Open the camera and start the preview once; captures need no further warm-up"""
+    if camera_factory is None:
+        from picamera import PiCamera
+        camera_factory = PiCamera
+
+    camera = camera_factory()
+    camera.resolution = resolution
+    camera.start_preview()
+    time.sleep(warmup)  # Let the camera warm up
+    return camera
+
+
+def category_name(prediction):
+    return "Organic Waste" if prediction == 0 else "Recycle Waste"
+
+
+def padded_frame_shape(size):
+    """
+    Buffer shape of a raw RGB capture: the camera pads rows to a multiple of
+    32 pixels and the height to a multiple of 16
+    """
+    width, height = size
+    return ((height + 15) // 16 * 16, (width + 31) // 32 * 32, 3)
+
+
+class CaptureWriter:
+    """Saves captures as JPEGs on a background thread"""
+    def __init__(self, directory, maxsize=CAPTURE_QUEUE_SIZE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.queue = queue.Queue(maxsize)
+        self.thread = threading.Thread(target=self._run, name="capture-writer", daemon=True)
+        self.thread.start()
+
+    def save(self, frame, label):
+        """Queue a copy of `frame`; the caller's buffer is reused for the next capture"""
+        name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{label}.jpg"
+        try:
+            self.queue.put_nowait((os.path.join(self.directory, name), frame.copy()))
+        except queue.Full:
+            print("⚠️ Capture writer is behind, not saving this capture")
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            path, frame = item
+            try:
+                Image.fromarray(frame).save(path, format="jpeg")
+            except OSError as e:
+                print(f"❌ Failed to save capture {path}: {e}")
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+
+def input_lookup_table(dtype, quantization):
+    """
+    Input tensor value for each 0-255 pixel value. The model was trained on
+    pixels / 255; a quantized input stores that as value / scale + zero_point.
+    """
+    dtype = np.dtype(dtype)
+    pixels = np.arange(256, dtype=np.float64)
+    if dtype.kind == "f":
+        return (pixels / 255.0).astype(dtype)
+    scale, zero_point = quantization
+    info = np.iinfo(dtype)
+    return np.clip(np.round(pixels / (255.0 * scale) + zero_point), info.min, info.max).astype(dtype)
+
+
+def input_conversion(dtype, lut):
+    """
+    Cheapest way to turn pixels into the input tensor: a plain copy when the
+    pixels already are the tensor values (uint8, scale 1/255, zero point 0),
+    a sign-bit flip for int8 with zero point -128, one multiply for a float
+    input, and the lookup table for any other quantization
+    """
+    pixels = np.arange(256)
+    if dtype == np.uint8 and np.array_equal(lut, pixels):
+        return "copy"
+    if dtype == np.int8 and np.array_equal(lut, pixels - 128):
+        return "shift"
+    if dtype.kind == "f":
+        return "scale"
+    return "lookup"
+
+
+class WasteClassifier:
+    """
+    Not thread-safe: the input tensor buffer is reused for every frame
+    """
+    def __init__(self, interpreter, camera=None, capture_dir=CAPTURE_DIR):
+        self.interpreter = interpreter
+        self.camera = camera
+        self.capture_writer = CaptureWriter(capture_dir) if capture_dir else None
+
+        # Get input and output tensors
+        self.input_details = interpreter.get_input_details()
+        self.output_details = interpreter.get_output_details()
+
+        # Feed the input tensor in its own dtype: a quantized model takes
+        # uint8/int8 directly instead of a float32 tensor four times the size
+        input_detail = self.input_details[0]
+        _, height, width, _ = input_detail['shape']
+        self.image_size = (int(width), int(height))
+        self.input_buffer = np.empty(input_detail['shape'], dtype=input_detail['dtype'])
+        self.input_lut = input_lookup_table(input_detail['dtype'], input_detail['quantization'])
+        self.input_conversion = input_conversion(self.input_buffer.dtype, self.input_lut)
+
+        # Raw RGB captures at the input size land here, padded as the camera requires
+        width, height = self.image_size
+        self.frame_buffer = np.empty(padded_frame_shape(self.image_size), dtype=np.uint8)
+        self.frame = self.frame_buffer[:height, :width]
+
+        output_detail = self.output_details[0]
+        self.output_scale, self.output_zero_point = output_detail['quantization']
+        self.output_quantized = np.dtype(output_detail['dtype']).kind in "iu" and self.output_scale != 0
+
+    def preprocess(self, image):
+        """Resize a PIL image and write it into the reused input tensor buffer"""
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        return self.load_pixels(np.asarray(image.resize(self.image_size)))
+
+    def load_pixels(self, pixels):
+        """Write an RGB uint8 array of the input size into the input tensor buffer"""
+        tensor = self.input_buffer[0]
+        if self.input_conversion == "copy":
+            np.copyto(tensor, pixels)
+        elif self.input_conversion == "shift":
+            np.bitwise_xor(pixels, 0x80, out=tensor.view(np.uint8))  # p ^ 0x80 read as int8 is p - 128
+        elif self.input_conversion == "scale":
+            np.multiply(pixels, self.input_lut[1], out=tensor)
+        else:
+            np.take(self.input_lut, pixels, out=tensor, mode="clip")
+        return self.input_buffer
+
+    def predict(self, image):
+        return self.run(self.preprocess(image))
+
+    def run(self, input_tensor):
+        # Set input tensor and run inference
+        self.interpreter.set_tensor(self.input_details[0]['index'], input_tensor)
+        self.interpreter.invoke()
+
+        # Get the result from the output tensor
+        output_data = self.interpreter.get_tensor(self.output_details[0]['index'])
+
+        # Get the predicted class and probability; dequantizing preserves order,
+        # so only the winning score needs converting
+        prediction = int(np.argmax(output_data))
+        probability = float(np.max(output_data))
+        if self.output_quantized:
+            probability = self.output_scale * (probability - self.output_zero_point)
+
+        return prediction, probability
+
+    def capture(self):
+        """Capture a frame at the input size into the reused frame buffer"""
+        self.camera.capture(self.frame_buffer, format="rgb", resize=self.image_size, use_video_port=True)
+        return self.frame
+
+    def classify(self):
+        """Capture a frame and classify it, with timings in milliseconds"""
+        started = time.perf_counter()
+        frame = self.capture()
+        captured = time.perf_counter()
+        prediction, probability = self.run(self.load_pixels(frame))
+        finished = time.perf_counter()
+
+        if self.capture_writer is not None:
+            self.capture_writer.save(frame, category_name(prediction).split()[0].lower())
+
+        return {
+            "category": category_name(prediction),
+            "prediction": prediction,
+            "probability": probability,
+            "capture_ms": round((captured - started) * 1000, 2),
+            "inference_ms": round((finished - captured) * 1000, 2),
+        }
+
+    def close(self):
+        if self.camera is not None:
+            self.camera.stop_preview()  # Stop preview properly to avoid heat up
+            self.camera.close()
+            self.camera = None
+        if self.capture_writer is not None:
+            self.capture_writer.close()  # Finish saving queued captures
+            self.capture_writer = None
@@ -0,0 +1,271 @@
+"""
+Offline-tolerant event buffer.
+
+Every bin status change, RFID scan and classification result is first
+written to a local SQLite database (WAL mode, so recording never waits on
+an upload reading the table). A background Uploader drains it in order, in
+batches, to the backend's /sensors/events:batch endpoint over one
+keep-alive session, backing off exponentially while the backend is
+unreachable. Each event carries an event_id; the backend applies an
+event_id at most once, so a batch retried after a lost response does not
+repeat a status change or a payment. Several scripts on the Pi can share
+the same database for the same reason.
+
+Classification results are kept locally only: the backend has no endpoint
+for them yet.
+
+    python event_buffer.py           # counts of pending, delivered and rejected events
+    python event_buffer.py --flush https://.../sensors/events:batch
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+import requests
+
+DB_PATH = os.environ.get("EVENT_BUFFER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "events.db"))
+BATCH_SIZE = 100
+REQUEST_TIMEOUT_SECONDS = 10
+BACKOFF_INITIAL_SECONDS = 1
+BACKOFF_MAX_SECONDS = 300
+# Uploaded events and local-only records are deleted after this long
+RETENTION_SECONDS = 7 * 24 * 3600
+# Event kinds the backend accepts; the rest are recorded locally only
+UPLOADED_KINDS = ("status", "rfid")
+# Whole-batch rejections that a retry cannot fix. The batch is split to find the offending
+# events; only those are marked failed, so they neither block the queue nor take valid events with them
+PERMANENT_FAILURES = (400, 422)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    uploaded_at REAL,
+    status_code INTEGER,
+    detail TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_events_pending ON events (id) WHERE uploaded_at IS NULL;
+"""
+
+
+class EventBuffer:
+    """Durable, ordered queue of device events; safe to share between threads"""
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._listeners = []
+        # Autocommit: each record is durable as soon as record() returns
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL with NORMAL sync survives a process crash; a power cut may lose only the last moments
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def add_listener(self, callback):
+        """Call `callback()` after every recorded event"""
+        self._listeners.append(callback)
+
+    def record(self, kind, payload):
+        event_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO events (event_id, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+                (event_id, kind, json.dumps(payload), time.time())
+            )
+        for callback in self._listeners:
+            callback()
+        return event_id
+
+    def record_status(self, sensor_id, status):
+        return self.record("status", {"sensor_id": sensor_id, "status": bool(status)})
+
+    def record_rfid(self, sensor_id, rfid):
+        return self.record("rfid", {"sensor_id": sensor_id, "rfid": str(rfid)})
+
+    def record_classification(self, sensor_id, result):
+        return self.record("classification", {"sensor_id": sensor_id, **result})
+
+    def pending(self, limit=BATCH_SIZE):
+        """Oldest events not yet delivered, as (id, event_id, kind, payload) tuples"""
+        placeholders = ", ".join("?" * len(UPLOADED_KINDS))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, event_id, kind, payload FROM events "
+                f"WHERE uploaded_at IS NULL AND kind IN ({placeholders}) ORDER BY id LIMIT ?",
+                (*UPLOADED_KINDS, limit)
+            ).fetchall()
+        return [(row_id, event_id, kind, json.loads(payload)) for row_id, event_id, kind, payload in rows]
+
+    def mark_attempted(self, ids):
+        with self._lock:
+            self._conn.executemany("UPDATE events SET attempts = attempts + 1 WHERE id = ?", [(i,) for i in ids])
+
+    def mark_delivered(self, results):
+        """Record the backend's answer for each event: (id, status_code, detail) tuples"""
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "UPDATE events SET uploaded_at = ?, status_code = ?, detail = ? WHERE id = ?",
+                [(now, status_code, detail, row_id) for row_id, status_code, detail in results]
+            )
+
+    def prune(self, retention=RETENTION_SECONDS):
+        """Delete delivered events and local-only records older than `retention` seconds"""
+        placeholders = ", ".join("?" * len(UPLOADED_KINDS))
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM events WHERE created_at < ? "
+                f"AND (uploaded_at IS NOT NULL OR kind NOT IN ({placeholders}))",
+                (time.time() - retention, *UPLOADED_KINDS)
+            )
+        return cursor.rowcount
+
+    def counts(self):
+        """(kind, state, count) rows; state is pending, delivered, rejected or local"""
+        placeholders = ", ".join("?" * len(UPLOADED_KINDS))
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT kind, CASE WHEN kind NOT IN ({placeholders}) THEN 'local' "
+                f"WHEN uploaded_at IS NULL THEN 'pending' "
+                f"WHEN status_code = 200 THEN 'delivered' ELSE 'rejected' END, COUNT(*) "
+                f"FROM events GROUP BY 1, 2 ORDER BY 1, 2",
+                UPLOADED_KINDS
+            ).fetchall()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Uploader(threading.Thread):
+    """
+    Drains an EventBuffer to the batch endpoint. Wakes up when an event is
+    recorded, otherwise checks every `interval` seconds.
+    """
+    def __init__(self, buffer, url, batch_size=BATCH_SIZE, interval=30.0, session=None):
+        super().__init__(name="event-uploader", daemon=True)
+        self.buffer = buffer
+        self.url = url
+        self.batch_size = batch_size
+        self.interval = interval
+        self.session = session or requests.Session()
+        self.backoff = 0
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        buffer.add_listener(self._wake.set)
+
+    def upload_batch(self):
+        """
+        Send the oldest pending events. Returns how many were delivered;
+        raises requests.RequestException if the backend could not take them.
+        """
+        rows = self.buffer.pending(self.batch_size)
+        if not rows:
+            return 0
+        self.buffer.mark_attempted([row_id for row_id, _, _, _ in rows])
+        return self._send(rows)
+
+    def _send(self, rows):
+        ids = [row_id for row_id, _, _, _ in rows]
+        events = [{"type": kind, "event_id": event_id, **payload} for _, event_id, kind, payload in rows]
+
+        response = self.session.post(self.url, json={"events": events}, timeout=REQUEST_TIMEOUT_SECONDS)
+        if response.status_code in PERMANENT_FAILURES:
+            if len(rows) > 1:
+                # One malformed event fails the whole request: bisect, in order, to deliver the rest
+                middle = len(rows) // 2
+                return self._send(rows[:middle]) + self._send(rows[middle:])
+            _, _, kind, payload = rows[0]
+            print(f"❌ Backend rejected event {kind} {payload} (HTTP {response.status_code}): {response.text}")
+            self.buffer.mark_delivered([(ids[0], response.status_code, response.text)])
+            return 1
+        response.raise_for_status()
+
+        results = {result["index"]: result for result in response.json()["results"]}
+        delivered = []
+        for index, row_id in enumerate(ids):
+            result = results.get(index)
+            if result is None:
+                continue  # Left pending, sent again with the next batch
+            delivered.append((row_id, result["status_code"], result["detail"]))
+            if result["status_code"] != 200:
+                print(f"⚠️ Event {rows[index][2]} for {rows[index][3]['sensor_id']} rejected: {result['detail']}")
+        self.buffer.mark_delivered(delivered)
+        return len(delivered)
+
+    def flush(self):
+        """Upload until nothing is pending; returns how many events were delivered"""
+        total = 0
+        while True:
+            delivered = self.upload_batch()
+            if not delivered:
+                return total
+            total += delivered
+
+    def run(self):
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                delivered = self.flush()
+            except (requests.RequestException, ValueError) as e:
+                if not self.backoff:
+                    print(f"⚠️ Upload failed, buffering events until the backend is reachable: {e}")
+                # Exponential backoff with jitter; new events keep queueing locally meanwhile
+                self.backoff = min(BACKOFF_MAX_SECONDS, max(BACKOFF_INITIAL_SECONDS, self.backoff * 2))
+                self._stopping.wait(random.uniform(self.backoff / 2, self.backoff))
+                continue
+
+            if self.backoff:
+                print(f"✅ Backend reachable again, delivered {delivered} buffered events")
+                self.backoff = 0
+            if delivered:
+                self.buffer.prune()
+            self._wake.wait(self.interval)
+
+    def stop(self, timeout=REQUEST_TIMEOUT_SECONDS):
+        self._stopping.set()
+        self._wake.set()
+        self.join(timeout)
+        self.session.close()
+
+
+def start_uploader(url, path=DB_PATH):
+    """Open the buffer and start draining it to `url`; returns (buffer, uploader)"""
+    buffer = EventBuffer(path)
+    uploader = Uploader(buffer, url)
+    uploader.start()
+    return buffer, uploader
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--flush", metavar="URL", help="upload everything pending to this batch endpoint")
+    args = parser.parse_args()
+
+    buffer = EventBuffer(args.db)
+    try:
+        if args.flush:
+            uploader = Uploader(buffer, args.flush)
+            try:
+                print(f"Delivered {uploader.flush()} events")
+            finally:
+                uploader.session.close()
+        for kind, state, count in buffer.counts():
+            print(f"{kind:<15} {state:<10} {count:>8}")
+    finally:
+        buffer.close()
+
+
+if __name__ == "__main__":
+    main()
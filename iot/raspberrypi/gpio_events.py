@@ -0,0 +1,131 @@
+"""
+Interrupt-driven GPIO edge events.
+
+RPi.GPIO watches the pins in its own thread (GPIO.add_event_detect) and
+calls back on every edge, so the scripts no longer poll and the main loop
+blocks on a queue until something happens. Switches and the ultrasonic
+comparator bounce, so an edge only becomes an event once the pin has held
+its new level for the debounce period; a burst of edges ending at the level
+already reported produces nothing.
+
+    watcher = EdgeWatcher(GPIO)
+    watcher.watch(PIN_15, report_initial=True)
+    for event in watcher:
+        print(event.pin, event.level)
+
+    python gpio_events.py   # bouncing edges on the simulated GPIO
+"""
+import queue
+import threading
+import time
+from collections import namedtuple
+
+DEBOUNCE_SECONDS = 0.05
+
+# level is GPIO.HIGH or GPIO.LOW; timestamp is when the first edge of the change arrived
+EdgeEvent = namedtuple("EdgeEvent", "pin level timestamp")
+
+
+class EdgeWatcher:
+    """
+    Debounced edge events for any number of input pins, delivered on one
+    queue. Set the pins up as inputs before watching them.
+    """
+    def __init__(self, gpio, debounce=DEBOUNCE_SECONDS):
+        self.gpio = gpio
+        self.debounce = debounce
+        self.events = queue.Queue()
+        self._lock = threading.Lock()
+        self._levels = {}
+        self._debounces = {}
+        self._timers = {}
+        self._started = {}
+        self._closed = False
+
+    def watch(self, pin, debounce=None, report_initial=False):
+        """
+        Deliver level changes on `pin`. With report_initial the current
+        level is queued straight away, for consumers that act on state
+        rather than on changes.
+        """
+        level = self.gpio.input(pin)
+        with self._lock:
+            self._levels[pin] = level
+            self._debounces[pin] = self.debounce if debounce is None else debounce
+        self.gpio.add_event_detect(pin, self.gpio.BOTH, callback=self._edge)
+        if report_initial:
+            self.events.put(EdgeEvent(pin, level, time.monotonic()))
+
+    def _edge(self, pin):
+        # Runs on the GPIO library's thread: restart the settle timer and return
+        with self._lock:
+            if self._closed:
+                return
+            timer = self._timers.get(pin)
+            if timer is not None:
+                timer.cancel()
+            else:
+                self._started[pin] = time.monotonic()
+            timer = threading.Timer(self._debounces[pin], self._settled, (pin,))
+            timer.daemon = True
+            self._timers[pin] = timer
+            timer.start()
+
+    def _settled(self, pin):
+        level = self.gpio.input(pin)
+        with self._lock:
+            if self._closed or self._timers.get(pin) is not threading.current_thread():
+                return  # Superseded by a later edge
+            del self._timers[pin]
+            started = self._started.pop(pin)
+            if level == self._levels[pin]:
+                return  # Bounced back to the level already reported
+            self._levels[pin] = level
+        self.events.put(EdgeEvent(pin, level, started))
+
+    def get(self, timeout=None):
+        """Next event, or None if `timeout` seconds pass without one"""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def __iter__(self):
+        while True:
+            yield self.events.get()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            pins = list(self._levels)
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+        for pin in pins:
+            self.gpio.remove_event_detect(pin)
+
+
+def main():
+    from simulation import FakeGPIO
+
+    gpio = FakeGPIO()
+    gpio.setmode(gpio.BCM)
+    gpio.setup(14, gpio.IN, pull_up_down=gpio.PUD_DOWN)
+    watcher = EdgeWatcher(gpio)
+    watcher.watch(14)
+
+    # A press and a release, each bouncing five times; one event should come out of each
+    for level in (gpio.HIGH, gpio.LOW):
+        gpio.bounce(14, level, transitions=5, interval=0.002)
+        event = watcher.get(timeout=1)
+        print(f"GPIO {event.pin}: {'HIGH' if event.level else 'LOW'} "
+              f"after {(time.monotonic() - event.timestamp) * 1000:.0f}ms")
+    # A glitch that returns to the reported level within the debounce period
+    gpio.set_input(14, gpio.HIGH)
+    gpio.set_input(14, gpio.LOW)
+    print(f"Glitch produced an event: {watcher.get(timeout=0.2) is not None}")
+    watcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import RPi.GPIO as GPIO
-import time
-import subprocess
+from classification_service import ClassificationClient, ClassificationError
+from gpio_events import EdgeWatcher
 
 # === GPIO Setup ===
 GPIO.setmode(GPIO.BCM)
@@ -14,22 +14,23 @@ LED_PIN = 18  # Example output pin (optional)
 GPIO.setup(PIN_14, GPIO.IN, pull_up_down=GPIO.PUD_DOWN)
 GPIO.setup(LED_PIN, GPIO.OUT)  # Optional status LED
 
-# State machine
-class States:
-    READY = 0
-    ACTIVE = 1
-
-current_state = States.READY
-last_edge_time = 0
 debounce_delay = 0.2  # 200ms debounce period
 
+# Edges are detected by interrupt and debounced; the loop below sleeps until one arrives
+watcher = EdgeWatcher(GPIO, debounce=debounce_delay)
+
+# The model and camera stay loaded in classification_service.py, started separately
+classifier = ClassificationClient()
+
 def execute_task():
     """Function to handle the task execution"""
     print("🚀 Starting task execution...")
     GPIO.output(LED_PIN, GPIO.HIGH)  # Visual feedback
     try:
-        subprocess.run(['python', 'capture_classification.py'], check=True)
-    except subprocess.CalledProcessError as e:
+        result = classifier.classify()
+        print(f"Prediction: {result['category']} with a probability of {result['probability']:.2f} "
+              f"(capture {result['capture_ms']:.0f}ms, inference {result['inference_ms']:.0f}ms)")
+    except (OSError, ClassificationError) as e:
         print(f"❌ Task failed: {e}")
     finally:
         GPIO.output(LED_PIN, GPIO.LOW)
@@ -38,30 +39,21 @@ def execute_task():
 try:
     print("System READY - Waiting for GPIO 14 trigger...")
     GPIO.output(LED_PIN, GPIO.HIGH)  # Ready state indicator
-    
-    while True:
-        current_input = GPIO.input(PIN_14)
-        now = time.time()
-        
-        # State machine logic
-        if current_state == States.READY:
-            if current_input == GPIO.HIGH and (now - last_edge_time) > debounce_delay:
-                print("⬆️ Rising edge detected - Transitioning to ACTIVE state")
-                current_state = States.ACTIVE
-                last_edge_time = now
-                execute_task()
-                
-        elif current_state == States.ACTIVE:
-            if current_input == GPIO.LOW and (now - last_edge_time) > debounce_delay:
-                print("⬇️ Falling edge detected - Returning to READY state")
-                current_state = States.READY
-                last_edge_time = now
-                GPIO.output(LED_PIN, GPIO.HIGH)  # Ready indicator
-        
-        time.sleep(0.01)  # 10ms polling interval
+    watcher.watch(PIN_14)
+
+    # Debounced levels alternate, so HIGH means READY -> ACTIVE and LOW means back to READY
+    for event in watcher:
+        if event.level == GPIO.HIGH:
+            print("⬆️ Rising edge detected - Transitioning to ACTIVE state")
+            execute_task()
+        else:
+            print("⬇️ Falling edge detected - Returning to READY state")
+            GPIO.output(LED_PIN, GPIO.HIGH)  # Ready indicator
 
 except KeyboardInterrupt:
     print("\n🛑 System shutdown by user")
 finally:
+    watcher.close()
+    classifier.close()
     GPIO.cleanup()
     print("GPIO resources cleaned up")
@@ -1,30 +1,19 @@
 import RPi.GPIO as GPIO
 import time
-import requests
 from mfrc522 import SimpleMFRC522
+from event_buffer import start_uploader
 
 # Define your backend URL where the data should be sent
-backend_url = "https://jrwbl2n7-8000.inc1.devtunnels.ms/sensors/rfid"  # Replace with your URL
+backend_url = "https://jrwbl2n7-8000.inc1.devtunnels.ms/sensors/events:batch"  # Replace with your URL
+
+# Scans are stored locally first and uploaded in the background, so a dropped connection loses no payment
+events, uploader = start_uploader(backend_url)
 
 # Function to send data to your backend
 def send_data_to_backend(rfid_data):
-    # Create the payload in JSON format with sensor_id and RFID
-    payload = {
-        "sensor_id": "Bin1",  # Replace with your sensor ID
-        "rfid": rfid_data
-    }
-
-    try:
-        # Send a POST request to the backend URL
-        response = requests.post(backend_url, json=payload)
-
-        # Check the response status
-        if response.status_code == 200:
-            print(f"Successfully sent RFID {rfid_data} to backend.")
-        else:
-            print(f"Failed to send RFID data. Status code: {response.status_code}")
-    except requests.exceptions.RequestException as e:
-        print(f"Error sending data: {e}")
+    # Queue the scan for the uploader; this returns without waiting on the network
+    events.record_rfid("Bin1", rfid_data)  # Replace with your sensor ID
+    print(f"Queued RFID {rfid_data} for backend.")
 
 # Initialize the RFID reader
 reader = SimpleMFRC522()
@@ -51,5 +40,6 @@ try:
 
 except KeyboardInterrupt:
     print("Program interrupted by User")
+    uploader.stop()  # Anything not uploaded yet stays buffered for the next run
     GPIO.cleanup()  # Clean up GPIO setup when the program is stopped
 
@@ -0,0 +1,183 @@
+"""
+Stand-ins for the Pi camera, the TFLite interpreter and RPi.GPIO, so the
+classification service, the GPIO edge events and their benchmarks run on
+any machine with numpy and Pillow.
+"""
+import time
+import numpy as np
+from PIL import Image
+
+
+class FakeCamera:
+    """
+    The subset of picamera.PiCamera the classifier uses. Captures are random
+    frames at the configured resolution, or at `resize`. Raw "rgb" captures
+    are written into the output buffer with picamera's padding (width to a
+    multiple of 32, height to a multiple of 16).
+    """
+    def __init__(self, capture_seconds=0.0, seed=0):
+        self.resolution = (640, 480)
+        self.capture_seconds = capture_seconds
+        self.rng = np.random.default_rng(seed)
+        self.closed = False
+
+    def start_preview(self):
+        pass
+
+    def stop_preview(self):
+        pass
+
+    def frame(self, size=None):
+        width, height = size or self.resolution
+        return self.rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+    def capture(self, output, format=None, resize=None, use_video_port=False):
+        if self.capture_seconds:
+            time.sleep(self.capture_seconds)
+        frame = self.frame(resize)
+        if format != "rgb":
+            Image.fromarray(frame).save(output, format=format or "jpeg")
+            return
+        height, width, _ = frame.shape
+        padded = np.zeros(((height + 15) // 16 * 16, (width + 31) // 32 * 32, 3), dtype=np.uint8)
+        padded[:height, :width] = frame
+        buffer = np.frombuffer(output, dtype=np.uint8)
+        if buffer.size != padded.size:
+            raise ValueError(f"Output buffer is {buffer.size} bytes, an rgb capture needs {padded.size}")
+        buffer[:] = padded.reshape(-1)
+
+    def close(self):
+        self.closed = True
+
+
+class DummyInterpreter:
+    """
+    The subset of tflite_runtime.interpreter.Interpreter the classifier uses,
+    with the model's tensor shapes. The output is a softmax over channel
+    means; invoke_seconds stands in for the real inference time.
+
+    quantized=True gives a fully quantized model's tensors: uint8 input with
+    scale 1/255 and uint8 output with scale 1/256 (the TFLite converter's
+    defaults for a [0, 1] input and a softmax output). input_dtype and the
+    quantization tuples can be overridden, e.g. for an int8 model.
+    """
+    def __init__(self, input_shape=(1, 180, 180, 3), classes=2, invoke_seconds=0.0, quantized=False,
+                 input_dtype=None, input_quantization=None, output_dtype=None, output_quantization=None):
+        self.input_shape = tuple(input_shape)
+        self.classes = classes
+        self.invoke_seconds = invoke_seconds
+        if quantized:
+            self.input_dtype = np.uint8
+            self.input_quantization = (1 / 255, 0)
+            self.output_dtype = np.uint8
+            self.output_quantization = (1 / 256, 0)
+        else:
+            self.input_dtype = np.float32
+            self.input_quantization = (0.0, 0)
+            self.output_dtype = np.float32
+            self.output_quantization = (0.0, 0)
+        self.input_dtype = input_dtype or self.input_dtype
+        self.input_quantization = input_quantization or self.input_quantization
+        self.output_dtype = output_dtype or self.output_dtype
+        self.output_quantization = output_quantization or self.output_quantization
+        self.tensors = {}
+
+    def allocate_tensors(self):
+        pass
+
+    def get_input_details(self):
+        return [{
+            "name": "input", "index": 0, "shape": np.array(self.input_shape),
+            "dtype": self.input_dtype, "quantization": self.input_quantization,
+        }]
+
+    def get_output_details(self):
+        return [{
+            "name": "output", "index": 1, "shape": np.array((1, self.classes)),
+            "dtype": self.output_dtype, "quantization": self.output_quantization,
+        }]
+
+    def set_tensor(self, index, value):
+        if value.shape != self.input_shape or value.dtype != self.input_dtype:
+            raise ValueError(
+                f"Cannot set tensor: got {value.dtype} {value.shape}, expected {np.dtype(self.input_dtype)} {self.input_shape}"
+            )
+        self.tensors[index] = value.copy()  # TFLite copies the input into the model's own tensor
+
+    def invoke(self):
+        if self.invoke_seconds:
+            time.sleep(self.invoke_seconds)
+        means = self.tensors[0].reshape(-1, self.input_shape[-1]).mean(axis=0, dtype=np.float32)
+        scale, zero_point = self.input_quantization
+        if np.dtype(self.input_dtype).kind in "iu":
+            means = scale * (means - zero_point)
+        logits = np.resize(means, self.classes).astype(np.float32)
+        scores = np.exp(logits - logits.max())
+        probabilities = (scores / scores.sum()).reshape(1, self.classes)
+
+        scale, zero_point = self.output_quantization
+        if np.dtype(self.output_dtype).kind in "iu":
+            info = np.iinfo(self.output_dtype)
+            probabilities = np.clip(np.round(probabilities / scale + zero_point), info.min, info.max)
+        self.tensors[1] = probabilities.astype(self.output_dtype)
+
+    def get_tensor(self, index):
+        return self.tensors[index]
+
+
+class FakeGPIO:
+    """
+    The subset of RPi.GPIO the scripts use. Inputs are driven with
+    set_input() or bounce(); edge callbacks run on the caller's thread.
+    """
+    BCM = "BCM"
+    IN, OUT = 1, 0
+    LOW, HIGH = 0, 1
+    PUD_OFF, PUD_DOWN, PUD_UP = 20, 21, 22
+    RISING, FALLING, BOTH = 31, 32, 33
+
+    def __init__(self):
+        self.levels = {}
+        self.callbacks = {}
+
+    def setmode(self, mode):
+        pass
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, direction, pull_up_down=PUD_OFF, initial=LOW):
+        self.levels.setdefault(pin, self.HIGH if pull_up_down == self.PUD_UP else initial)
+
+    def input(self, pin):
+        return self.levels[pin]
+
+    def output(self, pin, level):
+        self.levels[pin] = level
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        if pin in self.callbacks:
+            raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
+        self.callbacks[pin] = (edge, callback)
+
+    def remove_event_detect(self, pin):
+        self.callbacks.pop(pin, None)
+
+    def set_input(self, pin, level):
+        previous = self.levels.get(pin)
+        self.levels[pin] = level
+        if pin not in self.callbacks or previous == level:
+            return
+        edge, callback = self.callbacks[pin]
+        if edge == self.BOTH or edge == (self.RISING if level == self.HIGH else self.FALLING):
+            callback(pin)
+
+    def bounce(self, pin, level, transitions=5, interval=0.001):
+        """Chatter for `transitions` edges, then settle at `level`"""
+        for i in range(transitions):
+            self.set_input(pin, level if i % 2 == 0 else 1 - level)
+            time.sleep(interval)
+        self.set_input(pin, level)
+
+    def cleanup(self):
+        self.callbacks.clear()
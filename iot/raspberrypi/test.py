@@ -1,12 +1,12 @@
 import RPi.GPIO as GPIO
-import time
 import requests
+from gpio_events import EdgeWatcher
 
 # Configuration
 GPIO_PIN = 15                  # GPIO pin for ultrasonic sensor
 BIN_ID = "Bin1"                # Your bin identifier
 BACKEND_URL = "https://pleasant-mullet-unified.ngrok-free.app/sensors/update-status"
-UPDATE_INTERVAL = 0.5          # Seconds between checks
+DEBOUNCE = 0.1                 # Seconds the sensor output must hold a new level
 
 # GPIO Setup
 GPIO.setmode(GPIO.BCM)
@@ -30,23 +30,19 @@ def send_bin_status(is_full):
         print(f"! Connection Error: {str(e)}")
 
 def main():
-    last_state = None
+    watcher = EdgeWatcher(GPIO, debounce=DEBOUNCE)
     print(f"🚀 Starting Smart Bin Monitor (ID: {BIN_ID})...")
     
     try:
-        while True:
-            current_state = GPIO.input(GPIO_PIN)
-            
-            # Only send update when state changes
-            if current_state != last_state:
-                send_bin_status(current_state)
-                last_state = current_state
-            
-            time.sleep(UPDATE_INTERVAL)
+        # Only send update when state changes (and once on start)
+        watcher.watch(GPIO_PIN, report_initial=True)
+        for event in watcher:
+            send_bin_status(event.level)
             
     except KeyboardInterrupt:
         print("\n🛑 Program stopped")
     finally:
+        watcher.close()
         GPIO.cleanup()
 
 if __name__ == "__main__":